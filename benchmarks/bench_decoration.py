@@ -0,0 +1,156 @@
+"""Benchmark adding ExecFlow decoration to large pipelines.
+
+Measures `add_execflow_decoration_to_pipeline()` for synthetic
+pipelines with up to 10^5 strategies and checks that its output equals
+the output of the original implementation, which rescanned all
+functions for every output name and sink location.
+
+Run with:
+
+    python benchmarks/bench_decoration.py [MAXSIZE]
+"""
+
+import copy
+import sys
+import time
+
+from ontoconv.pipelines import add_execflow_decoration_to_pipeline
+
+# The original implementation is only run up to this number of
+# strategies, since it is quadratic
+LEGACY_MAXSIZE = 10_000
+
+
+def synthetic_pipeline(nstrategies):
+    """Return `(strategies, names)` for a synthetic pipeline.
+
+    Half of the strategies are sources, where every fourth is a
+    function, and half are file sinks.  Every second sink writes to a
+    location shared with the previous sink.
+    """
+    strategies = []
+    names = {"input": [], "output": [], "triplestore": []}
+    nsources = nstrategies // 2
+    for i in range(nsources):
+        if i % 4 == 3:
+            name = f"convert_{i}"
+            strategies.append(
+                {
+                    "function": name,
+                    "functionType": "application/vnd.dlite-convert",
+                    "configuration": {"function_name": "convert"},
+                }
+            )
+        else:
+            name = f"source_{i}"
+            strategies.append(
+                {
+                    "dataresource": name,
+                    "downloadUrl": f"file:source_{i}.json",
+                    "mediaType": "application/json",
+                }
+            )
+        names["output"].append(name)
+    for i in range(nstrategies - nsources):
+        name = f"sink_{i}"
+        strategies.append(
+            {
+                "function": name,
+                "functionType": "application/vnd.dlite-generate",
+                "configuration": {"location": f"sink_{i // 2}.json"},
+            }
+        )
+        names["input"].append(name)
+    return strategies, names
+
+
+# pylint: disable=duplicate-code
+# Verbatim copy of the original implementation, kept as the reference
+def legacy_decoration(strategies, names):
+    """The original implementation of
+    `add_execflow_decoration_to_pipeline()`."""
+    functions = [f for f in strategies if "function" in f.keys()]
+    if not any(f["function"] == "datanode2cuds" for f in functions):
+        for name in names["output"].copy():
+            func = [f for f in functions if f["function"] == name]
+            if len(func) > 1:
+                raise ValueError(f"Multiple functions with name {name}")
+            if len(func) == 1:
+                strategies.append(
+                    {
+                        "function": "datanode2cuds",
+                        "functionType": "aiidacuds/datanode2cuds",
+                        "configuration": {"names": "to_cuds"},
+                    }
+                )
+                names["output"].insert(0, "datanode2cuds")
+                break
+    func = [f for f in functions if f["function"] in names["input"]]
+    locations = set(
+        f["configuration"]["location"]
+        for f in func
+        if "location" in f["configuration"]
+    )
+    labels = []
+    for loc in locations:
+        label = [f for f in func if f["configuration"]["location"] == loc][0][
+            "function"
+        ]
+        function_name = label + "_to_aiida_datanode"
+        strategies.append(
+            {
+                "function": function_name,
+                "functionType": "aiidacuds/file2collection",
+                "configuration": {"path": loc, "label": label},
+            }
+        )
+        names["input"].append(function_name)
+        labels.append(label)
+    if labels:
+        strategies.append(
+            {
+                "function": "cuds2datanode",
+                "functionType": "aiidacuds/cuds2datanode",
+                "configuration": {"names": "from_cuds"},
+            }
+        )
+        names["input"].append("cuds2datanode")
+    return strategies, names
+
+
+# pylint: enable=duplicate-code
+def timed(func, strategies, names, repeat=3):
+    """Return the result of the fastest of `repeat` calls of `func`
+    with copies of `strategies` and `names`, and its wall time."""
+    elapsed = float("inf")
+    for _ in range(repeat):
+        args = copy.deepcopy((strategies, names))
+        t0 = time.perf_counter()
+        result = func(*args)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+    return result, elapsed
+
+
+def main(maxsize=100_000):
+    """Run the benchmark for sizes from 100 to `maxsize`."""
+    size = 100
+    while size <= maxsize:
+        strategies, names = synthetic_pipeline(size)
+        result, elapsed = timed(
+            add_execflow_decoration_to_pipeline, strategies, names
+        )
+        line = (
+            f"strategies={size:7d} time={elapsed:9.4f}s "
+            f"per strategy={elapsed / size * 1e6:6.2f}us"
+        )
+        if size <= LEGACY_MAXSIZE:
+            expected, legacy = timed(legacy_decoration, strategies, names)
+            if result != expected:
+                raise AssertionError(f"Output differs for {size} strategies")
+            line += f"  legacy={legacy:9.4f}s (x{legacy / elapsed:.0f})"
+        print(line)
+        size *= 10
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,52 @@
+"""Benchmark building OntoFlow trees.
+
+Run with:
+
+    python benchmarks/bench_ontoflow_tree.py [NNODES]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from synthetic import synthetic_ontoflow
+
+from ontoconv.ontoflow import OntoFlowTree
+
+
+def bench_tree(nnodes, fanout):
+    """Build a synthetic tree and return a dict with timings."""
+    data = synthetic_ontoflow(nnodes, fanout=fanout)
+
+    t0 = time.perf_counter()
+    tree = OntoFlowTree(data)
+    elapsed = time.perf_counter() - t0
+    del tree
+
+    tracemalloc.start()
+    tree = OntoFlowTree(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "nodes": len(tree),
+        "steps": len(tree.steps),
+        "depth": max(node.depth for node in tree.nodes),
+        "seconds": elapsed,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def main(nnodes=100_000):
+    """Run the benchmark for a wide and a deep tree."""
+    for name, fanout in [("wide", 4), ("binary", 2), ("deep", 1)]:
+        result = bench_tree(nnodes, fanout)
+        print(
+            f"{name:7s} nodes={result['nodes']:7d} "
+            f"steps={result['steps']:6d} depth={result['depth']:7d} "
+            f"time={result['seconds']:.3f}s peak={result['peak_mb']:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,309 @@
+"""Benchmark the phases of converting OntoFlow output to a workchain.
+
+The benchmark generates synthetic resources, knowledge bases and
+OntoFlow trees (see `synthetic.py`) and measures wall time, peak memory
+and the number of triplestore calls of each phase:
+
+  - populate: `populate_triplestore()` from a resources.yaml file
+  - generate_pipeline: `generate_ontoflow_pipeline()` for all steps
+  - parse_ontoflow: `parse_ontoflow()`, including writing the files
+
+Run with:
+
+    python benchmarks/bench_phases.py [--scale NAME ...] [--save FILE]
+        [--compare FILE] [--threshold RATIO] [--check-time]
+
+or with custom parameters:
+
+    python benchmarks/bench_phases.py --nnodes 5000 --fanout 3 \
+        --maxdepth 10 --nextra 10000
+
+Use `--save benchmarks/baseline.json` to store a new baseline and
+`--compare benchmarks/baseline.json` to compare against it.  The
+comparison exits with a non-zero status if a phase uses more memory
+than `threshold` times the baseline, or makes more triplestore calls
+than the baseline.
+
+Wall time depends on the machine, so it is only checked with
+`--check-time`.  The time of each phase is then divided by the time of
+a fixed reference workload measured in the same run, such that results
+from different machines are comparable.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic import synthetic_ontoflow, synthetic_resources, write_resources
+from tripper import Triplestore
+
+import ontoconv
+from ontoconv.cache import ResourceCache
+from ontoconv.ontoflow import OntoFlowTree, parse_ontoflow
+from ontoconv.pipelines import generate_ontoflow_pipeline, populate_triplestore
+from ontoconv.tracing import RecordingTriplestore
+
+# Named benchmark configurations
+SCALES = {
+    "small": {"nnodes": 200, "fanout": 2, "maxdepth": None, "nextra": 200},
+    "wide": {"nnodes": 2000, "fanout": 8, "maxdepth": 6, "nextra": 1000},
+    "deep": {"nnodes": 1000, "fanout": 1, "maxdepth": None, "nextra": 0},
+    "large": {"nnodes": 2000, "fanout": 3, "maxdepth": None, "nextra": 5000},
+}
+
+# Metrics compared against the baseline with a tolerance
+METRICS = ("seconds", "peak_mb")
+
+# Metrics that are always checked.  Wall time is opt-in
+DETERMINISTIC_METRICS = ("peak_mb",)
+
+
+def reference_seconds(repeat=5):
+    """Return the time of a fixed pure-Python workload, which the wall
+    time of the phases is measured relative to."""
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(200_000)]
+    elapsed = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        sorted(values)
+        dict.fromkeys(f"{v:.6f}" for v in values)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+    return elapsed
+
+
+def measure(setup, run, repeat=3):
+    """Measure a single phase.
+
+    Arguments:
+        setup: Callable returning a fresh RecordingTriplestore, which
+            is passed to `run`.
+        run: Callable running the phase.
+        repeat: Number of timed runs.  The fastest one is reported.
+
+    Returns:
+        Dict with wall time, peak memory and triplestore call counts.
+    """
+    elapsed = float("inf")
+    for _ in range(repeat):
+        ts = setup()
+        t0 = time.perf_counter()
+        run(ts)
+        elapsed = min(elapsed, time.perf_counter() - t0)
+
+    # Measure memory in a separate run, since tracing slows it down
+    traced = setup()
+    tracemalloc.start()
+    run(traced)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": elapsed,
+        "peak_mb": peak / 2**20,
+        "calls": dict(sorted(ts.calls.items())),
+    }
+
+
+def bench_scale(nnodes, fanout=2, maxdepth=None, nextra=0):
+    """Run all phases for one configuration and return the results."""
+    data = synthetic_ontoflow(nnodes, fanout=fanout, maxdepth=maxdepth)
+    resources = synthetic_resources(data, nextra=nextra)
+    tree = OntoFlowTree(data)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yamlfile = Path(tmpdir) / "resources.yaml"
+        write_resources(resources, yamlfile)
+        kb = Triplestore(backend="rdflib")
+        populate_triplestore(kb, yamlfile)
+
+        def fresh():
+            return RecordingTriplestore(Triplestore(backend="rdflib"))
+
+        def populated():
+            return RecordingTriplestore(kb)
+
+        def generate(ts):
+            cache = ResourceCache(ts)
+            for step in tree.steps:
+                generate_ontoflow_pipeline(ts, step.inputs, cache=cache)
+
+        outdir = Path(tmpdir) / "out"
+        outdir.mkdir()
+
+        results = {
+            "populate": measure(
+                fresh, lambda ts: populate_triplestore(ts, yamlfile)
+            ),
+            "generate_pipeline": measure(populated, generate),
+            "parse_ontoflow": measure(
+                populated, lambda ts: parse_ontoflow(data, ts, outdir=outdir)
+            ),
+        }
+
+    return {
+        "parameters": {
+            "nnodes": nnodes,
+            "fanout": fanout,
+            "maxdepth": maxdepth,
+            "nextra": nextra,
+        },
+        "size": {
+            "nodes": len(tree),
+            "steps": len(tree.steps),
+            "depth": max(node.depth for node in tree.nodes),
+            "resources": len(resources["data_resources"])
+            + len(resources["simulation_resources"]),
+            "triples": sum(1 for _ in kb.triples()),
+        },
+        "phases": results,
+    }
+
+
+def relative_seconds(results, baseline):
+    """Return the factor to scale the wall times in `baseline` with,
+    to compare them to the wall times in `results`."""
+    if "reference_seconds" not in baseline:
+        return 1.0
+    return results["reference_seconds"] / baseline["reference_seconds"]
+
+
+def compare(results, baseline, threshold=1.2, check_time=False):
+    """Compare `results` with `baseline` and return a list of
+    regressions as human readable strings.
+
+    Wall times are only compared if `check_time` is true, relative to
+    the reference workload.  See `reference_seconds()`.
+    """
+    metrics_to_check = METRICS if check_time else DETERMINISTIC_METRICS
+    scale_factors = {
+        "seconds": relative_seconds(results, baseline),
+        "peak_mb": 1.0,
+    }
+    regressions = []
+    for scale, result in results["scales"].items():
+        base = baseline["scales"].get(scale)
+        if base is None or base["parameters"] != result["parameters"]:
+            continue
+        for phase, metrics in result["phases"].items():
+            basemetrics = base["phases"].get(phase)
+            if basemetrics is None:
+                continue
+            for metric in metrics_to_check:
+                base_value = basemetrics[metric] * scale_factors[metric]
+                ratio = metrics[metric] / max(base_value, 1e-9)
+                if ratio > threshold:
+                    regressions.append(
+                        f"{scale}/{phase}: {metric} {metrics[metric]:.3f} "
+                        f"vs {base_value:.3f} (x{ratio:.2f})"
+                    )
+            ncalls = sum(metrics["calls"].values())
+            nbase = sum(basemetrics["calls"].values())
+            if ncalls > nbase:
+                regressions.append(
+                    f"{scale}/{phase}: triplestore calls {ncalls} vs {nbase}"
+                )
+    return regressions
+
+
+def report(results, baseline=None):
+    """Print a table with the results."""
+    for scale, result in results["scales"].items():
+        size = result["size"]
+        print(
+            f"{scale}: nodes={size['nodes']} steps={size['steps']} "
+            f"depth={size['depth']} resources={size['resources']} "
+            f"triples={size['triples']}"
+        )
+        base = (baseline or {}).get("scales", {}).get(scale, {})
+        factor = relative_seconds(results, baseline) if baseline else 1.0
+        for phase, metrics in result["phases"].items():
+            line = (
+                f"  {phase:18s} time={metrics['seconds']:8.3f}s "
+                f"peak={metrics['peak_mb']:8.1f}MB "
+                f"calls={sum(metrics['calls'].values()):8d}"
+            )
+            basemetrics = base.get("phases", {}).get(phase)
+            if basemetrics:
+                line += "  (baseline: " + " ".join(
+                    f"x{metrics[m] / max(basemetrics[m] * f, 1e-9):.2f}"
+                    for m, f in zip(METRICS, (factor, 1.0))
+                )
+                line += ")"
+            print(line)
+
+
+def main(argv=None):
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.partition("\n")[0])
+    parser.add_argument(
+        "--scale",
+        action="append",
+        choices=SCALES,
+        help="Named configuration to run.  May be repeated.",
+    )
+    parser.add_argument("--nnodes", type=int, help="Custom number of nodes.")
+    parser.add_argument("--fanout", type=int, default=2)
+    parser.add_argument("--maxdepth", type=int)
+    parser.add_argument("--nextra", type=int, default=0)
+    parser.add_argument("--save", metavar="FILE", help="Save results.")
+    parser.add_argument("--compare", metavar="FILE", help="Baseline file.")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument(
+        "--check-time",
+        action="store_true",
+        help="Also compare wall times, relative to a reference workload.",
+    )
+    args = parser.parse_args(argv)
+
+    scales = {}
+    if args.nnodes:
+        scales["custom"] = {
+            "nnodes": args.nnodes,
+            "fanout": args.fanout,
+            "maxdepth": args.maxdepth,
+            "nextra": args.nextra,
+        }
+    for name in args.scale or ([] if scales else ["small"]):
+        scales[name] = SCALES[name]
+
+    results = {
+        "ontoconv": ontoconv.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "reference_seconds": reference_seconds(),
+        "scales": {name: bench_scale(**kw) for name, kw in scales.items()},
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf8") as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if baseline:
+        regressions = compare(
+            results,
+            baseline,
+            threshold=args.threshold,
+            check_time=args.check_time,
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
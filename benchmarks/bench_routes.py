@@ -0,0 +1,113 @@
+"""Benchmark ranking the alternative routes in OntoFlow output.
+
+Measures building a `RouteSet` and ranking its routes by weighted score
+and by Pareto dominance for synthetic OntoFlow output with an
+increasing number of routes.  For small sizes the first Pareto front is
+checked against a brute-force comparison of all pairs of routes.
+
+Run with:
+
+    python benchmarks/bench_routes.py [MAXROOTS]
+"""
+
+import itertools
+import random
+import sys
+import time
+
+import numpy as np
+
+from ontoconv.routes import RouteSet
+
+# The brute-force Pareto front is only computed up to this number of
+# routes, since it is quadratic
+BRUTE_FORCE_MAXSIZE = 20_000
+
+
+def synthetic_flow(nroots, depth=2, seed=1):
+    """Return synthetic OntoFlow output.
+
+    The root can be produced by `nroots` alternative models.  Each model
+    above the given `depth` has two inputs, which can be produced by
+    any of four models or taken from an existing individual.
+    """
+    rng = random.Random(seed)
+    counter = itertools.count()
+
+    def model(level):
+        i = next(counter)
+        if level == 0:
+            alternatives = [[individual(i)]]
+        else:
+            alternatives = [
+                [model(level - 1) for _ in range(4)] + [individual(i)]
+                for _ in range(2)
+            ]
+        return {
+            "iri": f"http://example.com/bench#Model{i}",
+            "predicate": "hasOutput",
+            "kpas": {
+                "Accuracy": rng.randint(0, 100),
+                "SimulationTime": rng.random() * 100,
+                "OpenSource": rng.randint(0, 1),
+            },
+            "children": [
+                {
+                    "iri": f"http://example.com/bench#Input{i}_{j}",
+                    "predicate": "hasInput",
+                    "children": children,
+                }
+                for j, children in enumerate(alternatives)
+            ],
+        }
+
+    def individual(i):
+        return {
+            "iri": f"http://example.com/bench#individual{i}",
+            "predicate": "individual",
+        }
+
+    return {
+        "iri": "http://example.com/bench#Root",
+        "children": [model(depth) for _ in range(nroots)],
+    }
+
+
+def brute_force_front(routes):
+    """Return the sorted indexes of the routes not dominated by any
+    other route, comparing all pairs of routes."""
+    values = routes.values * routes._signs  # pylint: disable=protected-access
+    dominated = (
+        (values[np.newaxis] >= values[:, np.newaxis]).all(axis=2)
+        & (values[np.newaxis] > values[:, np.newaxis]).any(axis=2)
+    ).any(axis=1)
+    return np.nonzero(~dominated)[0]
+
+
+def main(maxroots=64):
+    """Run the benchmark for 1 to `maxroots` alternative root models."""
+    nroots = 1
+    while nroots <= maxroots:
+        data = synthetic_flow(nroots)
+        t0 = time.perf_counter()
+        routes = RouteSet(data)
+        t1 = time.perf_counter()
+        routes.rank(10)
+        t2 = time.perf_counter()
+        routes.rank(10, method="pareto")
+        t3 = time.perf_counter()
+        line = (
+            f"routes={len(routes):8d} build={t1 - t0:7.4f}s "
+            f"weighted={t2 - t1:7.4f}s pareto={t3 - t2:7.4f}s"
+        )
+        if len(routes) <= BRUTE_FORCE_MAXSIZE:
+            if not np.array_equal(
+                routes.pareto_fronts(1)[0], brute_force_front(routes)
+            ):
+                raise AssertionError(f"Pareto front differs for {nroots}")
+        print(line)
+        nroots *= 4
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,193 @@
+"""Generators for synthetic input used by the benchmarks."""
+
+from collections import deque
+
+import yaml
+
+EX = "http://example.com/synthetic#"
+
+
+def synthetic_ontoflow(nnodes, fanout=2, maxdepth=None):
+    """Return a synthetic OntoFlow tree with approximately `nnodes` nodes.
+
+    The tree is expanded breadth-first.  Each data concept is the output
+    of a simulation step with `fanout` data concepts as input, until
+    the node budget is used up.  Remaining concepts are fed by an
+    individual.  With `fanout=1`, the tree degenerates to a chain with
+    a depth of about `nnodes`.
+
+    Arguments:
+        nnodes: Approximate number of nodes in the tree.
+        fanout: Number of inputs to each simulation step.
+        maxdepth: If given, concepts at this depth or deeper are not
+            expanded, which limits the depth of the tree to about
+            `maxdepth + 1`.
+
+    Returns:
+        Dict with the same structure as the output of OntoFlow.
+    """
+    count = 1
+    root = {"depth": 0, "iri": f"{EX}Concept0"}
+    queue = deque([root])
+    while queue:
+        concept = queue.popleft()
+        depth = concept["depth"]
+        # Expand if there is room for the step, its inputs and one
+        # individual for each pending concept
+        if (maxdepth is None or depth < maxdepth) and (
+            count + 1 + 2 * fanout + len(queue) <= nnodes
+        ):
+            step = {
+                "depth": depth + 1,
+                "iri": f"{EX}Simulation{count}",
+                "predicate": "hasOutput",
+                "children": [],
+            }
+            concept["children"] = [step]
+            count += 1
+            for _ in range(fanout):
+                child = {
+                    "depth": depth + 2,
+                    "iri": f"{EX}Concept{count}",
+                    "predicate": "hasInput",
+                }
+                step["children"].append(child)
+                queue.append(child)
+                count += 1
+        else:
+            concept["children"] = [
+                {
+                    "depth": depth + 1,
+                    "iri": f"{EX}individual{count}",
+                    "predicate": "individual",
+                }
+            ]
+            count += 1
+    return root
+
+
+def _iter_tree(data):
+    """Yield all nodes in the tree `data` without recursion."""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.get("children", ()))
+
+
+def synthetic_resources(data, nextra=0):
+    """Return a synthetic resource documentation for an OntoFlow tree.
+
+    The returned dict has the same structure as a resources.yaml file
+    accepted by `ontoconv.populate_triplestore()`.  It documents a data
+    resource for each individual and a simulation resource for each
+    simulation step in `data`, such that `parse_ontoflow()` can
+    generate a workchain from `data` and the populated knowledge base.
+
+    Arguments:
+        data: OntoFlow tree as returned by `synthetic_ontoflow()`.
+        nextra: Number of additional data resources that are not
+            referred to by the tree.  Use it to scale the size of the
+            knowledge base independently of the tree.
+
+    Returns:
+        Dict with the synthetic resource documentation.
+    """
+    data_resources = {}
+    simulation_resources = {}
+
+    def dataresource(name):
+        return [
+            {
+                "dataresource": {
+                    "downloadUrl": f"file://data/{name}.json",
+                    "mediaType": "application/json",
+                }
+            }
+        ]
+
+    for concept in _iter_tree(data):
+        for child in concept.get("children", ()):
+            name = child["iri"].split("#", 1)[-1]
+            if child["predicate"] == "individual":
+                data_resources[child["iri"]] = dataresource(name)
+            elif child["predicate"] == "hasOutput":
+                output = concept["iri"].split("#", 1)[-1]
+                simulation_resources[f"syn:{name}"] = {
+                    "aiida_plugin": "execwrapper",
+                    "command": f"run_{name.lower()}.sh --verbose",
+                    "aiida_datanodes": {
+                        f"syn:{output}": "http://onto-ns.com/meta/2.0/"
+                        "core.singlefile",
+                    },
+                    "input": {
+                        f"syn:{inp['iri'].split('#', 1)[-1]}": [
+                            {
+                                "function": {
+                                    "functionType": "application/"
+                                    "vnd.dlite-generate",
+                                    "configuration": {
+                                        "driver": "json",
+                                        "location": f"{name}_{i}.json",
+                                        "datamodel": f"{EX}DataModel",
+                                    },
+                                }
+                            }
+                        ]
+                        for i, inp in enumerate(child["children"])
+                    },
+                    "output": {
+                        f"syn:{output}": [
+                            {
+                                "dataresource": {
+                                    "downloadUrl": f"{output}.json",
+                                    "mediaType": "application/"
+                                    "vnd.dlite-parse",
+                                    "configuration": {
+                                        "driver": "json",
+                                        "datamodel": f"{EX}DataModel",
+                                    },
+                                }
+                            }
+                        ]
+                    },
+                }
+
+    for i in range(nextra):
+        data_resources[f"{EX}extra{i}"] = dataresource(f"extra{i}")
+
+    return {
+        "version": 1,
+        "prefixes": {"syn": EX},
+        "data_resources": data_resources,
+        "simulation_resources": simulation_resources,
+    }
+
+
+def write_resources(resources, filename):
+    """Write resource documentation to a resources.yaml file."""
+    with open(filename, "w", encoding="utf8") as f:
+        yaml.safe_dump(resources, f, sort_keys=False)
+
+
+def synthetic_kb(resources, filename, backend="rdflib"):
+    """Return a knowledge base populated with `resources`.
+
+    Arguments:
+        resources: Resource documentation as returned by
+            `synthetic_resources()`.
+        filename: Name of the resources.yaml file to write.
+        backend: Tripper backend of the returned triplestore.
+
+    Returns:
+        A populated tripper.Triplestore.
+    """
+    # pylint: disable=import-outside-toplevel
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import populate_triplestore
+
+    write_resources(resources, filename)
+    ts = Triplestore(backend=backend)
+    populate_triplestore(ts, filename)
+    return ts
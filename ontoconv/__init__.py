@@ -2,19 +2,59 @@
 
 __version__ = "0.1.0"
 
+from .aio import (
+    generate_ontoflow_pipeline_async,
+    parse_ontoflow_async,
+    populate_triplestore_async,
+)
+from .batch import TripleBuffer
+from .cache import ResourceCache, ResourceProvider
+from .ontoflow import iter_workchain, parse_ontoflow
+from .persistent import PersistentCache
 from .pipelines import (
+    DataPipelineRunner,
     generate_ontoflow_pipeline,
     get_data,
+    get_data_batch,
     load_simulation_resource,
     populate_triplestore,
+    populate_triplestore_parallel,
     save_simulation_resource,
 )
+from .providers import YamlProvider
+from .routes import RouteSet, parse_top_routes
+from .sinks import ArchiveSink, DirectorySink, MemorySink
+from .snapshot import KBSnapshot, compile_snapshot, load_snapshot
+from .tracing import RecordingTriplestore, Tracer
 
 __all__ = (
     "__version__",
+    "ArchiveSink",
+    "DataPipelineRunner",
+    "DirectorySink",
+    "KBSnapshot",
+    "MemorySink",
+    "PersistentCache",
+    "RecordingTriplestore",
+    "ResourceCache",
+    "ResourceProvider",
+    "RouteSet",
+    "TripleBuffer",
+    "Tracer",
+    "YamlProvider",
+    "compile_snapshot",
     "generate_ontoflow_pipeline",
+    "generate_ontoflow_pipeline_async",
     "get_data",
+    "get_data_batch",
+    "iter_workchain",
     "load_simulation_resource",
+    "load_snapshot",
+    "parse_ontoflow",
+    "parse_ontoflow_async",
+    "parse_top_routes",
     "populate_triplestore",
+    "populate_triplestore_async",
+    "populate_triplestore_parallel",
     "save_simulation_resource",
 )
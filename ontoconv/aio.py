@@ -0,0 +1,304 @@
+"""Asyncio variants of the conversion API.
+
+Tripper triplestores are blocking, so the async functions run the
+knowledge base access and file I/O in the event loop's default
+executor.  Independent fetches and writes are issued concurrently, with
+at most `max_concurrency` of them in progress at a time.
+
+Resources are first fetched concurrently into a resource cache.  The
+pipelines are then generated from the cache by the same code as the
+synchronous API, so the output is identical to the output of
+`populate_triplestore()`, `generate_ontoflow_pipeline()` and
+`parse_ontoflow()`.
+"""
+
+import asyncio
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING
+
+from ontoconv.batch import TripleBuffer
+from ontoconv.cache import ResourceCache, _keys_token, get_cache
+from ontoconv.ontoflow import (
+    OntoFlowTree,
+    check_layout,
+    load_manifest,
+    pipeline_resources,
+    save_workchain,
+    step_jobs,
+)
+from ontoconv.pipelines import (
+    RECOGNISED_KEYS,
+    add_documentation,
+    generate_ontoflow_pipeline,
+)
+from ontoconv.sinks import as_sink
+from ontoconv.tracing import in_context, span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Future
+    from typing import Callable, Deque, Iterable, Optional, Tuple, Union
+
+    from tripper import Triplestore
+
+
+class _Limiter:  # pylint: disable=too-few-public-methods
+    """Runs blocking callables in the default executor, with at most
+    `max_concurrency` of them running at a time."""
+
+    def __init__(self, max_concurrency: int):
+        if max_concurrency < 1:
+            raise ValueError("`max_concurrency` must be at least 1")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, func: "Callable", *args, **kwargs):
+        """Call `func(*args, **kwargs)` in a worker thread."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                None, in_context(partial(func, *args, **kwargs))
+            )
+
+
+class _ChunkSender(TripleBuffer):
+    """Triple buffer used from a worker thread, which sends each chunk
+    to the triplestore through `limiter` as soon as it is flushed.
+
+    At most `max_pending` chunks are kept in memory while waiting to be
+    added.  Further flushes block until the oldest of them is added.
+    """
+
+    def __init__(
+        self,
+        ts,
+        loop: "asyncio.AbstractEventLoop",
+        limiter: _Limiter,
+        max_pending: int,
+        *,
+        chunk_size=None,
+    ):
+        super().__init__(ts, chunk_size=chunk_size)
+        self._loop = loop
+        self._limiter = limiter
+        self._max_pending = max_pending
+        self._pending: "Deque[Future]" = deque()
+
+    def _add(self, chunk):
+        while len(self._pending) >= self._max_pending:
+            self._pending.popleft().result()
+        self._pending.append(
+            asyncio.run_coroutine_threadsafe(
+                self._limiter.run(self._send, chunk), self._loop
+            )
+        )
+        self.triples += len(chunk)
+        self.flushes += 1
+
+    def _send(self, chunk):
+        with span("add_triples", triples=len(chunk)):
+            self.ts.add_triples(chunk)
+
+    def wait(self) -> None:
+        """Wait until all flushed chunks are added.  Errors from adding
+        them are re-raised."""
+        while self._pending:
+            self._pending.popleft().result()
+
+
+async def prefetch(
+    cache,
+    resources: "Iterable[Tuple[str, Union[dict, str]]]",
+    limiter: _Limiter,
+) -> None:
+    """Load `resources` concurrently into `cache`.
+
+    Errors are ignored, such that they are raised with the same message
+    as in the synchronous API when the resource is used.
+
+    Arguments:
+        cache: Resource cache to load the resources into.
+        resources: Iterable of `(iri, recognised_keys)` tuples.
+        limiter: Limits the number of concurrent fetches.
+    """
+    unique = {}
+    for iri, keys in resources:
+        unique.setdefault((iri, _keys_token(keys)), (iri, keys))
+    await asyncio.gather(
+        *(
+            limiter.run(
+                cache.load_container,
+                iri,
+                recognised_keys=keys,
+                ignore_unrecognised=True,
+            )
+            for iri, keys in unique.values()
+        ),
+        return_exceptions=True,
+    )
+
+
+def _prefetch_cache(ts, cache):
+    """Return the cache to prefetch resources from `ts` into.
+
+    The cache must be unbounded, such that no prefetched resource is
+    evicted before it is used.
+    """
+    if cache is None and not hasattr(ts, "load_container"):
+        return ResourceCache(ts, maxsize=None)
+    return get_cache(ts, cache)
+
+
+async def populate_triplestore_async(
+    ts: "Triplestore",
+    yamlfile: str,
+    batch: bool = False,
+    chunk_size: "Optional[int]" = None,
+    stream: bool = False,
+    *,
+    max_concurrency: int = 4,
+    compact: bool = False,
+) -> dict:
+    """Async variant of `ontoconv.pipelines.populate_triplestore()`.
+
+    The documentation is read and converted to triples in a worker
+    thread.  Each update is sent to the triplestore as soon as it is
+    flushed, so that only a bounded number of updates are held in
+    memory, and concurrently with reading the rest of the
+    documentation.  Since the in-memory rdflib backend is not thread
+    safe, updates to it are instead added one by one from the worker
+    thread.
+
+    Arguments:
+        ts: Tripper triplestore documenting data sources and sinks.
+        yamlfile: Standardised YAML file to load the data documentation
+            from.
+        batch: Whether to add the triples in as few updates as
+            possible.
+        chunk_size: In batch mode, the maximum number of triples to add
+            in a single update.
+        stream: Whether to parse `yamlfile` incrementally.
+        max_concurrency: Maximum number of concurrent updates.  At most
+            this number of updates are waiting to be added at a time.
+        compact: Whether to save simulation resources in compact mode.
+
+    Returns:
+        Dict with the number of added `triples` and the number of
+        `flushes` (updates) made to the triplestore.
+    """
+    limiter = _Limiter(max_concurrency)
+    loop = asyncio.get_running_loop()
+    chunk_size = chunk_size if batch else None
+    if ts.backend_name == "rdflib":
+        buffer = TripleBuffer(ts, chunk_size=chunk_size)
+    else:
+        buffer = _ChunkSender(
+            ts, loop, limiter, max_concurrency, chunk_size=chunk_size
+        )
+
+    def populate():
+        report = add_documentation(
+            ts, yamlfile, buffer, batch=batch, stream=stream, compact=compact
+        )
+        if isinstance(buffer, _ChunkSender):
+            buffer.wait()
+        return report
+
+    # Not run through the limiter, which the updates are sent through
+    return await loop.run_in_executor(None, in_context(populate))
+
+
+async def generate_ontoflow_pipeline_async(
+    ts: "Triplestore",
+    nodes,
+    save_final_output=False,
+    recognised_keys: "Optional[Union[dict, str]]" = "basic",
+    target_ts: "Optional[Triplestore]" = None,
+    *,
+    cache: "Optional[ResourceCache]" = None,
+    max_concurrency: int = 8,
+) -> dict:
+    """Async variant of `ontoconv.pipelines.generate_ontoflow_pipeline()`.
+
+    The data resources and simulation resources used by the pipeline
+    are fetched concurrently before the pipeline is generated.
+
+    Arguments:
+        ts, nodes, save_final_output, recognised_keys, target_ts, cache:
+            See `generate_ontoflow_pipeline()`.  A given `cache` should
+            be large enough to hold all resources of the pipeline.
+        max_concurrency: Maximum number of concurrent fetches.
+
+    Returns:
+        Dict-representation of a declarative ExecFlow pipeline.
+    """
+    limiter = _Limiter(max_concurrency)
+    cache = _prefetch_cache(ts, cache)
+    await prefetch(cache, pipeline_resources(nodes, recognised_keys), limiter)
+    return generate_ontoflow_pipeline(
+        ts,
+        nodes,
+        save_final_output,
+        recognised_keys,
+        target_ts,
+        cache=cache,
+    )
+
+
+async def parse_ontoflow_async(
+    workflow_data,
+    kb,
+    outdir=".",
+    target_ts: "Optional[Triplestore]" = None,
+    *,
+    cache: "Optional[ResourceCache]" = None,
+    max_concurrency: int = 8,
+    incremental: bool = False,
+    dedup: bool = False,
+    layout: str = "linear",
+) -> dict:
+    """Async variant of `ontoconv.ontoflow.parse_ontoflow()`.
+
+    All resources used by the workchain are fetched concurrently.  The
+    pipelines of all steps are then generated and saved concurrently in
+    worker threads.
+
+    Arguments:
+        workflow_data, kb, outdir, target_ts, cache, incremental, dedup,
+        layout: See `parse_ontoflow()`.  A given `cache` should be large
+            enough to hold all resources of the workchain.
+        max_concurrency: Maximum number of concurrent fetches and file
+            writes.
+
+    Returns:
+        Dict with lists of the file names that were `written` and
+        `skipped`.
+    """
+    check_layout(layout)
+    limiter = _Limiter(max_concurrency)
+    cache = _prefetch_cache(kb, cache)
+    outdir = as_sink(outdir)
+    manifest = (
+        await limiter.run(load_manifest, outdir) if incremental else None
+    )
+    tree = await limiter.run(OntoFlowTree, workflow_data, dedup=dedup)
+
+    resources = []
+    for step in tree.steps:
+        resources.append((step.iri, RECOGNISED_KEYS))
+        resources.extend(pipeline_resources(step.inputs))
+    if tree.steps:
+        resources.extend(pipeline_resources(tree.steps[-1].outputs))
+    await prefetch(cache, resources, limiter)
+
+    staged = layout == "stages"
+    jobs = step_jobs(
+        kb, tree, outdir, target_ts, cache, manifest=manifest, named=staged
+    )
+    results = await asyncio.gather(*(limiter.run(job) for job in jobs))
+    return await limiter.run(
+        save_workchain,
+        results,
+        outdir,
+        manifest,
+        stages=tree.stages() if staged else None,
+    )
@@ -5,7 +5,9 @@ class AttrDict(dict):
     """Simple implementation of a dict with attribute access.
 
     Use with care. Methods like `keys()` can be overwritten by
-    incoming data.
+    incoming data.  Since each instance references itself, it is only
+    freed by the cyclic garbage collector.  Prefer the read-only
+    `ontoconv.views.ResourceView`.
 
     Code from:
     https://stackoverflow.com/questions/4984647/accessing-dict-keys-like-an-attribute
@@ -0,0 +1,72 @@
+"""Batched insertion of triples into a triplestore."""
+
+from typing import TYPE_CHECKING
+
+from ontoconv.tracing import span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Iterable, List, Optional
+
+    from tripper import Triplestore
+    from tripper.triplestore import Triple
+
+
+class TripleBuffer:
+    """Collects triples in memory and adds them to a triplestore in chunks.
+
+    Each flush is a single call to `Triplestore.add_triples()`, which
+    for remote backends corresponds to a single SPARQL `INSERT DATA`
+    update.
+
+    Arguments:
+        ts: Tripper triplestore to add the triples to.
+        chunk_size: Flush automatically whenever this number of triples
+            has been collected.  If None, triples are only added to the
+            triplestore on explicit calls to `flush()`.
+
+    Attributes:
+        triples: Number of triples added to the triplestore so far.
+        flushes: Number of calls made to `Triplestore.add_triples()`.
+    """
+
+    def __init__(self, ts: "Triplestore", chunk_size: "Optional[int]" = None):
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive: {chunk_size}")
+        self.ts = ts
+        self.chunk_size = chunk_size
+        self.triples = 0
+        self.flushes = 0
+        self._buffer: "List[Triple]" = []
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def add(self, triple: "Triple") -> None:
+        """Add `triple` to the buffer."""
+        self.add_triples([triple])
+
+    def add_triples(self, triples: "Iterable[Triple]") -> None:
+        """Add a sequence of triples to the buffer."""
+        self._buffer.extend(triples)
+        if self.chunk_size:
+            while len(self._buffer) >= self.chunk_size:
+                chunk = self._buffer[: self.chunk_size]
+                del self._buffer[: self.chunk_size]
+                self._add(chunk)
+
+    def flush(self) -> None:
+        """Add all buffered triples to the triplestore."""
+        if self._buffer:
+            chunk, self._buffer = self._buffer, []
+            self._add(chunk)
+
+    def report(self) -> dict:
+        """Return a dict with the number of triples and flushes made."""
+        return {"triples": self.triples, "flushes": self.flushes}
+
+    def _add(self, chunk: "List[Triple]") -> None:
+        """Add `chunk` to the triplestore."""
+        with span("add_triples", triples=len(chunk)):
+            self.ts.add_triples(chunk)
+        self.triples += len(chunk)
+        self.flushes += 1
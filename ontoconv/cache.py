@@ -0,0 +1,229 @@
+"""Cache for resources loaded from a knowledge base."""
+
+import copy
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from tripper.convert import load_container
+
+from ontoconv.tracing import recording, span
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+    from tripper import Triplestore
+
+
+def get_cache(ts: "Triplestore", cache: "Optional[ResourceCache]" = None):
+    """Return the resource cache to load resources from `ts` through.
+
+    If `cache` is given, it is returned.  Resource providers that are
+    used in place of a knowledge base, like a
+    `ontoconv.snapshot.KBSnapshot`, provide `load_container()`
+    themselves and are returned as they are.  Otherwise a new
+    `ResourceCache` for `ts` is returned.
+    """
+    if cache is not None:
+        return cache
+    if hasattr(ts, "load_container"):
+        return ts
+    return ResourceCache(ts)
+
+
+def fetch_container(
+    ts: "Triplestore",
+    iri: str,
+    recognised_keys: "Optional[Union[Dict, str]]" = None,
+    ignore_unrecognised: bool = False,
+) -> "Union[dict, list]":
+    """Load the container with the given IRI from `ts`, bypassing any
+    cache.  Traced as a "load_container" span, in which the queries to
+    `ts` are recorded."""
+    with span("load_container", iri=iri):
+        return load_container(
+            recording(ts),
+            iri,
+            recognised_keys=recognised_keys,
+            ignore_unrecognised=ignore_unrecognised,
+        )
+
+
+def _keys_token(recognised_keys: "Optional[Union[dict, str]]") -> "Hashable":
+    """Return a hashable token identifying `recognised_keys`."""
+    if isinstance(recognised_keys, dict):
+        return frozenset(recognised_keys.items())
+    return recognised_keys
+
+
+class ResourceProvider(ABC):
+    """Base class for objects providing the resources used for pipeline
+    generation.
+
+    Subclasses implement `load_container()`, which is all that
+    `generate_ontoflow_pipeline()`, `parse_ontoflow()` and
+    `load_simulation_resource()` use to load resources.
+
+    Providers that are used in place of a knowledge base (the `kb`/`ts`
+    arguments), like `ontoconv.snapshot.KBSnapshot` and
+    `ontoconv.providers.YamlProvider`, also provide the triplestore
+    attributes used for pipeline generation: `namespaces` (dict mapping
+    prefixes to namespaces), `backend_name` and `settings` (see
+    `ontoconv.pipelines.triplestore_settings()`).
+
+    Subclasses must call `super().__init__()`.
+
+    Arguments:
+        maxderived: Maximum number of values computed from shared
+            containers to keep.  See `derived()`.
+    """
+
+    def __init__(self, maxderived: int = 256):
+        self.maxderived = maxderived
+        self._derived: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._derived_lock = threading.Lock()
+
+    @abstractmethod
+    def load_container(
+        self,
+        iri: str,
+        recognised_keys: "Optional[Union[Dict, str]]" = None,
+        ignore_unrecognised: bool = False,
+        *,
+        shared: bool = False,
+    ) -> "Union[dict, list]":
+        """Return the container with the given IRI.
+
+        The arguments have the same meaning as for
+        `tripper.convert.load_container()`.  If `shared` is true, the
+        returned container may be shared with other callers and must
+        not be modified.  Otherwise it is a private copy.
+
+        Raises:
+            KeyError: If the provider has no resource `iri`.
+        """
+
+    def invalidate(self, iri: "Optional[str]" = None) -> None:
+        """Remove resource `iri` (or all resources if None) from any
+        cache kept by the provider.  Does nothing by default."""
+
+    def derived(
+        self,
+        container: "Union[dict, list]",
+        key: "Hashable",
+        factory: "Callable[[Union[dict, list]], Any]",
+    ) -> "Any":
+        """Return `factory(container)`, computed only once for each
+        shared container returned by `load_container()` and `key`.
+
+        This allows to keep values computed from a resource, like the
+        IRI indexes of a `ontoconv.pipelines.SimulationResource`,
+        together with the cached resource.  A container is identified
+        by its identity, so a resource that is reloaded after being
+        evicted from the cache gets new derived values.  The
+        `maxderived` most recently used values are kept.
+        """
+        dkey = (id(container), key)
+        with self._derived_lock:
+            entry = self._derived.get(dkey)
+            if entry is not None and entry[0] is container:
+                self._derived.move_to_end(dkey)
+                return entry[1]
+
+        value = factory(container)
+        with self._derived_lock:
+            # The container is kept alive, such that its id is not reused
+            self._derived[dkey] = (container, value)
+            if len(self._derived) > self.maxderived:
+                self._derived.popitem(last=False)
+        return value
+
+
+class ResourceCache(ResourceProvider):
+    """LRU cache for containers loaded from a triplestore.
+
+    A cache is bound to a single triplestore and memoises the result of
+    `tripper.convert.load_container()`, such that a resource is only
+    fetched once from the knowledge base as long as it stays in the
+    cache.
+
+    Unless `shared=True` is passed to `load_container()`, cached values
+    are never handed out directly.  Each lookup returns a private deep
+    copy, so callers are free to modify the returned value without
+    corrupting the cache.
+
+    The cache may be shared between threads.  Resources are loaded
+    outside the internal lock, so concurrent lookups of different
+    resources do not block each other.
+
+    Arguments:
+        ts: Tripper triplestore to load resources from.
+        maxsize: Maximum number of resources to keep in the cache.  The
+            least recently used resource is evicted when the cache is
+            full.  If None, the cache is unbounded.
+    """
+
+    def __init__(self, ts: "Triplestore", maxsize: "Optional[int]" = 256):
+        super().__init__()
+        self.ts = ts
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Union[dict, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def load_container(
+        self,
+        iri: str,
+        recognised_keys: "Optional[Union[Dict, str]]" = None,
+        ignore_unrecognised: bool = False,
+        *,
+        shared: bool = False,
+    ) -> "Union[dict, list]":
+        """Return a copy of the container with the given IRI.
+
+        The arguments have the same meaning as for
+        `tripper.convert.load_container()`.  If `shared` is true, the
+        cached container itself is returned instead of a copy.  It must
+        not be modified, e.g. wrap it in a `ontoconv.views.ResourceView`.
+        """
+        key = (iri, _keys_token(recognised_keys), ignore_unrecognised)
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self.hits += 1
+                self._data.move_to_end(key)
+
+        if value is None:
+            value = fetch_container(
+                self.ts, iri, recognised_keys, ignore_unrecognised
+            )
+            with self._lock:
+                self.misses += 1
+                self._data[key] = value
+                if self.maxsize is not None and len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+        return value if shared else copy.deepcopy(value)
+
+    def invalidate(self, iri: "Optional[str]" = None) -> None:
+        """Remove resources from the cache.
+
+        Arguments:
+            iri: IRI of the resource to remove.  Both prefixed and
+                expanded IRIs are accepted.  If None, the whole cache
+                is cleared.
+        """
+        with self._lock:
+            if iri is None:
+                self._data.clear()
+                return
+            prefixed = self.ts.prefix_iri(iri)
+            for key in [
+                k for k in self._data if self.ts.prefix_iri(k[0]) == prefixed
+            ]:
+                del self._data[key]
@@ -0,0 +1,63 @@
+"""Index of resources keyed by canonical IRIs."""
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Mapping
+
+# Regular expression matching a prefixed IRI (same as used by tripper)
+MATCH_PREFIXED_IRI = re.compile(r"^([a-z][a-z0-9]*)?:([^/]{1}.*)$")
+
+
+def expand_prefixed_iri(iri: str, namespaces: "Mapping[str, str]") -> str:
+    """Return `iri` expanded with `namespaces` if it is a prefixed IRI
+    with a known prefix.  Otherwise `iri` is returned unchanged."""
+    match = MATCH_PREFIXED_IRI.match(iri)
+    if match:
+        prefix, name = match.groups()
+        namespace = namespaces.get(prefix or "")
+        if namespace is not None:
+            return f"{namespace}{name}"
+    return iri
+
+
+class IriIndex(dict):
+    """A dict keyed by canonical (expanded) IRIs.
+
+    Keys given to the constructor and to lookups may be full IRIs or
+    prefixed IRIs, including the `prefix:name` form returned by
+    `Node.kb_suffix()`.  Prefixed IRIs are expanded using `namespaces`
+    before the lookup, such that any form of an IRI is found in
+    constant time.  Prefixed IRIs with an unknown prefix are used as
+    they are.
+
+    Arguments:
+        mapping: Mapping with (possibly prefixed) IRIs as keys.
+        namespaces: Mapping of prefixes to namespaces.
+    """
+
+    __slots__ = ("namespaces",)
+
+    def __init__(
+        self, mapping: "Mapping[str, Any]", namespaces: "Mapping[str, Any]"
+    ):
+        super().__init__()
+        self.namespaces = {
+            prefix: str(namespace) for prefix, namespace in namespaces.items()
+        }
+        for iri, value in mapping.items():
+            super().__setitem__(self.canonical(iri), value)
+
+    def canonical(self, iri: str) -> str:
+        """Return the canonical (expanded) form of `iri`."""
+        return expand_prefixed_iri(iri, self.namespaces)
+
+    def __getitem__(self, iri):
+        return super().__getitem__(self.canonical(iri))
+
+    def __contains__(self, iri):
+        return super().__contains__(self.canonical(iri))
+
+    def get(self, iri, default=None):
+        return super().get(self.canonical(iri), default)
@@ -5,50 +5,110 @@ the oteapi pipelines.
 
 """
 
-from pathlib import Path
-
-import yaml
-
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from types import MappingProxyType
+
+from ontoconv.cache import ResourceCache, get_cache
 from ontoconv.pipelines import (
+    RECOGNISED_KEYS,
     generate_ontoflow_pipeline,
     load_simulation_resource,
+    triplestore_settings,
 )
+from ontoconv.sinks import as_sink
+from ontoconv.streaming import load_ontoflow
+from ontoconv.tracing import RecordingTriplestore, in_context, span
+
+# Name of generated workchain file
+WORKCHAIN_FILE = "workchain.yaml"
+
+# Name and format version of the manifest used in incremental mode
+MANIFEST_FILE = ".ontoconv-manifest.json"
+MANIFEST_VERSION = 1
+
+# Supported layouts of the generated workchain
+WORKCHAIN_LAYOUTS = ("linear", "stages")
 
 
 class Node:
     """
     A Node in the AiiDA workflow.
+
+    Nodes are light-weight objects with no per-instance `__dict__`.  If
+    `nodes` is given, the full tree below `data` is built iteratively
+    (so arbitrary deep trees are supported), and all nodes are appended
+    to `nodes` in post-order, such that each node's id is its index in
+    `nodes`.  Use `OntoFlowTree` to also get indexes over the nodes.
+
+    Arguments:
+        data: Dict with the OntoFlow output for this node.
+        nodes: List to which the nodes in the tree are appended.  If
+            None, only this node is created and not its children.
+        dedup: Whether to build a DAG in which identical subtrees
+            rooted at a step are represented by a single shared step
+            node.  See `_build_tree()`.
     """
 
-    def __init__(self, data, nodes):
+    __slots__ = (
+        "id",
+        "iri",
+        "depth",
+        "inputs",
+        "outputs",
+        "input_type",
+        "output_type",
+    )
+
+    def __init__(self, data, nodes=None, *, dedup=False):
+        self.id = None
+        self.iri = data["iri"]
+        self.depth = data["depth"]
         self.inputs = []
         self.outputs = []
-        self.depth = data["depth"]
-        self.iri = data["iri"]
-        self.resource_type = {
-            "output": "dataset" if "children" not in data else "",
-            "input": "",
-        }
+        self.input_type = ""
+        self.output_type = "" if "children" in data else "dataset"
 
-        if not self.resource_type["output"] == "dataset":
-            for n in data["children"]:
-                node = Node(n, nodes)
-                if n["predicate"] == "hasOutput":
-                    node.outputs.append(self)
-                    self.resource_type["output"] = node.iri
-                else:
-                    self.inputs.append(
-                        node
-                    )  # individual is singular input I guess
-                    if len(node.resource_type["input"]) == 0:
-                        node.resource_type["input"] = self.iri
-        self.id = len(nodes)
-        nodes.append(self)
+        if nodes is not None:
+            _build_tree(self, data, nodes, dedup=dedup)
+
+    @property
+    def resource_type(self):
+        """Read-only mapping with the resource type of the input and
+        output of this node.  Provided for backward compatibility.
+
+        Item assignment raises TypeError.  Assign a dict to the property
+        to update `input_type` and/or `output_type`.
+        """
+        return MappingProxyType(
+            {"output": self.output_type, "input": self.input_type}
+        )
+
+    @resource_type.setter
+    def resource_type(self, value):
+        unknown = set(value) - {"output", "input"}
+        if unknown:
+            raise KeyError(f"Unknown resource type keys: {sorted(unknown)}")
+        self.output_type = value.get("output", self.output_type)
+        self.input_type = value.get("input", self.input_type)
+
+    def add_child(self, node, predicate):
+        """Add child `node`, related to this node via `predicate`."""
+        if predicate == "hasOutput":
+            node.outputs.append(self)
+            self.output_type = node.iri
+        else:
+            self.inputs.append(node)  # individual is singular input I guess
+            if len(node.input_type) == 0:
+                node.input_type = self.iri
 
     def __str__(self):
         s = (
             f"Node: {self.id}:\niri:           {self.iri}"
-            f"\nresource_type: {self.resource_type}"
+            f"\nresource_type: {dict(self.resource_type)}"
         )
         if len(self.inputs) != 0:
             s += "\ninputs: "
@@ -71,8 +131,7 @@ class Node:
     def is_dataset(self):
         """Check whether the Node is a dataset."""
         return (
-            len(self.inputs) == 1
-            and self.inputs[0].resource_type["output"] == "dataset"
+            len(self.inputs) == 1 and self.inputs[0].output_type == "dataset"
         )
 
     def is_step(self):
@@ -82,7 +141,7 @@ class Node:
     def is_ctx_node(self):
         """Check if the Node is in the context."""
         return (
-            self.resource_type["output"] != ""
+            self.output_type != ""
             and len(self.inputs) == 0
             and len(self.outputs) == 0
         )
@@ -105,27 +164,34 @@ class Node:
 
     def filename(self, resource):
         """Return the filename."""
-        return resource["input"][self.kb_suffix()][-1]["function"][
+        return resource.index["input"][self.iri][-1]["function"][
             "configuration"
         ]["location"]
 
-    def input_postprocess(self):
-        """Get input for postpocessing"""
+    def input_postprocess(self, ref="current"):
+        """Get input for postpocessing.  `ref` is the context entry of
+        the step to take the input from."""
         return (
-            f"{{{{ ctx.current.outputs.results['{self.var_name('input')}']"
+            f"{{{{ ctx.{ref}.outputs.results['{self.var_name('input')}']"
             f"|to_ctx('{self.var_name('input')}') }}}}"
         )
 
-    def output_postprocess_execwrapper(self, filename):
-        """Get postprocessing step after execwrapper."""
+    def output_postprocess_execwrapper(self, filename, ref="current"):
+        """Get postprocessing step after execwrapper.  `ref` is the
+        context entry of the step to take the output from."""
         f = filename.replace(".", "_")
         return (
-            f"{{{{ ctx.current.outputs['{f}']|"
+            f"{{{{ ctx.{ref}.outputs['{f}']|"
             f"to_ctx('{self.var_name('output')}') }}}}"
         )
 
-    def pipeline_step(self, pipeline_file, is_last=False):
-        """Create a pipeline step."""
+    def pipeline_step(self, pipeline_file, is_last=False, name=None):
+        """Create a pipeline step.
+
+        If `name` is given, the step is stored in the context under
+        this name, which its postprocessing refers to instead of
+        `ctx.current`.
+        """
 
         inputs = {
             "pipeline": {"$ref": f"file:__DIR__/{pipeline_file}"},
@@ -149,14 +215,30 @@ class Node:
             for output in to_cuds:
                 inputs[output] = f"{{{{ ctx.{output} }}}}"
         ret = {"workflow": "execflow.oteapipipeline", "inputs": inputs}
+        if name is not None:
+            ret["name"] = name
 
         if not is_last:
-            ret["postprocess"] = [ni.input_postprocess() for ni in self.inputs]
+            ret["postprocess"] = [
+                ni.input_postprocess(name or "current") for ni in self.inputs
+            ]
 
         return ret
 
-    def calculation_step(self, resource):
-        """Create a calculation step."""
+    def output_groups(self):
+        """Return the output nodes of this step grouped by IRI.
+
+        A step shared by several consumers (see `OntoFlowTree`) has
+        one output node per consumer for each output.
+        """
+        groups = {}
+        for on in self.outputs:
+            groups.setdefault(on.iri, []).append(on)
+        return list(groups.values())
+
+    def calculation_step(self, resource, name=None):
+        """Create a calculation step.  See `pipeline_step()` for
+        `name`."""
         # This is only for execwrapper at the moment
         files = {}
 
@@ -176,7 +258,7 @@ class Node:
         full_command = resource["command"].replace("\\", "").split()
         outfiles = output_filenames(resource)
 
-        return {
+        step = {
             "workflow": resource["aiida_plugin"],
             "inputs": {
                 "command": full_command.pop(0),
@@ -185,10 +267,174 @@ class Node:
                 "outputs": outfiles,
             },
             "postprocess": [
-                on.output_postprocess_execwrapper(f)
-                for (f, on) in zip(outfiles, self.outputs)
+                on.output_postprocess_execwrapper(f, name or "current")
+                for (f, group) in zip(outfiles, self.output_groups())
+                for on in group
             ],
         }
+        if name is not None:
+            step["name"] = name
+        return step
+
+
+def subtree_keys(data):
+    """Return a dict mapping `id()` of each node dict in `data` to a key
+    identifying its subtree.
+
+    Two nodes have the same key if and only if their subtrees have the
+    same IRIs, predicates and structure.  The depth is ignored, since
+    the same subtree may appear at different depths.
+    """
+    keys = {}
+    interned = {}
+    stack = [(data, False)]
+    while stack:
+        ndata, expanded = stack.pop()
+        children = ndata.get("children")
+        if not expanded and children:
+            stack.append((ndata, True))
+            stack.extend((child, False) for child in children)
+            continue
+        signature = (
+            ndata["iri"],
+            ndata.get("predicate"),
+            (
+                None
+                if children is None
+                else tuple(keys[id(child)] for child in children)
+            ),
+        )
+        keys[id(ndata)] = interned.setdefault(signature, len(interned))
+    return keys
+
+
+def _build_tree(root, data, nodes, dedup=False):
+    """Build the tree below `root` from `data` without recursion.
+
+    The nodes are appended to `nodes` in post-order, which is the order
+    the original recursive implementation assigned node ids in.
+
+    If `dedup` is true, identical subtrees rooted at a step (a child
+    with predicate hasOutput) are hash-consed.  Only the first
+    occurrence is built and later occurrences are replaced by the
+    already built step node, which then gets one output node for each
+    consumer.  The result is a DAG in which the pipeline and
+    calculation step of each shared step are only generated once.
+    """
+    keys = subtree_keys(data) if dedup else {}
+    shared = {}
+    stack = [(root, data, 0)]
+    while stack:
+        node, ndata, ichild = stack[-1]
+        children = ndata["children"] if node.output_type != "dataset" else ()
+        if ichild < len(children):
+            stack[-1] = (node, ndata, ichild + 1)
+            child = children[ichild]
+            if dedup and child["predicate"] == "hasOutput":
+                key = keys[id(child)]
+                if key in shared:
+                    node.add_child(shared[key], "hasOutput")
+                    continue
+                shared[key] = child_node = Node(child)
+            else:
+                child_node = Node(child)
+            stack.append((child_node, child, 0))
+            continue
+
+        stack.pop()
+        node.id = len(nodes)
+        nodes.append(node)
+        if stack:
+            stack[-1][0].add_child(node, ndata["predicate"])
+
+
+class OntoFlowTree:  # pylint: disable=too-few-public-methods
+    """The tree of nodes described by the output of OntoFlow.
+
+    Arguments:
+        data: Dict with the OntoFlow output, or name of a YAML or JSON
+            file with it.  A file is parsed incrementally with
+            `ontoconv.streaming.load_ontoflow()`, keeping only the
+            fields needed for conversion.
+        dedup: Whether to represent identical subtrees rooted at a step
+            by a single shared step node.  The nodes then form a DAG
+            and a shared step has one output node for each consumer.
+
+    Attributes:
+        nodes: List of all nodes, ordered by their id.
+        root: The root node.
+        steps: Nodes that are steps, ordered by their id.
+        ctx_nodes: Nodes that are in the context, ordered by their id.
+        datasets: Nodes that are datasets, ordered by their id.
+        by_iri: Dict mapping IRIs to the list of nodes with that IRI.
+    """
+
+    def __init__(self, data, dedup=False):
+        if isinstance(data, (str, os.PathLike)):
+            data = load_ontoflow(data)
+        self.nodes = []
+        self.root = Node(data, self.nodes, dedup=dedup)
+        self.steps = []
+        self.ctx_nodes = []
+        self.datasets = []
+        self.by_iri = {}
+        by_iri = self.by_iri
+        for node in self.nodes:
+            # Inlined versions of is_step(), is_ctx_node() and is_dataset()
+            inputs = node.inputs
+            if node.outputs:
+                self.steps.append(node)
+            elif not inputs and node.output_type:
+                self.ctx_nodes.append(node)
+            if len(inputs) == 1 and inputs[0].output_type == "dataset":
+                self.datasets.append(node)
+            if node.iri in by_iri:
+                by_iri[node.iri].append(node)
+            else:
+                by_iri[node.iri] = [node]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def dependencies(self):
+        """Return a list with the set of indexes (in `steps`) of the
+        steps that each step depends on.
+
+        A step depends on the steps producing its inputs, since its
+        pipeline reads their outputs from the context.
+        """
+        index = {id(step): istep for istep, step in enumerate(self.steps)}
+        producers = {
+            id(output): index[id(step)]
+            for step in self.steps
+            for output in step.outputs
+        }
+        return [
+            {producers[id(n)] for n in step.inputs if id(n) in producers}
+            for step in self.steps
+        ]
+
+    def stages(self):
+        """Return the steps grouped into topologically ordered stages.
+
+        Each stage is a list of indexes (in `steps`) of steps that only
+        depend on steps in earlier stages, and can hence run
+        concurrently.  Each step is placed in the earliest possible
+        stage.
+
+        With `layout="stages"`, `parse_ontoflow()` groups the steps of
+        the workchain into these stages.
+        """
+        levels = []
+        stages = []
+        # Steps are ordered in post-order, so producers come first
+        for istep, deps in enumerate(self.dependencies()):
+            level = max((levels[i] + 1 for i in deps), default=0)
+            levels.append(level)
+            if level == len(stages):
+                stages.append([])
+            stages[level].append(istep)
+        return stages
 
 
 def output_filenames(resource):
@@ -200,62 +446,577 @@ def output_filenames(resource):
 
 
 def save_pipeline(name, pipeline, outdir):
-    """Save the pipeline to file."""
-    with open(Path(outdir) / name, "w", encoding="utf8") as f:
-        yaml.safe_dump(pipeline, f, sort_keys=False)
+    """Save the pipeline to directory or output sink `outdir`."""
+    with span("dump_yaml", file=name):
+        as_sink(outdir).write(name, pipeline)
+
+
+def pipeline_resources(nodes, recognised_keys="basic"):
+    """Return a list of `(iri, recognised_keys)` tuples for the KB
+    resources used when generating a pipeline for `nodes`.
+
+    This follows the lookups done by `generate_ontoflow_pipeline()`
+    with the given `recognised_keys`.
+    """
+    resources = []
+    for n in nodes:
+        for n1 in n.inputs:
+            if n1.output_type == "dataset":
+                resources.append((n1.iri, recognised_keys))
+        if n.input_type != "":
+            resources.append((n.input_type, RECOGNISED_KEYS))
+        if n.output_type == "dataset":
+            resources.append((n.iri, recognised_keys))
+        elif n.output_type != "":
+            resources.append((n.output_type, RECOGNISED_KEYS))
+    return resources
+
+
+def pipeline_digest(kb, nodes, cache=None, target_ts=None):
+    """Return a hash of everything the pipeline for `nodes` is
+    generated from.
+
+    The hash covers the part of the tree the pipeline is generated
+    from (the nodes, their inputs and the node ids used for naming) and
+    the content of the KB resources it uses.
+
+    Arguments:
+        kb: Knowledge base as tripper.Triplestore.
+        nodes: Nodes to generate the pipeline for.
+        cache: Resource cache for loading resources from `kb`.
+        target_ts: For the final pipeline, the triplestore in which
+            generated output is to be documented.
+
+    Returns:
+        Hex digest of the hash.
+    """
+    cache = get_cache(kb, cache)
+    signature = [
+        (
+            n.id,
+            n.iri,
+            n.input_type,
+            n.output_type,
+            [(n1.id, n1.iri, n1.output_type) for n1 in n.inputs],
+            [n1.id for n1 in n.outputs],
+        )
+        for n in nodes
+    ]
+    resources = [
+        (iri, cache.load_container(iri, keys, ignore_unrecognised=True))
+        for iri, keys in pipeline_resources(nodes)
+    ]
+    settings = triplestore_settings(target_ts) if target_ts else None
+    payload = json.dumps(
+        [signature, resources, settings], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+def _is_unchanged(filename, digest, outdir, manifest):
+    """Return whether `filename` in `outdir` exists and was generated
+    from inputs with the given digest according to `manifest`."""
+    return (
+        manifest is not None
+        and manifest.get(filename) == digest
+        and as_sink(outdir).exists(filename)
+    )
+
+
+def load_manifest(outdir):
+    """Return a dict mapping file names in `outdir` to the digest of the
+    inputs they were generated from.  Returns an empty dict if `outdir`
+    has no manifest."""
+    text = as_sink(outdir).read_text(MANIFEST_FILE)
+    if text is None:
+        return {}
+    manifest = json.loads(text)
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["files"]
+
+
+def save_manifest(outdir, files):
+    """Save manifest with digests of the generated `files` to `outdir`."""
+    as_sink(outdir).write_text(
+        MANIFEST_FILE,
+        json.dumps({"version": MANIFEST_VERSION, "files": files}, indent=2),
+    )
+
+
+def generate_step(
+    kb, node, istep, outdir=".", cache=None, *, manifest=None, named=False
+):
+    """Generate and save the pipeline for step `node` and return its
+    pipeline step and calculation step for the workchain.
+
+    Arguments:
+        kb: Knowledge base as tripper.Triplestore.
+        node: The step node.
+        istep: Index of the step.  Used for naming the pipeline file.
+        outdir: The directory or output sink to save the pipeline to.
+            If None, the pipeline is not saved.
+        cache: Resource cache for loading resources from `kb`.
+        manifest: Dict with digests from a previous run, as returned by
+            `load_manifest()`.  If given, the pipeline is only
+            regenerated if its digest has changed.
+        named: Whether to name the workchain steps, such that their
+            postprocessing refers to them by name instead of
+            `ctx.current`.  Needed when steps run concurrently.
+
+    Returns:
+        Dict with the name of the pipeline `file`, its `digest` (None
+        if `manifest` is None), whether the file was `skipped`, the
+        generated `pipeline` (None if skipped) and the pipeline and
+        calculation `steps` for the workchain.
+    """
+    cache = get_cache(kb, cache)
+    pipeline_file = f"pipeline_{istep}.yaml"
+    with span("generate_step", step=istep, iri=node.iri):
+        digest = None
+        if manifest is not None:
+            digest = pipeline_digest(kb, node.inputs, cache=cache)
+        skipped = _is_unchanged(pipeline_file, digest, outdir, manifest)
+        pipeline = None
+        if not skipped:
+            with span("generate_pipeline"):
+                pipeline = generate_ontoflow_pipeline(
+                    kb, node.inputs, cache=cache
+                )
+            if outdir is not None:
+                save_pipeline(pipeline_file, pipeline, outdir)
+
+        resource = load_simulation_resource(kb, node.iri, cache=cache)
+        name = node.step_name() if named else None
+        return {
+            "file": pipeline_file,
+            "digest": digest,
+            "skipped": skipped,
+            "pipeline": pipeline,
+            "steps": [
+                node.pipeline_step(
+                    pipeline_file, name=name and f"{name}_pipeline"
+                ),
+                node.calculation_step(
+                    resource, name=name and f"{name}_calculation"
+                ),
+            ],
+        }
+
+
+def generate_final_step(
+    kb, node, outdir=".", target_ts=None, cache=None, *, manifest=None
+):
+    """Generate and save the final pipeline, which documents the output
+    of the last step `node`, and return its pipeline step.
+
+    Arguments:
+        kb: Knowledge base as tripper.Triplestore.
+        node: The last step node.
+        outdir: The directory or output sink to save the pipeline to.
+            If None, the pipeline is not saved.
+        target_ts: Tripper triplestore in which generated output of
+            the pipeline is to be documented.
+        cache: Resource cache for loading resources from `kb`.
+        manifest: Dict with digests from a previous run.  See
+            `generate_step()`.
+
+    Returns:
+        Dict like the one returned by `generate_step()`, with only the
+        pipeline step in `steps`.
+    """
+    cache = get_cache(kb, cache)
+    pipeline_file = "pipeline_final.yaml"
+    with span("generate_final_step", iri=node.iri):
+        digest = None
+        if manifest is not None:
+            digest = pipeline_digest(
+                kb, node.outputs, cache=cache, target_ts=target_ts or kb
+            )
+        skipped = _is_unchanged(pipeline_file, digest, outdir, manifest)
+        pipeline = None
+        if not skipped:
+            with span("generate_pipeline"):
+                pipeline = generate_ontoflow_pipeline(
+                    kb, node.outputs, True, target_ts=target_ts, cache=cache
+                )
+            if outdir is not None:
+                save_pipeline(pipeline_file, pipeline, outdir)
+    return {
+        "file": pipeline_file,
+        "digest": digest,
+        "skipped": skipped,
+        "pipeline": pipeline,
+        "steps": [node.pipeline_step(pipeline_file, True)],
+    }
+
+
+def iter_jobs(jobs, max_workers=None):
+    """Call each function in `jobs` and yield `(index, result)` tuples
+    as soon as each result is ready.
+
+    If `max_workers` is None, the jobs are called one by one in order.
+    Otherwise they are run concurrently in a pool of `max_workers`
+    threads and the results are yielded in the order they complete.
+    Jobs that have not started are cancelled if the generator is
+    closed early.
+    """
+    if max_workers is None:
+        for index, job in enumerate(jobs):
+            yield index, job()
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(in_context(job)): index
+            for index, job in enumerate(jobs)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
 
 
 def parse_ontoflow(
-    workflow_data, kb, outdir=".", target_ts: "Optional[Triplestore]" = None
+    workflow_data,
+    kb,
+    outdir=".",
+    target_ts: "Optional[Triplestore]" = None,
+    *,
+    cache: "Optional[ResourceCache]" = None,
+    max_workers: "Optional[int]" = None,
+    incremental: bool = False,
+    tracer: "Optional[Tracer]" = None,
+    dedup: bool = False,
+    layout: str = "linear",
 ):
     """
     Function to parse ontoflow and create declarative workchain
     and corresponding pipelines.
 
     Arguments:
-    data: dict
-        The data as provided by ontoflow
+    data: dict, str or Path
+        The data as provided by ontoflow, or the name of a YAML or
+        JSON file with it.  Large files are best passed by name, since
+        they are then parsed incrementally and only the fields needed
+        for conversion are kept in memory.
     kb: knowledge base as tripper.TriplesStore
-    outdir: str
+    outdir: str or ontoconv.sinks.OutputSink
         The directory to save the output files.
         Pipeline and workchain files are saved as yaml.
+        Pass an output sink to instead keep the files in memory
+        (`MemorySink`) or write them to an archive (`ArchiveSink`).
     target_ts: Tripper triplestore in which generated output of
         the pipeline is to be documented. Defaults to the same
         triplestore in which sources and models are documented.
+    cache: Resource cache for loading resources from `kb`.  By default
+        a new cache is created for this run, such that each resource
+        is only loaded once from the knowledge base.
+    max_workers: If given, the pipelines of all steps are generated
+        and saved concurrently in a pool of this number of threads.
+        Useful when `kb` is a remote triplestore.  The generated files
+        are the same as when the steps are generated one by one.
+    incremental: Whether to only regenerate and rewrite the files
+        whose inputs have changed since the last run.  A manifest with
+        a hash of the tree and KB resources each file is generated
+        from is stored in `outdir`.
+    tracer: If given, record timed spans for each phase and step and
+        the triplestore operations they make with this tracer.  See
+        `ontoconv.tracing`.  Resources loaded through `cache` from the
+        triplestore it is bound to are recorded too.
+    dedup: Whether to canonicalise identical subtrees rooted at a step
+        into a single shared step.  The pipeline and calculation step
+        of a shared step are generated once and its outputs are
+        referenced by all its consumers in the workchain.
+    layout: Layout of the workchain.  With "linear", all steps are run
+        one after another.  With "stages", the steps are ordered in
+        topologically sorted stages (see `OntoFlowTree.stages()`).
+        Steps in the same stage do not depend on each other and are
+        grouped in a `parallel` entry, with one sequence of `steps` for
+        each of them, such that they can run concurrently.  Each step
+        is then named, and its postprocessing refers to its own outputs
+        by name instead of `ctx.current`.
+
+    Returns:
+        Dict with lists of the file names that were `written` and
+        `skipped` (unchanged since the last run in incremental mode).
 
+    """
+    check_layout(layout)
+    if tracer is not None:
+        with tracer.activate():
+            return parse_ontoflow(
+                workflow_data,
+                RecordingTriplestore(kb),
+                outdir,
+                target_ts,
+                cache=cache,
+                max_workers=max_workers,
+                incremental=incremental,
+                dedup=dedup,
+                layout=layout,
+            )
+
+    with span("parse_ontoflow"):
+        return _parse_ontoflow(
+            workflow_data,
+            kb,
+            outdir,
+            target_ts,
+            cache=cache,
+            max_workers=max_workers,
+            incremental=incremental,
+            dedup=dedup,
+            layout=layout,
+        )
+
+
+def _parse_ontoflow(
+    workflow_data,
+    kb,
+    outdir,
+    target_ts,
+    *,
+    cache,
+    max_workers,
+    incremental,
+    dedup,
+    layout,
+):
+    """Implements parse_ontoflow() as a consumer of iter_workchain()."""
+    outdir = as_sink(outdir)
+    manifest = load_manifest(outdir) if incremental else None
+
+    pipelines, chain = {}, {}
+    for event in iter_workchain(
+        workflow_data,
+        kb,
+        outdir,
+        target_ts,
+        cache=cache,
+        max_workers=max_workers,
+        manifest=manifest,
+        dedup=dedup,
+        layout=layout,
+    ):
+        if event["kind"] == "pipeline":
+            pipelines[event["index"]] = event
+        elif event["kind"] == "workchain":
+            chain = event["workchain"]
+    results = [pipelines[index] for index in sorted(pipelines)]
+    return write_workchain(chain, results, outdir, manifest)
+
+
+def iter_workchain(
+    workflow_data,
+    kb,
+    outdir=None,
+    target_ts: "Optional[Triplestore]" = None,
+    *,
+    cache: "Optional[ResourceCache]" = None,
+    max_workers: "Optional[int]" = None,
+    manifest: "Optional[dict]" = None,
+    dedup: bool = False,
+    layout: str = "linear",
+):
+    """Generate the pipelines and the workchain for OntoFlow output,
+    yielding each pipeline and workchain step as soon as it is ready.
 
+    This allows to e.g. stage files and validate steps while the rest
+    of the workchain is generated.  `parse_ontoflow()` is a consumer of
+    this generator.
+
+    Arguments:
+        workflow_data, kb, target_ts, cache, max_workers, dedup, layout:
+            See `parse_ontoflow()`.  With `max_workers`, the events of
+            each step are yielded in the order the steps complete.
+        outdir: If given, the directory or output sink to save each
+            pipeline to, before it is yielded.
+        manifest: Dict with digests from a previous run, as returned
+            by `load_manifest()`.  If given, pipelines whose digest has
+            not changed are not regenerated.
+
+    Yields:
+        Dicts with a `kind` key and the index of the step (in
+        `OntoFlowTree.steps`) in `index`, except for the last one:
+
+          - "pipeline": The `pipeline` dict generated for a step (None
+            if `skipped` since it is unchanged), the name of its `file`
+            and its `digest` (None without `manifest`).
+          - "pipeline_step", "calculation_step" and "final_step": A
+            `step` of the workchain.  The final step has the index
+            `len(steps)`.
+          - "workchain": The complete `workchain` dict.  Always last.
     """
-    nodes = []
-    # Update nodes
-    Node(workflow_data, nodes)
+    check_layout(layout)
+    cache = get_cache(kb, cache)
+    if outdir is not None:
+        outdir = as_sink(outdir)
+
+    with span("build_tree"):
+        tree = OntoFlowTree(workflow_data, dedup=dedup)
+
+    staged = layout == "stages"
+    jobs = step_jobs(
+        kb, tree, outdir, target_ts, cache, manifest=manifest, named=staged
+    )
+    results = [None] * len(jobs)
+    for index, result in iter_jobs(jobs, max_workers=max_workers):
+        results[index] = result
+        yield {
+            "kind": "pipeline",
+            "index": index,
+            "file": result["file"],
+            "digest": result["digest"],
+            "skipped": result["skipped"],
+            "pipeline": result["pipeline"],
+        }
+        kinds = (
+            ("final_step",)
+            if index == len(tree.steps)
+            else ("pipeline_step", "calculation_step")
+        )
+        for kind, step in zip(kinds, result["steps"]):
+            yield {"kind": kind, "index": index, "step": step}
 
-    chain = {"steps": []}
+    stages = tree.stages() if staged else None
+    yield {
+        "kind": "workchain",
+        "workchain": {"steps": workchain_steps(results, stages)},
+    }
 
-    istep = 0
-    # first we set up all the individuals
-    last = None
-    for n in nodes:
-        if n.is_step():
-            pipeline = generate_ontoflow_pipeline(kb, n.inputs)
-            pipeline_file = f"pipeline_{istep}.yaml"
-            save_pipeline(pipeline_file, pipeline, outdir)
 
-            chain["steps"].append(n.pipeline_step(pipeline_file))
+def step_jobs(
+    kb, tree, outdir, target_ts, cache, *, manifest=None, named=False
+):
+    """Return a list of callables generating the steps of `tree`.
 
-            resource = load_simulation_resource(kb, n.iri)
-            chain["steps"].append(n.calculation_step(resource))
-            last = n
-            istep += 1
+    Each callable returns a dict as returned by `generate_step()`.  The
+    last one generates the final step.
+    """
+    jobs = [
+        partial(
+            generate_step,
+            kb,
+            n,
+            istep,
+            outdir,
+            cache,
+            manifest=manifest,
+            named=named,
+        )
+        for istep, n in enumerate(tree.steps)
+    ]
+    if tree.steps:
+        jobs.append(
+            partial(
+                generate_final_step,
+                kb,
+                tree.steps[-1],
+                outdir,
+                target_ts,
+                cache,
+                manifest=manifest,
+            )
+        )
+    return jobs
 
-    if last is not None:
-        pipeline = generate_ontoflow_pipeline(
-            kb, last.outputs, True, target_ts=target_ts
+
+def check_layout(layout):
+    """Raise ValueError if `layout` is not a supported workchain
+    layout."""
+    if layout not in WORKCHAIN_LAYOUTS:
+        raise ValueError(
+            f"Unknown workchain layout '{layout}'.  Should be one of: "
+            f"{', '.join(WORKCHAIN_LAYOUTS)}"
         )
-        pipeline_file = "pipeline_final.yaml"
 
-        save_pipeline(pipeline_file, pipeline, outdir)
 
-        chain["steps"].append(last.pipeline_step(pipeline_file, True))
+def workchain_steps(results, stages=None):
+    """Return the steps of the workchain.
 
-    with open(Path(outdir) / "workchain.yaml", "w", encoding="utf8") as f:
-        yaml.safe_dump(chain, f, sort_keys=False)
+    Arguments:
+        results: List with the results of the jobs returned by
+            `step_jobs()`, in the same order.
+        stages: Stages of step indexes as returned by
+            `OntoFlowTree.stages()`.  If None, all steps are run one
+            after another.
+
+    Returns:
+        List of workchain steps.  A stage with several steps is added
+        as a single `parallel` entry, with one sequence of `steps` for
+        each step in the stage.  The final step is always last.
+    """
+    if stages is None:
+        return [step for result in results for step in result["steps"]]
+    steps = []
+    for stage in stages:
+        if len(stage) == 1:
+            steps.extend(results[stage[0]]["steps"])
+        else:
+            steps.append(
+                {"parallel": [{"steps": results[i]["steps"]} for i in stage]}
+            )
+    if len(results) > sum(len(stage) for stage in stages):
+        steps.extend(results[-1]["steps"])
+    return steps
+
+
+def save_workchain(results, outdir, manifest, *, stages=None):
+    """Assemble and save the workchain from the generated steps.
+
+    Arguments:
+        results: List with the results of the jobs returned by
+            `step_jobs()`, in the same order.
+        outdir: The directory or output sink to save the workchain to.
+        manifest: Dict with digests from a previous run, or None if
+            not in incremental mode.  In incremental mode, an updated
+            manifest is saved to `outdir`.
+        stages: Stages to group the steps in.  See `workchain_steps()`.
+
+    Returns:
+        Dict with lists of the file names that were `written` and
+        `skipped`.  See `parse_ontoflow()`.
+    """
+    chain = {"steps": workchain_steps(results, stages)}
+    return write_workchain(chain, results, outdir, manifest)
+
+
+def write_workchain(chain, results, outdir, manifest):
+    """Save the assembled workchain `chain`.
+
+    Arguments:
+        chain: The workchain dict.
+        results: List of dicts with the pipeline `file`, its `digest`
+            and whether it was `skipped`, for each generated pipeline.
+        outdir, manifest: See `save_workchain()`.
+
+    Returns:
+        Dict with lists of the file names that were `written` and
+        `skipped`.  See `parse_ontoflow()`.
+    """
+    report = {"written": [], "skipped": []}
+    digests = {}
+    for result in results:
+        report["skipped" if result["skipped"] else "written"].append(
+            result["file"]
+        )
+        digests[result["file"]] = result["digest"]
+
+    digest = None
+    if manifest is not None:
+        payload = json.dumps(chain, sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode("utf8")).hexdigest()
+    if _is_unchanged(WORKCHAIN_FILE, digest, outdir, manifest):
+        report["skipped"].append(WORKCHAIN_FILE)
+    else:
+        with span("dump_yaml", file=WORKCHAIN_FILE):
+            as_sink(outdir).write(WORKCHAIN_FILE, chain)
+        report["written"].append(WORKCHAIN_FILE)
+    digests[WORKCHAIN_FILE] = digest
+
+    if manifest is not None:
+        save_manifest(outdir, digests)
+
+    return report
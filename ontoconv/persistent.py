@@ -0,0 +1,426 @@
+"""Persistent on-disk read-through cache in front of a triplestore.
+
+A `PersistentCache` stores the results of `load_container()` in a local
+directory, such that repeated conversions do not fetch the same
+resources from a remote knowledge base (like Fuseki) again:
+
+```python
+kb = PersistentCache(Triplestore("fuseki", ...), "~/.cache/ontoconv")
+parse_ontoflow(data, kb, outdir)
+```
+
+The cache can be used wherever OntoConv accepts a triplestore.  All
+other attributes are passed through to the wrapped triplestore.
+
+The cached resources are validated against a version marker of the
+knowledge base.  When the marker changes, the whole cache is cleared.
+By default the marker is computed from the `owl:versionInfo` and
+`dcterms:modified` values in the knowledge base (see `kb_version()`),
+so keep one of those up to date when the knowledge base changes, or
+pass an explicit `version`.  If the knowledge base has neither, changes
+to it cannot be detected.  Resources are then only cached in memory
+and a warning is issued.
+
+The most recently used resources are also kept in memory, so repeated
+lookups in the same process do not read the disk.
+
+In offline mode, the triplestore is never contacted.  Resources and
+namespaces are only served from the cache.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from tripper import DCTERMS, OWL
+
+from ontoconv.cache import ResourceProvider, _keys_token, fetch_container
+from ontoconv.iriindex import expand_prefixed_iri
+from ontoconv.pipelines import triplestore_settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+    from tripper import Triplestore
+
+# Format version of the cache directory
+CACHE_FORMAT = 1
+
+# Name of the file with metadata about the cached knowledge base
+META_FILE = "cache.json"
+
+
+def kb_version(ts: "Triplestore") -> str:
+    """Return a version marker for the knowledge base in `ts`.
+
+    The marker combines all `owl:versionInfo` and `dcterms:modified`
+    values in the knowledge base.  It is an empty string if there are
+    none.
+    """
+    values = {
+        str(o)
+        for predicate in (OWL.versionInfo, DCTERMS.modified)
+        for _, _, o in ts.triples(predicate=predicate)
+    }
+    return "|".join(sorted(values))
+
+
+def _hash(obj) -> str:
+    """Return a hex digest identifying the JSON-serialisable `obj`."""
+    payload = json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+class PersistentCache(  # pylint: disable=too-many-instance-attributes
+    ResourceProvider
+):
+    """Persistent read-through cache of resources in a triplestore.
+
+    Has the same `load_container()` interface as
+    `ontoconv.cache.ResourceCache`.  Resources are stored as JSON files
+    in `directory` and the least recently used ones are evicted when
+    the total size exceeds `max_bytes`.  The cache may be shared
+    between threads and processes.
+
+    The `maxsize` most recently used resources are also kept in memory,
+    like in a `ResourceCache`.  With `shared=True`, `load_container()`
+    returns the in-memory resource itself instead of a copy.  The
+    in-memory resources are cleared by `refresh()` and `invalidate()`,
+    but not when another process changes the cache directory.
+
+    Arguments:
+        ts: Tripper triplestore to load resources from.  May be None in
+            offline mode.
+        directory: Directory to store the cache in.  Created if it
+            does not exist.
+        version: Version marker of the knowledge base or a callable
+            returning it for `ts`.  Defaults to `kb_version()`.  The
+            marker is checked when the cache is created and by
+            `refresh()`.  If `kb_version()` returns an empty marker,
+            resources are not stored on disk and a warning is issued.
+        max_bytes: Maximum total size of the cached resources.  If
+            None, the cache is unbounded.
+        maxsize: Maximum number of resources to keep in memory.  If
+            None, all loaded resources are kept.
+        offline: Whether to only serve resources from the cache,
+            without contacting `ts`.
+
+    Attributes:
+        persistent: Whether resources are stored on disk.
+        hits: Number of resources loaded from the cache.
+        misses: Number of resources loaded from the triplestore.
+    """
+
+    def __init__(
+        self,
+        ts: "Optional[Triplestore]",
+        directory: "Union[str, Path]",
+        *,
+        version: "Union[str, Callable[[Triplestore], str], None]" = None,
+        max_bytes: "Optional[int]" = 256 * 2**20,
+        maxsize: "Optional[int]" = 256,
+        offline: bool = False,
+    ):
+        if ts is None and not offline:
+            raise ValueError("A triplestore is required when not offline")
+        super().__init__()
+        self.ts = ts
+        self.directory = Path(directory).expanduser()
+        self.version = kb_version if version is None else version
+        self.max_bytes = max_bytes
+        self.maxsize = maxsize
+        self.offline = offline
+        self.persistent = True
+        self.hits = 0
+        self.misses = 0
+        self._entries = self.directory / "entries"
+        self._entries.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._meta: dict = {}
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._nbytes = 0
+        # Maps lookup keys to the file name and the resource
+        self._memory: "OrderedDict[Hashable, Tuple[str, Any]]" = OrderedDict()
+        self.refresh()
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined by the cache itself
+        if name.startswith("_") or self.__dict__.get("ts") is None:
+            raise AttributeError(name)
+        return getattr(self.ts, name)
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def namespaces(self) -> "Dict[str, str]":
+        """Namespaces of the knowledge base."""
+        if self.offline:
+            return dict(self._meta.get("namespaces", {}))
+        return self.ts.namespaces  # type: ignore
+
+    @property
+    def backend_name(self) -> str:
+        """Backend name of the triplestore, or "cache" in offline
+        mode."""
+        if self.offline:
+            return "cache"
+        return self.ts.backend_name  # type: ignore
+
+    @property
+    def settings(self) -> "Optional[dict]":
+        """Settings for connecting to the triplestore from a pipeline,
+        as stored when the cache was last used online."""
+        return self._meta.get("settings")
+
+    def refresh(self) -> None:
+        """Validate the cache against the version marker of the
+        knowledge base, clearing it if the version has changed.
+
+        In offline mode the stored version is trusted.  Resources kept
+        in memory are always cleared.
+        """
+        with self._lock:
+            self._memory.clear()
+        path = self.directory / META_FILE
+        meta = json.loads(path.read_text("utf8")) if path.exists() else {}
+        if meta.get("format") != CACHE_FORMAT:
+            meta = {}
+
+        if not self.offline:
+            version = (
+                self.version(self.ts)
+                if callable(self.version)
+                else self.version
+            )
+            namespaces = {
+                prefix: str(ns) for prefix, ns in self.ts.namespaces.items()
+            }
+            self.persistent = bool(version) or self.version is not kb_version
+            if not self.persistent:
+                warnings.warn(
+                    "The knowledge base has no owl:versionInfo or "
+                    "dcterms:modified to detect changes by, so resources "
+                    "are only cached in memory.  Pass an explicit "
+                    "`version` to store them on disk.",
+                    stacklevel=3,
+                )
+            if meta.get("version") != version or not self.persistent:
+                self._clear_files()
+                meta = {}
+            try:
+                settings = triplestore_settings(self.ts)
+            except (AttributeError, KeyError):
+                settings = None
+            new = {
+                "format": CACHE_FORMAT,
+                "version": version,
+                "namespaces": namespaces,
+                "settings": settings,
+            }
+            if new != meta:
+                meta = new
+                if self.persistent:
+                    self._write(path, json.dumps(meta, indent=2))
+
+        with self._lock:
+            self._meta = meta
+            self._load_index()
+
+    def _load_index(self):
+        """Load the index of cached files, least recently used first."""
+        entries = []
+        for entry in os.scandir(self._entries):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:  # Removed by another process
+                    continue
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self._index = OrderedDict(
+            (name, size) for _, name, size in sorted(entries)
+        )
+        self._nbytes = sum(self._index.values())
+
+    def _clear_files(self):
+        """Remove all cached files."""
+        for entry in os.scandir(self._entries):
+            if entry.name.endswith(".json"):
+                os.remove(entry.path)
+
+    def _write(self, path, text):
+        """Atomically write `text` to `path`."""
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf8"
+        ) as f:
+            f.write(text)
+        os.replace(f.name, path)
+
+    def _filename(self, iri, recognised_keys, ignore_unrecognised):
+        """Return the name of the file caching the given resource.
+
+        The name starts with a hash of the expanded IRI, such that all
+        cached variants of a resource can be found by `invalidate()`.
+        """
+        expanded = expand_prefixed_iri(iri, self.namespaces)
+        return (
+            f"{_hash(expanded)[:32]}-"
+            f"{_hash([recognised_keys, ignore_unrecognised])[:16]}.json"
+        )
+
+    def load_container(
+        self,
+        iri: str,
+        recognised_keys: "Optional[Union[Dict, str]]" = None,
+        ignore_unrecognised: bool = False,
+        *,
+        shared: bool = False,
+    ) -> "Union[dict, list]":
+        """Return a copy of the container with the given IRI.
+
+        Has the same interface as `ResourceCache.load_container()`.  If
+        `shared` is true, the container kept in memory is returned
+        instead of a copy.  It must not be modified.
+
+        Raises:
+            KeyError: In offline mode, if the resource is not cached.
+        """
+        key = (iri, _keys_token(recognised_keys), ignore_unrecognised)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self.hits += 1
+                self._memory.move_to_end(key)
+                if entry[0] in self._index:
+                    self._index.move_to_end(entry[0])
+
+        if entry is None:
+            name = self._filename(iri, recognised_keys, ignore_unrecognised)
+            value = self._read(name)
+            if value is None:
+                value = self._fetch(
+                    name, iri, recognised_keys, ignore_unrecognised
+                )
+            entry = (name, value)
+            with self._lock:
+                self._memory[key] = entry
+                if (
+                    self.maxsize is not None
+                    and len(self._memory) > self.maxsize
+                ):
+                    self._memory.popitem(last=False)
+
+        return entry[1] if shared else copy.deepcopy(entry[1])
+
+    def _read(self, name):
+        """Return the resource cached on disk in file `name`, or None if
+        it is not cached."""
+        with self._lock:
+            cached = name in self._index
+            if cached:
+                self.hits += 1
+                self._index.move_to_end(name)
+        if not cached:
+            return None
+        path = self._entries / name
+        try:
+            with open(path, encoding="utf8") as f:
+                value = json.load(f)["value"]
+            os.utime(path)
+            return value
+        except (OSError, ValueError, KeyError):
+            # Removed or corrupted by another process
+            with self._lock:
+                self.hits -= 1
+                self._forget(name)
+        return None
+
+    def _fetch(self, name, iri, recognised_keys, ignore_unrecognised):
+        """Load a resource from the triplestore and store it on disk in
+        file `name`, unless the cache is not persistent."""
+        if self.offline:
+            raise KeyError(f"Resource '{iri}' is not cached (offline mode)")
+
+        value = fetch_container(
+            self.ts, iri, recognised_keys, ignore_unrecognised
+        )
+        with self._lock:
+            self.misses += 1
+        if not self.persistent:
+            return value
+        try:
+            text = json.dumps({"iri": iri, "value": value})
+        except TypeError:
+            return value  # Not JSON-serialisable, so not stored
+        self._write(self._entries / name, text)
+        self._store(name, len(text.encode("utf8")))
+        return value
+
+    def _forget(self, name):
+        """Remove `name` from the index.  Must be called with the lock
+        held."""
+        size = self._index.pop(name, None)
+        if size is not None:
+            self._nbytes -= size
+
+    def _store(self, name, size):
+        """Add `name` to the index and evict the least recently used
+        files if the cache is too large."""
+        evicted = []
+        with self._lock:
+            self._forget(name)
+            self._index[name] = size
+            self._nbytes += size
+            while (
+                self.max_bytes is not None
+                and self._nbytes > self.max_bytes
+                and len(self._index) > 1
+            ):
+                oldest = next(iter(self._index))
+                self._forget(oldest)
+                evicted.append(oldest)
+        for oldest in evicted:
+            try:
+                os.remove(self._entries / oldest)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, iri: "Optional[str]" = None) -> None:
+        """Remove resources from the cache.
+
+        Arguments:
+            iri: IRI of the resource to remove.  Both prefixed and
+                expanded IRIs are accepted.  If None, the whole cache
+                is cleared.
+        """
+        prefix = (
+            None
+            if iri is None
+            else _hash(expand_prefixed_iri(iri, self.namespaces))[:32]
+        )
+        with self._lock:
+            names = [
+                name
+                for name in self._index
+                if prefix is None or name.startswith(prefix)
+            ]
+            for name in names:
+                self._forget(name)
+            for key in [
+                key
+                for key, (name, _) in self._memory.items()
+                if prefix is None or name.startswith(prefix)
+            ]:
+                del self._memory[key]
+        for name in names:
+            try:
+                os.remove(self._entries / name)
+            except FileNotFoundError:
+                pass
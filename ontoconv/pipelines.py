@@ -1,15 +1,31 @@
 """Module for storing/loading OTEAPI pipelines to/from a knowledge base."""
 
+# pylint: disable=too-many-lines
+
+import json
+import threading
 import warnings
-from typing import Sequence
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Sequence
 
 import yaml
 from otelib import OTEClient
-from tripper import OTEIO, RDF, Triplestore
-from tripper.convert import load_container, save_container
-from tripper.convert.convert import BASIC_RECOGNISED_KEYS
+from tripper import DCAT, EMMO, OTEIO, RDF, Literal, Triplestore
+from tripper.convert.convert import BASIC_RECOGNISED_KEYS, from_container
+
+from ontoconv.batch import TripleBuffer
+from ontoconv.cache import ResourceCache, ResourceProvider, get_cache
+from ontoconv.iriindex import IriIndex
+from ontoconv.streaming import iter_documentation
+from ontoconv.tracing import RecordingTriplestore, span
+from ontoconv.views import ResourceView, thaw
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Union
 
-from ontoconv.attrdict import AttrDict
+    from ontoconv.tracing import Tracer
 
 # Get rid of FutureWarning from csv.py
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -28,14 +44,39 @@ RECOGNISED_KEYS.update(
             "http://open-model.eu/ontologies/oip#InstallCommand"
         ),
         "datamodel": "http://emmo.info/datamodel#DataModel",  # NB needs update
+        # Full documentation of a simulation resource saved in compact
+        # mode, stored as a single rdf:JSON literal
+        "json_documentation": (
+            "http://open-model.eu/ontologies/oip#JSONDocumentation"
+        ),
     }
 )
 
+# Key of the JSON literal with the documentation of a simulation
+# resource saved in compact mode
+COMPACT_KEY = "json_documentation"
+
+# Backend names of resource providers used in place of a triplestore.
+# They provide the settings for connecting to the knowledge base in
+# their `settings` attribute.
+PROVIDER_BACKENDS = ("snapshot", "cache", "yaml")
+
+# Sections of simulation resources that are indexed by IRI
+INDEXED_SECTIONS = ("input", "output", "aiida_datanodes")
+
 # Extra prefixes used by OntoConv
 EXTRA_PREFIXES = {
     "oip": "http://open-model.eu/ontologies/oip#",
 }
 
+# Namespaces bound by tripper.convert.save_container()
+CONTAINER_NAMESPACES = {
+    "rdf": RDF,
+    "dcat": DCAT,
+    "emmo": EMMO,
+    "oteio": OTEIO,
+}
+
 
 def get_resource_types(resource: list) -> list:
     """Returns the type(s) of a given resource.
@@ -84,7 +125,13 @@ def get_resource_types(resource: list) -> list:
 def populate_triplestore(
     ts: Triplestore,
     yamlfile: str,
-) -> None:
+    batch: bool = False,
+    chunk_size: "Optional[int]" = None,
+    stream: bool = False,
+    *,
+    tracer: "Optional[Tracer]" = None,
+    compact: bool = False,
+) -> dict:
     """Populate the triplestore with data documentation from a
     standardised yaml file.
 
@@ -92,39 +139,284 @@ def populate_triplestore(
         ts: Tripper triplestore documenting data sources and sinks.
         yamlfile: Standardised YAML file to load the data documentation
             from.
+        batch: Whether to collect the triples in memory and add them
+            to the triplestore in as few updates as possible.  By
+            default the triples of each resource are added separately.
+        chunk_size: In batch mode, the maximum number of triples to
+            add in a single update.  If None, all triples of the
+            document are added in one update.
+        stream: Whether to parse `yamlfile` incrementally, one resource
+            at a time, instead of loading the whole document into
+            memory.  Intended for very large files.  In this mode the
+            `prefixes` section must appear before the resources using
+            them.  Combine with `chunk_size` to also bound the number
+            of triples kept in memory.
+        tracer: If given, record the time spent and the triplestore
+            operations made with this tracer.
+        compact: Whether to save simulation resources in compact mode.
+            See `save_simulation_resource()`.
+
+    Returns:
+        Dict with the number of added `triples` and the number of
+        `flushes` (updates) made to the triplestore.
     """
-    with open(yamlfile, encoding="utf8") as f:
-        documentation = yaml.safe_load(f)
+    if tracer is not None:
+        with tracer.activate():
+            return populate_triplestore(
+                RecordingTriplestore(ts),
+                yamlfile,
+                batch=batch,
+                chunk_size=chunk_size,
+                stream=stream,
+                compact=compact,
+            )
+
+    with span("populate_triplestore", file=str(yamlfile)):
+        buffer = TripleBuffer(ts, chunk_size=chunk_size if batch else None)
+        return add_documentation(
+            ts, yamlfile, buffer, batch=batch, stream=stream, compact=compact
+        )
 
-    prefixes = EXTRA_PREFIXES.copy()
-    prefixes.update(documentation.get("prefixes", {}))
-    for prefix, namespace in prefixes.items():
+
+def add_documentation(
+    ts: Triplestore,
+    yamlfile: str,
+    buffer: TripleBuffer,
+    batch: bool = False,
+    stream: bool = False,
+    *,
+    compact: bool = False,
+) -> dict:
+    """Add the data documentation in a standardised yaml file to
+    `buffer`.
+
+    Prefixes are bound in `ts`.  Unless `batch` is true, the buffer is
+    flushed after each resource.  See `populate_triplestore()` for the
+    other arguments.
+
+    Returns:
+        The report of `buffer` after a final flush.
+    """
+    items = _documentation_items(yamlfile, stream)
+
+    for prefix, namespace in EXTRA_PREFIXES.items():
         ts.bind(prefix, namespace)
 
-    # Data resources
-    datadoc = documentation.get("data_resources", {})
-    for iri, resource in datadoc.items():
-        iri = ts.expand_iri(iri)
-        save_container(ts, resource, iri, recognised_keys="basic")
+    for section, iri, value in items:
+        if section == "prefixes":
+            ts.bind(iri, value)
+        elif section == "data_resources":
+            bind_container_namespaces(ts)
+            iri = ts.expand_iri(iri)
+            buffer.add_triples(data_resource_triples(ts, iri, value))
+        elif section == "simulation_resources":
+            bind_container_namespaces(ts)
+            iri = ts.expand_iri(iri)
+            save_simulation_resource(
+                ts, iri, value, buffer=buffer, compact=compact
+            )
+        else:
+            continue
+        if not batch:
+            buffer.flush()
+
+    buffer.flush()
+    return buffer.report()
 
-        # Add rdf:type relations
-        for rtype in get_resource_types(resource):
-            ts.add((iri, RDF.type, ts.expand_iri(rtype)))
 
-    # Simulation resources
-    simdoc = documentation.get("simulation_resources", {})
-    for iri, resource in simdoc.items():
-        iri = ts.expand_iri(iri)
-        save_simulation_resource(ts, iri, resource)
+def populate_triplestore_parallel(
+    ts: Triplestore,
+    yamlfiles: "Sequence[str]",
+    max_workers: "Optional[int]" = None,
+    chunk_size: "Optional[int]" = None,
+    stream: bool = False,
+    *,
+    compact: bool = False,
+) -> dict:
+    """Populate the triplestore from many standardised yaml files.
 
+    The files are parsed and converted to triples in a pool of worker
+    processes.  The triples are then added to `ts` in one bulk step.
 
-def save_simulation_resource(ts: Triplestore, iri: str, resource: dict):
-    """Save documentation of simulation tools to the triplestore.
+    Prefixes bound to different namespaces, either by two files or by
+    a file and `ts`, are reported as conflicts.  In case of a conflict,
+    the first binding is kept.  Since the IRIs in each file are
+    expanded with the prefixes of that file, the triples themselves are
+    not affected by a conflict.
+
+    Arguments:
+        ts: Tripper triplestore documenting data sources and sinks.
+        yamlfiles: Standardised YAML files to load the data
+            documentation from.
+        max_workers: Maximum number of worker processes.  Defaults to
+            the number of processors on the machine.
+        chunk_size: The maximum number of triples to add in a single
+            update.  If None, all triples are added in one update.
+        stream: Whether the worker processes should parse the files
+            incrementally.  See `populate_triplestore()`.
+        compact: Whether to save simulation resources in compact mode.
+            See `save_simulation_resource()`.
+
+    Returns:
+        Dict with the number of added `triples`, the number of
+        `flushes` (updates) made to the triplestore, the number of
+        `files` and a list of prefix `conflicts`.  Each conflict is a
+        dict with keys "prefix", "namespace", "conflicting_namespace"
+        and "file".
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                documentation_triples,
+                [str(yamlfile) for yamlfile in yamlfiles],
+                [stream] * len(yamlfiles),
+                [compact] * len(yamlfiles),
+            )
+        )
+
+    conflicts = []
+    bound = {prefix: str(ns) for prefix, ns in ts.namespaces.items()}
+    for yamlfile, (prefixes, _) in zip(yamlfiles, results):
+        for prefix, namespace in prefixes.items():
+            if prefix not in bound:
+                ts.bind(prefix, namespace)
+                bound[prefix] = namespace
+            elif bound[prefix] != namespace:
+                conflicts.append(
+                    {
+                        "prefix": prefix,
+                        "namespace": bound[prefix],
+                        "conflicting_namespace": namespace,
+                        "file": str(yamlfile),
+                    }
+                )
+    for conflict in conflicts:
+        warnings.warn(
+            f"Prefix '{conflict['prefix']}' is bound to "
+            f"{conflict['conflicting_namespace']} in {conflict['file']}, "
+            f"but is already bound to {conflict['namespace']}"
+        )
+    bind_container_namespaces(ts)
+
+    buffer = TripleBuffer(ts, chunk_size=chunk_size)
+    for _, triples in results:
+        buffer.add_triples(triples)
+    buffer.flush()
+
+    report = buffer.report()
+    report["files"] = len(results)
+    report["conflicts"] = conflicts
+    return report
+
+
+def documentation_triples(
+    yamlfile: str, stream: bool = False, compact: bool = False
+) -> tuple:
+    """Convert a standardised yaml file to triples without adding them
+    to a triplestore.
+
+    Arguments:
+        yamlfile: Standardised YAML file to load the data documentation
+            from.
+        stream: Whether to parse `yamlfile` incrementally.
+        compact: Whether to save simulation resources in compact mode.
+
+    Returns:
+        A `(prefixes, triples)` tuple, where `prefixes` is a dict
+        mapping the prefixes used by `yamlfile` to their namespaces and
+        `triples` is a list of RDF triples.
+    """
+    # Scratch triplestore, only used for expanding prefixed IRIs
+    ts = Triplestore(backend="rdflib")
+
+    prefixes = {}
+    for prefix, namespace in EXTRA_PREFIXES.items():
+        ts.bind(prefix, namespace)
+        prefixes[prefix] = namespace
+
+    triples = []
+    for section, iri, value in _documentation_items(yamlfile, stream):
+        if section == "prefixes":
+            ts.bind(iri, value)
+            prefixes[iri] = value
+        elif section == "data_resources":
+            iri = ts.expand_iri(iri)
+            triples.extend(data_resource_triples(ts, iri, value))
+        elif section == "simulation_resources":
+            iri = ts.expand_iri(iri)
+            triples.extend(
+                simulation_resource_triples(iri, value, compact=compact)
+            )
+
+    return prefixes, triples
+
+
+def _documentation_items(
+    yamlfile: "Union[str, dict]", stream: bool = False
+) -> "Iterable":
+    """Return an iterable over `(section, key, value)` tuples for the
+    items in standardised yaml file.
+
+    If `stream` is true, `yamlfile` is parsed incrementally with
+    `ontoconv.streaming.iter_documentation()`.  Otherwise the whole
+    document is loaded and the prefixes are returned first, followed
+    by the data resources and the simulation resources.  `yamlfile` may
+    also be a dict with the already loaded document.
+    """
+    if isinstance(yamlfile, dict):
+        documentation = yamlfile
+    elif stream:
+        return iter_documentation(yamlfile)
+    else:
+        with open(yamlfile, encoding="utf8") as f:
+            documentation = yaml.safe_load(f)
+    return [
+        (section, key, value)
+        for section in ("prefixes", "data_resources", "simulation_resources")
+        for key, value in documentation.get(section, {}).items()
+    ]
+
+
+def bind_container_namespaces(ts: Triplestore) -> None:
+    """Bind the namespaces used by `tripper.convert.save_container()`."""
+    for prefix, namespace in CONTAINER_NAMESPACES.items():
+        if prefix not in ts.namespaces:
+            ts.bind(prefix, namespace)
+
+
+def data_resource_triples(ts: Triplestore, iri: str, resource: list) -> list:
+    """Return a list of triples documenting a data resource.
+
+    Arguments:
+        ts: Tripper triplestore used for expanding prefixed IRIs.
+        iri: Expanded IRI of the data resource.
+        resource: List with OTEAPI configurations for the data resource.
+
+    Returns:
+        List of RDF triples.
+    """
+    triples = from_container(resource, iri, recognised_keys="basic")
+
+    # Add rdf:type relations
+    for rtype in get_resource_types(resource):
+        triples.append((iri, RDF.type, ts.expand_iri(rtype)))
+
+    return triples
+
+
+def simulation_resource_triples(
+    iri: str, resource: dict, compact: bool = False
+) -> list:
+    """Return a list of triples documenting a simulation tool.
 
     Arguments:
-        ts: Tripper triplestore documenting the simulation tools.
         iri: IRI of the simulation tool.
-        siminfo: A dict with the documentation to save.
+        resource: A dict with the documentation of the simulation tool.
+        compact: Whether to use the compact layout.  See
+            `save_simulation_resource()`.
+
+    Returns:
+        List of RDF triples.
     """
     # pylint: disable=redefined-builtin
 
@@ -133,31 +425,165 @@ def save_simulation_resource(ts: Triplestore, iri: str, resource: dict):
     # restrictions.
     # What we do here, will be interpreted as annotation properties
     # by Protege.
-    save_container(ts, resource, iri, recognised_keys=RECOGNISED_KEYS)
+    if compact:
+        annotations = {
+            key: value
+            for key, value in resource.items()
+            if key in RECOGNISED_KEYS
+            and key != COMPACT_KEY
+            and isinstance(value, (str, int, float, bool))
+        }
+        triples = from_container(
+            annotations, iri, recognised_keys=RECOGNISED_KEYS
+        )
+        triples.append(
+            (
+                iri,
+                RECOGNISED_KEYS[COMPACT_KEY],
+                Literal(json.dumps(resource), datatype=RDF.JSON),
+            )
+        )
+    else:
+        triples = from_container(
+            resource, iri, recognised_keys=RECOGNISED_KEYS
+        )
 
     # Ensure that all input and output are datasets
     for input in resource.get("input", {}):
-        ts.add((input, RDF.type, OTEIO.DataSink))
+        triples.append((input, RDF.type, OTEIO.DataSink))
 
     for output in resource.get("output", {}):
-        ts.add((output, RDF.type, OTEIO.DataSource))
+        triples.append((output, RDF.type, OTEIO.DataSource))
+
+    return triples
+
+
+def save_simulation_resource(
+    ts: Triplestore,
+    iri: str,
+    resource: dict,
+    buffer: "Optional[TripleBuffer]" = None,
+    *,
+    compact: bool = False,
+):
+    """Save documentation of simulation tools to the triplestore.
+
+    Arguments:
+        ts: Tripper triplestore documenting the simulation tools.
+        iri: IRI of the simulation tool.
+        resource: A dict with the documentation to save.
+        buffer: If given, the triples are added to this buffer instead
+            of directly to the triplestore.
+        compact: Whether to store the documentation in compact mode.
+            Only the top-level annotations with literal values (like
+            `command`) are stored as separate triples.  The full
+            documentation, including the nested `input`, `output`,
+            `files` and `aiida_datanodes` sections, is stored as a
+            single rdf:JSON literal, such that it is loaded with a
+            single lookup.  `load_simulation_resource()` reads both
+            layouts.
+    """
+    triples = simulation_resource_triples(iri, resource, compact=compact)
+    if buffer is None:
+        bind_container_namespaces(ts)
+        ts.add_triples(triples)
+    else:
+        buffer.add_triples(triples)
 
 
-def load_simulation_resource(ts: Triplestore, iri: str):
+def load_simulation_resource(
+    ts: Triplestore, iri: str, cache: "Optional[ResourceCache]" = None
+):
     """Loads documentation of simulation tool from the triplestore.
 
     Arguments:
         ts: Tripper triplestore documenting the simulation tools.
         iri: IRI of the simulation tool.
+        cache: Optional resource cache to load the documentation through.
 
     Returns
-        A dict with attribute access documentating the simulation tool.
+        A read-only mapping with attribute access documentating the
+        simulation tool.  Its `index` attribute provides IRI indexes
+        for the input, output and AiiDA datanodes.  See
+        `SimulationResource`.
 
     """
-    resource = load_container(
-        ts, iri, recognised_keys=RECOGNISED_KEYS, ignore_unrecognised=True
+    cache = get_cache(ts, cache)
+    resource = cache.load_container(
+        iri,
+        recognised_keys=RECOGNISED_KEYS,
+        ignore_unrecognised=True,
+        shared=True,
     )
-    return AttrDict(**resource)
+    # Documentation saved in compact mode
+    resource = resource.get(COMPACT_KEY, resource)
+    namespaces = {
+        prefix: str(namespace) for prefix, namespace in ts.namespaces.items()
+    }
+    if isinstance(cache, ResourceProvider):
+        # Build the index once per cached resource and set of namespaces
+        index = cache.derived(
+            resource,
+            ("index", frozenset(namespaces.items())),
+            partial(simulation_resource_index, namespaces=namespaces),
+        )
+    else:
+        index = None
+    return SimulationResource(resource, namespaces=namespaces, index=index)
+
+
+def simulation_resource_index(
+    resource: "Mapping[str, Any]", namespaces: "Mapping[str, str]"
+) -> "Dict[str, IriIndex]":
+    """Return a dict mapping the sections in `INDEXED_SECTIONS` to an
+    `IriIndex` of the corresponding section of `resource`.  The indexed
+    values are read-only views."""
+    if not isinstance(resource, ResourceView):
+        resource = ResourceView(resource)
+    return {
+        section: IriIndex(resource.get(section) or {}, namespaces)
+        for section in INDEXED_SECTIONS
+    }
+
+
+class SimulationResource(ResourceView):
+    """Documentation of a simulation tool, as a read-only mapping with
+    attribute access.
+
+    The documentation is not copied, so the same cached resource can
+    be shared by any number of views.  Nested dicts and lists are
+    returned as read-only views.  Use `ontoconv.views.thaw()` to get a
+    mutable copy.
+
+    In addition to the documentation itself, it has an `index`
+    attribute, which is a dict mapping "input", "output" and
+    "aiida_datanodes" to an `IriIndex` of the corresponding section.
+    This allows to look up e.g. the input configuration for an IRI in
+    constant time, regardless whether the IRI is given as a full IRI,
+    prefixed IRI or `Node.kb_suffix()`.
+
+    Arguments:
+        resource: Dict with the documentation of the simulation tool.
+        namespaces: Mapping of prefixes to namespaces used for expanding
+            prefixed IRIs.
+        index: Precomputed index, as returned by
+            `simulation_resource_index()`.  By default it is built from
+            `resource`.
+    """
+
+    # The index is stored in a slot, so it does not become a mapping item
+    __slots__ = ("index",)
+
+    def __init__(
+        self,
+        resource: dict,
+        namespaces: "Mapping[str, str]",
+        index: "Optional[Dict[str, IriIndex]]" = None,
+    ):
+        super().__init__(resource)
+        if index is None:
+            index = simulation_resource_index(self, namespaces)
+        object.__setattr__(self, "index", index)
 
 
 def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-locals,too-many-statements
@@ -166,6 +592,8 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
     save_final_output=False,
     recognised_keys: "Optional[Union[dict, str]]" = "basic",
     target_ts: "Optional[Triplestore]" = None,
+    *,
+    cache: "Optional[ResourceCache]" = None,
 ) -> dict:
     """Return a declarative ExecFlow pipeline as a dict.
 
@@ -184,6 +612,9 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
         target_ts: Tripper triplestore in which generated output of
             the pipeline is to be documented. Defaults to the same
             triplestore in which sources and models are documented.
+        cache: Resource cache for loading resources from `ts`.  Pass
+            the same cache to several calls to share loaded resources
+            between them.
     Returns:
         Dict-representation of a declarative ExecFlow pipeline.
 
@@ -208,6 +639,7 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
     """
     if target_ts is None:
         target_ts = ts
+    cache = get_cache(ts, cache)
 
     names = {"input": [], "output": [], "triplestore": []}
     strategies = []
@@ -217,6 +649,7 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
         for strategy in resource:
             for stype, conf in strategy.items():
                 name = n.var_name(dtype)
+                conf = thaw(conf)
                 conf[stype] = name
                 nonlocal i
                 i += 1
@@ -226,42 +659,36 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
     for n in nodes:
         iri = n.iri
         for n1 in n.inputs:
-            if n1.resource_type["output"] == "dataset":
+            if n1.output_type == "dataset":
                 add_resource(
-                    load_container(
-                        ts,
+                    cache.load_container(
                         n1.iri,
                         recognised_keys=recognised_keys,
                         ignore_unrecognised=True,
                     ),
                     "output",
                 )
-        if n.resource_type["input"] != "":
-            resource_type = n.resource_type["input"]
+        if n.input_type != "":
+            resource_type = n.input_type
 
-            r = load_simulation_resource(ts, resource_type)
+            r = load_simulation_resource(ts, resource_type, cache=cache)
             try:
-                add_resource(r["input"][iri], "input")
-            except KeyError:
-                try:
-                    add_resource(r["input"][ts.prefix_iri(iri)], "input")
-                except KeyError as exc:
-                    raise KeyError(
-                        f"Could not find input {iri} in {resource_type}"
-                    ) from exc
-        if n.resource_type["output"] != "":
-            resource_type = n.resource_type["output"]
-            r = load_simulation_resource(ts, resource_type)
+                resource_info = r.index["input"][iri]
+            except KeyError as exc:
+                raise KeyError(
+                    f"Could not find input {iri} in {resource_type}"
+                ) from exc
+            add_resource(resource_info, "input")
+        if n.output_type != "":
+            resource_type = n.output_type
+            r = load_simulation_resource(ts, resource_type, cache=cache)
             try:
-                resource_info = r["output"][iri]
-            except KeyError:
-                try:
-                    resource_info = r["output"][ts.prefix_iri(iri)]
-                except KeyError as exc:
-                    raise KeyError(
-                        f"Could not find output {iri} in {resource_type}"
-                    ) from exc
-            if n.resource_type["output"] == "dataset":
+                resource_info = r.index["output"][iri]
+            except KeyError as exc:
+                raise KeyError(
+                    f"Could not find output {iri} in {resource_type}"
+                ) from exc
+            if n.output_type == "dataset":
                 if save_final_output:
                     warnings.warn(
                         "There is no sink, therefor it does not make sense to "
@@ -269,8 +696,7 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
                         "as source."
                     )
                 add_resource(
-                    load_container(
-                        ts,
+                    cache.load_container(
                         iri,
                         recognised_keys=recognised_keys,
                         ignore_unrecognised=True,
@@ -293,34 +719,19 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
                                         "dataresource"
                                     ]["downloadUrl"],
                                     "kb_document_class": iri,
-                                    "kb_document_computation": n.resource_type[
-                                        "output"
-                                    ],
+                                    "kb_document_computation": n.output_type,
                                     "kb_document_base_iri": iri.split("#")[0]
                                     + "kb#",
-                                    "kb_document_update": resource_info[0],
+                                    "kb_document_update": thaw(
+                                        resource_info[0]
+                                    ),
                                 },
                             },
                         }
                     ],
                     "output",
                 )
-                if target_ts.backend_name == "rdflib":
-                    settings = {
-                        "backend": "rdflib",
-                        "triplestore_url": target_ts.backend.triplestore_url,
-                    }
-                elif target_ts.backend_name == "fuseki":
-                    settings = {
-                        "backend": "fuseki",
-                        "triplestore_url": target_ts.kwargs["triplestore_url"],
-                        "database": target_ts.database,
-                    }
-                else:
-                    raise KeyError(
-                        f"Triplestore backend {target_ts.backend}, "
-                        "not suppoorted by OntoConv"
-                    )
+                settings = triplestore_settings(target_ts)
 
                 add_resource(
                     [
@@ -340,14 +751,11 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
 
             else:
                 try:
-                    datanodetype = r["aiida_datanodes"][iri]
-                except KeyError:
-                    try:
-                        datanodetype = r["aiida_datanodes"][ts.prefix_iri(iri)]
-                    except KeyError as exc:
-                        raise KeyError(
-                            f"Could not find {iri} in {r['aiida_datanodes']}"
-                        ) from exc
+                    datanodetype = r.index["aiida_datanodes"][iri]
+                except KeyError as exc:
+                    raise KeyError(
+                        f"Could not find {iri} in {r.get('aiida_datanodes')}"
+                    ) from exc
                 add_resource(
                     [
                         {
@@ -384,7 +792,10 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
                     ],
                     "output",
                 )
-    strategies, names = add_execflow_decoration_to_pipeline(strategies, names)
+    with span("decorate_pipeline"):
+        strategies, names = add_execflow_decoration_to_pipeline(
+            strategies, names
+        )
 
     source_pp = " | ".join(names["output"])
     sink_pp = " | ".join(names["input"])
@@ -404,6 +815,37 @@ def generate_ontoflow_pipeline(  # pylint: disable=too-many-branches,too-many-lo
     }
 
 
+def triplestore_settings(ts: Triplestore) -> dict:
+    """Return settings for connecting to triplestore `ts` from a pipeline.
+
+    Arguments:
+        ts: Tripper triplestore.
+
+    Returns:
+        Dict with the settings used by the `tripper.triplestore` filter.
+    """
+    if ts.backend_name in PROVIDER_BACKENDS:
+        if ts.settings is None:
+            raise KeyError(
+                f"No triplestore settings for the {ts.backend_name} backend"
+            )
+        return dict(ts.settings)
+    if ts.backend_name == "rdflib":
+        return {
+            "backend": "rdflib",
+            "triplestore_url": ts.backend.triplestore_url,
+        }
+    if ts.backend_name == "fuseki":
+        return {
+            "backend": "fuseki",
+            "triplestore_url": ts.kwargs["triplestore_url"],
+            "database": ts.database,
+        }
+    raise KeyError(
+        f"Triplestore backend {ts.backend}, not suppoorted by OntoConv"
+    )
+
+
 def add_execflow_decoration_to_pipeline(strategies, names):
     """Add ExecFlow decoration to the pipeline.
 
@@ -411,18 +853,23 @@ def add_execflow_decoration_to_pipeline(strategies, names):
         strategies: List of strategies in the pipeline.
         names: Dict with one list of names for the output (source)
           strategies and one list of names for the input (sink) strategies.
+
+    The function strategies are indexed by name and location in a
+    single pass, such that the time is linear in the number of
+    strategies and names.
     """
     functions = [f for f in strategies if "function" in f.keys()]
+    nfunctions = Counter(f["function"] for f in functions)
 
     # Add datanode2cuds if not already present, if a function is present
     # in the source strategies.
-    if not any(f["function"] == "datanode2cuds" for f in functions):
+    if "datanode2cuds" not in nfunctions:
         original_ouput_names = names["output"].copy()
         for name in original_ouput_names:
-            func = [f for f in functions if f["function"] == name]
-            if len(func) > 1:
+            count = nfunctions.get(name, 0)
+            if count > 1:
                 raise ValueError(f"Multiple functions with name {name}")
-            if len(func) == 1:
+            if count == 1:
                 strategies.append(
                     {
                         "function": "datanode2cuds",
@@ -436,7 +883,8 @@ def add_execflow_decoration_to_pipeline(strategies, names):
     # Add cuds2datanode if not already present, and files are created
     # in the sink strategies. Also add corresponding functions to convert
     # file to AiiDA datanode.
-    func = [f for f in functions if f["function"] in names["input"]]
+    input_names = set(names["input"])
+    func = [f for f in functions if f["function"] in input_names]
 
     locations = set(
         f["configuration"]["location"]
@@ -444,14 +892,17 @@ def add_execflow_decoration_to_pipeline(strategies, names):
         if "location" in f["configuration"]
     )
 
+    # Map each location to the name of the first function that has the
+    # location in its configuration
+    namebases = {}
+    for f in func:
+        if "location" in f["configuration"]:
+            namebases.setdefault(f["configuration"]["location"], f["function"])
+
     numfile = 1
     labels = []
     for loc in locations:
-        # find the function that has the location in its configuration
-        namebasis = [f for f in func if f["configuration"]["location"] == loc][
-            0
-        ]["function"]
-        label = f"{namebasis}"
+        label = f"{namebases[loc]}"
         function_name = label + "_to_aiida_datanode"
         strategies.append(
             {
@@ -486,22 +937,154 @@ def get_data(
     From the sequence of IRIs provided in the `steps` argument, this
     function ensembles an OTEAPI pipeline and calls its `get()` method.
 
+    Use a `DataPipelineRunner` to get data from many step sequences.
+
     Arguments:
         ts: Tripper triplestore documenting data sources and sinks.
         steps: Sequence of names of data sources and sinks to combine.
             The order is important and should go from source to sink.
         client_iri: IRI of OTELib client to use.
+
+    Returns:
+        The result of the pipeline's `get()` method.
     """
-    client = OTEClient(client_iri)
-    pipeline = None
+    return DataPipelineRunner(ts, client_iri=client_iri).get(steps)
 
-    for step in steps:
-        strategies = load_container(
-            ts, step, recognised_keys="basic", ignore_unrecognised=True
-        )
-        for filtertype, config in strategies.items():
-            creator = getattr(client, f"create_{filtertype}")
-            pipe = creator(**config)
-            pipeline = pipeline >> pipe if pipeline else pipe
 
-    pipeline.get()  # type: ignore
+class DataPipelineRunner:
+    """Runs OTEAPI pipelines assembled from data sources and sinks
+    documented in a triplestore.
+
+    A single OTEClient is shared by all pipelines and assembled
+    pipelines are cached by their sequence of steps, such that the
+    triplestore is only queried the first time a sequence is run.
+
+    OTELib pipelines are not documented to be thread-safe, so a cached
+    pipeline is only run by one thread at a time.  Different pipelines
+    may run concurrently.
+
+    Arguments:
+        ts: Tripper triplestore documenting data sources and sinks.
+        client_iri: IRI of OTELib client to use.
+        client: An existing OTEClient to use instead of creating a new
+            one from `client_iri`.
+        cache: Resource cache for loading the documentation of the
+            steps from `ts`.
+    """
+
+    def __init__(
+        self,
+        ts: Triplestore,
+        client_iri: str = "python",
+        client: "Optional[OTEClient]" = None,
+        cache: "Optional[ResourceCache]" = None,
+    ):
+        self.ts = ts
+        self.client = client if client is not None else OTEClient(client_iri)
+        self.cache = get_cache(ts, cache)
+        self._pipelines: "Dict[Tuple[str, ...], Any]" = {}
+        self._run_locks: "Dict[Tuple[str, ...], threading.Lock]" = {}
+        self._lock = threading.Lock()
+
+    def pipeline(self, steps: Sequence[str]):
+        """Return the (cached) OTEAPI pipeline for `steps`."""
+        key = tuple(steps)
+        with self._lock:
+            if key in self._pipelines:
+                return self._pipelines[key]
+
+        pipeline = None
+        for step in steps:
+            strategies = self.cache.load_container(
+                step, recognised_keys="basic", ignore_unrecognised=True
+            )
+            for filtertype, config in strategies.items():
+                creator = getattr(self.client, f"create_{filtertype}")
+                pipe = creator(**config)
+                pipeline = pipeline >> pipe if pipeline else pipe
+
+        with self._lock:
+            return self._pipelines.setdefault(key, pipeline)
+
+    def get(self, steps: Sequence[str]):
+        """Assemble the pipeline for `steps` and return the result of
+        its `get()` method.
+
+        Concurrent calls for the same steps are serialised, since they
+        run the same cached pipeline object.
+        """
+        key = tuple(steps)
+        pipeline = self.pipeline(key)
+        with self._lock:
+            run_lock = self._run_locks.setdefault(key, threading.Lock())
+        with run_lock:
+            return pipeline.get()  # type: ignore
+
+    def get_many(
+        self,
+        step_sequences: "Iterable[Sequence[str]]",
+        max_workers: "Optional[int]" = 4,
+    ) -> list:
+        """Get the data for many step sequences.
+
+        The pipelines are run concurrently in a pool of at most
+        `max_workers` threads.  An error in one pipeline does not
+        affect the others.
+
+        Arguments:
+            step_sequences: Sequences of steps.  See `get_data()`.
+            max_workers: Maximum number of pipelines to run
+                concurrently.  If None, the pipelines are run one by
+                one.
+
+        Returns:
+            A list with one dict for each step sequence, in the same
+            order as `step_sequences`.  Each dict has the keys "steps",
+            "result" and "error".  Either "result" or "error" (the
+            raised exception) is None.
+        """
+
+        def run(steps):
+            try:
+                return {
+                    "steps": steps,
+                    "result": self.get(steps),
+                    "error": None,
+                }
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                return {"steps": steps, "result": None, "error": exc}
+
+        step_sequences = [tuple(steps) for steps in step_sequences]
+        if max_workers is None:
+            return [run(steps) for steps in step_sequences]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, step_sequences))
+
+    def clear(self) -> None:
+        """Clear cached pipelines and resources."""
+        with self._lock:
+            self._pipelines.clear()
+            self._run_locks.clear()
+        self.cache.invalidate()
+
+
+def get_data_batch(
+    ts: Triplestore,
+    step_sequences: "Iterable[Sequence[str]]",
+    client_iri: str = "python",
+    max_workers: "Optional[int]" = 4,
+) -> list:
+    """Get the data for many step sequences sharing a single OTEClient.
+
+    Arguments:
+        ts: Tripper triplestore documenting data sources and sinks.
+        step_sequences: Sequences of steps.  See `get_data()`.
+        client_iri: IRI of OTELib client to use.
+        max_workers: Maximum number of pipelines to run concurrently.
+
+    Returns:
+        List of dicts with the result or error for each step sequence.
+        See `DataPipelineRunner.get_many()`.
+    """
+    runner = DataPipelineRunner(ts, client_iri=client_iri)
+    return runner.get_many(step_sequences, max_workers=max_workers)
@@ -0,0 +1,168 @@
+"""Resource providers that do not need a knowledge base.
+
+Pipeline generation only loads data resources and simulation resources
+from the knowledge base.  A `YamlProvider` serves them directly from
+standardised YAML documentation files (like `resources.yaml`), skipping
+the round trip through RDF that populating a triplestore with
+`populate_triplestore()` and loading the resources back implies:
+
+```python
+provider = YamlProvider("resources.yaml", settings=settings)
+parse_ontoflow(data, provider, outdir)
+```
+
+This is intended for testing and local iteration on the documentation.
+The generated pipelines are the same as with a knowledge base populated
+from the same files.
+"""
+
+import copy
+import os
+from typing import TYPE_CHECKING
+
+from tripper import Triplestore
+from tripper.errors import NamespaceError
+
+from ontoconv.cache import ResourceProvider
+from ontoconv.iriindex import MATCH_PREFIXED_IRI, expand_prefixed_iri
+from ontoconv.pipelines import (
+    CONTAINER_NAMESPACES,
+    EXTRA_PREFIXES,
+    _documentation_items,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+    from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+
+class YamlProvider(ResourceProvider):
+    """Resource provider backed by dicts loaded from standardised YAML
+    documentation.
+
+    Can be used in place of the knowledge base (`kb`/`ts` arguments) and
+    resource cache in `parse_ontoflow()`, `generate_ontoflow_pipeline()`
+    and `load_simulation_resource()`.
+
+    Prefixes are bound and the IRIs of the resources are expanded with
+    the same rules as `populate_triplestore()` uses.  Resources are
+    returned as documented, independent of the recognised keys asked
+    for, since that is what loading them back from a knowledge base
+    populated with them gives.
+
+    Arguments:
+        yamlfiles: Name of, or sequence of names of, the documentation
+            files to load.  More files can be added with
+            `add_documentation()`.
+        stream: Whether to parse the files incrementally.  See
+            `populate_triplestore()`.
+        settings: Settings for connecting to the knowledge base from a
+            pipeline, for pipelines that document their output in it.
+            See `ontoconv.pipelines.triplestore_settings()`.
+
+    Attributes:
+        namespaces: Dict mapping prefixes to namespaces.
+        settings: The `settings` argument.
+        backend_name: Always "yaml".
+    """
+
+    backend_name = "yaml"
+
+    def __init__(
+        self,
+        yamlfiles: "Union[str, Path, Sequence[Union[str, Path]]]" = (),
+        *,
+        stream: bool = False,
+        settings: "Optional[Dict[str, Any]]" = None,
+    ):
+        super().__init__()
+        self.namespaces: "Dict[str, str]" = {
+            prefix: str(namespace)
+            for prefix, namespace in Triplestore.default_namespaces.items()
+        }
+        self.namespaces.update(EXTRA_PREFIXES)
+        self.settings = settings
+        self._containers: "Dict[str, Union[dict, list]]" = {}
+        self._resources: "Dict[str, list]" = {
+            "data_resources": [],
+            "simulation_resources": [],
+        }
+        if isinstance(yamlfiles, (str, os.PathLike)):
+            yamlfiles = [yamlfiles]
+        for yamlfile in yamlfiles:
+            self.add_documentation(yamlfile, stream=stream)
+
+    def __len__(self):
+        return len(self._containers)
+
+    def __contains__(self, iri):
+        return self.expand_iri(iri) in self._containers
+
+    def add_documentation(
+        self,
+        documentation: "Union[str, Path, dict]",
+        stream: bool = False,
+    ) -> None:
+        """Add the resources in standardised YAML documentation.
+
+        Arguments:
+            documentation: Name of a documentation file or a dict with
+                its content.
+            stream: Whether to parse the file incrementally.
+        """
+        for section, iri, value in _documentation_items(documentation, stream):
+            if section == "prefixes":
+                self.namespaces[iri] = value
+            elif section in self._resources:
+                for prefix, namespace in CONTAINER_NAMESPACES.items():
+                    self.namespaces.setdefault(prefix, str(namespace))
+                iri = self._expand_documented_iri(iri)
+                if iri not in self._containers:
+                    self._resources[section].append(iri)
+                self._containers[iri] = value
+
+    def _expand_documented_iri(self, iri: str) -> str:
+        """Expand the IRI of a documented resource like
+        `Triplestore.expand_iri()`, which raises on unknown prefixes."""
+        match = MATCH_PREFIXED_IRI.match(iri)
+        if match and (match.group(1) or "") not in self.namespaces:
+            raise NamespaceError(f"unknown namespace: '{match.group(1)}'")
+        return self.expand_iri(iri)
+
+    def expand_iri(self, iri: str) -> str:
+        """Return the expanded form of a (possibly prefixed) IRI."""
+        return expand_prefixed_iri(iri, self.namespaces)
+
+    def resources(self, kind: "Optional[str]" = None) -> "Iterable[str]":
+        """Return the expanded IRIs of the documented resources.
+
+        Arguments:
+            kind: Either "data_resources" or "simulation_resources".
+                By default all resources are returned.
+        """
+        if kind is None:
+            return list(self._containers)
+        return list(self._resources[kind])
+
+    def load_container(
+        self,
+        iri: str,
+        recognised_keys: "Optional[Union[Dict, str]]" = None,
+        ignore_unrecognised: bool = False,
+        *,
+        shared: bool = False,
+    ) -> "Union[dict, list]":
+        """Return a copy of the documented resource with the given IRI.
+
+        Has the same interface as `ResourceCache.load_container()`.
+        `recognised_keys` and `ignore_unrecognised` are ignored.
+
+        Raises:
+            KeyError: If no resource `iri` is documented.
+        """
+        # pylint: disable=unused-argument
+        expanded = self.expand_iri(iri)
+        if expanded not in self._containers:
+            raise KeyError(f"No documented resource '{iri}'")
+        container = self._containers[expanded]
+        return container if shared else copy.deepcopy(container)
@@ -0,0 +1,465 @@
+"""Ranking of alternative routes in OntoFlow output by their KPAs.
+
+OntoFlow output is a tree in which every class node lists the ways to
+obtain an instance of the class as its children: existing individuals
+or models (steps, with predicate hasOutput) producing it.  A model node
+in turn needs all of its inputs.  When a class node has more than one
+child, the tree hence describes several alternative routes.  A route
+selects one child of every class node it reaches.
+
+Every model node carries key performance attributes (KPAs), like
+`Accuracy`, `SimulationTime` and `OpenSource`.  `RouteSet` enumerates
+all routes of a tree and aggregates the KPAs of the models in each of
+them into NumPy arrays, without constructing the routes themselves.
+The routes can then be ranked by a weighted score or by Pareto
+dominance, and only the best routes are converted:
+
+```python
+routes = RouteSet(data)
+for index in routes.rank(k=3, method="pareto"):
+    parse_ontoflow(routes.route(index), kb, outdir)
+```
+
+or simply `parse_top_routes(data, kb, outdir, k=3)`.
+
+Route indexes are assigned such that the first route selects the first
+child of every class node.  A tree without alternatives hence has a
+single route, which is the tree itself.
+"""
+
+import bisect
+import math
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from ontoconv.cache import get_cache
+from ontoconv.ontoflow import parse_ontoflow
+from ontoconv.streaming import ONTOFLOW_KEYS, load_ontoflow
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Dict, List, Optional, Union
+
+    from tripper import Triplestore
+
+    from ontoconv.cache import ResourceCache
+
+# Whether a larger value of a KPA is better ("max") or worse ("min")
+KPA_SENSES = {
+    "Accuracy": "max",
+    "SimulationTime": "min",
+    "OpenSource": "max",
+}
+
+# How the KPAs of the models in a route are combined.  The accuracy of
+# a route is limited by its least accurate model, the simulation times
+# add up and a route is only open source if all its models are.
+KPA_AGGREGATIONS = {
+    "Accuracy": "min",
+    "SimulationTime": "sum",
+    "OpenSource": "min",
+}
+
+# Supported aggregations with the NumPy ufunc combining two values and
+# the identity of the ufunc
+AGGREGATIONS = {
+    "sum": (np.add, 0.0),
+    "min": (np.minimum, math.inf),
+    "max": (np.maximum, -math.inf),
+}
+
+# Supported ranking methods
+RANKING_METHODS = ("weighted", "pareto")
+
+# Maximum number of elements in the temporary arrays used for computing
+# Pareto dominance and number of routes processed at a time
+PARETO_BLOCK_SIZE = 2**23
+PARETO_BLOCK_ROWS = 256
+
+
+class RouteSet:
+    """The alternative routes described by OntoFlow output.
+
+    Arguments:
+        data: Dict with the OntoFlow output, including the `kpas` of
+            the nodes, or name of a YAML or JSON file with it.
+        senses: Dict mapping the names of the KPAs to rank by to "max"
+            or "min", depending on whether a larger value is better or
+            worse.  Other KPAs are ignored.  Defaults to `KPA_SENSES`.
+        aggregations: Dict mapping KPA names to "sum", "min" or "max",
+            the way the KPAs of the models in a route are combined.
+            Defaults to `KPA_AGGREGATIONS` and "sum" for other KPAs.
+        max_routes: Maximum number of routes.  Since the KPAs of all
+            routes are kept in memory, a ValueError is raised if the
+            tree has more routes.
+
+    Attributes:
+        data: The OntoFlow output.
+        names: Tuple with the names of the KPAs.
+        values: Array of shape `(len(self), len(names))` with the
+            aggregated KPAs of each route.  KPAs that no model in a
+            route has are zero.
+    """
+
+    def __init__(
+        self,
+        data: "Union[dict, str, Path]",
+        senses: "Optional[Dict[str, str]]" = None,
+        aggregations: "Optional[Dict[str, str]]" = None,
+        max_routes: "Optional[int]" = 1_000_000,
+    ):
+        if not isinstance(data, dict):
+            data = load_ontoflow(data, keys=ONTOFLOW_KEYS + ("kpas",))
+        senses = KPA_SENSES if senses is None else senses
+        for name, sense in senses.items():
+            if sense not in ("max", "min"):
+                raise ValueError(f"Invalid sense of KPA {name}: '{sense}'")
+        aggregations = {**KPA_AGGREGATIONS, **(aggregations or {})}
+        self.data = data
+        self.names = tuple(senses)
+        self._signs = np.array(
+            [1.0 if senses[name] == "max" else -1.0 for name in self.names]
+        )
+        self._ufuncs = []
+        for name in self.names:
+            aggregation = aggregations.get(name, "sum")
+            if aggregation not in AGGREGATIONS:
+                raise ValueError(
+                    f"Invalid aggregation of KPA {name}: '{aggregation}'"
+                )
+            self._ufuncs.append(AGGREGATIONS[aggregation])
+
+        # Number of routes through each node, keyed by its id()
+        self._counts = _route_counts(data)
+        if max_routes is not None and len(self) > max_routes:
+            raise ValueError(
+                f"OntoFlow output has {len(self)} routes, more than "
+                f"max_routes={max_routes}"
+            )
+        self.values = self._aggregate()
+
+    def __len__(self):
+        return self._counts[id(self.data)]
+
+    def _aggregate(self) -> "np.ndarray":
+        """Return the aggregated KPAs of all routes.
+
+        The arrays are built bottom-up without recursion.  The routes of
+        a class node are the concatenation of the routes of its
+        children, while the routes of a model node are the Cartesian
+        product of the routes of its inputs.
+        """
+        identity = np.array([ident for _, ident in self._ufuncs])
+        arrays: "Dict[int, np.ndarray]" = {}
+        stack = [(self.data, False)]
+        while stack:
+            ndata, expanded = stack.pop()
+            children = ndata.get("children") or ()
+            if not expanded and children:
+                stack.append((ndata, True))
+                stack.extend(
+                    (child, False)
+                    for child in children
+                    if id(child) not in arrays
+                )
+                continue
+            if not children:
+                values = identity[np.newaxis, :].copy()
+            elif len(children) == 1:
+                values = arrays[id(children[0])].copy()
+            elif _is_model(ndata):
+                values = arrays[id(children[0])]
+                for child in children[1:]:
+                    values = self._product(values, arrays[id(child)])
+            else:
+                values = np.concatenate(
+                    [arrays[id(child)] for child in children]
+                )
+            if _is_model(ndata):
+                kpas = ndata.get("kpas") or {}
+                for j, (ufunc, _) in enumerate(self._ufuncs):
+                    if self.names[j] in kpas:
+                        ufunc(
+                            values[:, j],
+                            float(kpas[self.names[j]]),
+                            out=values[:, j],
+                        )
+            arrays[id(ndata)] = values
+
+        values = arrays[id(self.data)]
+        values[~np.isfinite(values)] = 0.0
+        return values
+
+    def _product(self, a: "np.ndarray", b: "np.ndarray") -> "np.ndarray":
+        """Return the aggregated KPAs of all combinations of the routes
+        with KPAs `a` and `b`, in row-major order."""
+        out = np.empty((len(a) * len(b), len(self.names)))
+        for j, (ufunc, _) in enumerate(self._ufuncs):
+            out[:, j] = ufunc.outer(a[:, j], b[:, j]).ravel()
+        return out
+
+    def scores(
+        self, weights: "Optional[Dict[str, float]]" = None
+    ) -> "np.ndarray":
+        """Return the weighted score of each route.  Higher is better.
+
+        Each KPA is scaled to the range [0, 1] over all routes, where 1
+        is the best value, before the weighted sum is taken.
+
+        Arguments:
+            weights: Dict mapping KPA names to weights.  KPAs that are
+                not given have weight 1.
+        """
+        weights = weights or {}
+        unknown = set(weights).difference(self.names)
+        if unknown:
+            raise ValueError(f"Unknown KPAs: {', '.join(sorted(unknown))}")
+        vector = np.array([weights.get(name, 1.0) for name in self.names])
+        return self._normalised() @ vector
+
+    def _normalised(self) -> "np.ndarray":
+        """Return the KPAs scaled to [0, 1], where 1 is the best value."""
+        values = self.values * self._signs
+        low = values.min(axis=0)
+        span = values.max(axis=0) - low
+        span[span == 0] = 1.0
+        return (values - low) / span
+
+    def pareto_fronts(self, k: "Optional[int]" = None) -> "List[np.ndarray]":
+        """Return the Pareto fronts of the routes, best first.
+
+        A route dominates another route if it is at least as good in
+        all KPAs and better in at least one.  The first front contains
+        the routes that are not dominated by any other route, the
+        second front those only dominated by routes in the first front,
+        and so on.
+
+        Arguments:
+            k: If given, only the fronts needed to cover the `k` best
+                routes are returned.  Since each front is found by
+                sweeping over all remaining routes, finding all fronts
+                of many routes is slow.
+
+        Returns:
+            List with an array of route indexes for each front.
+        """
+        values = self._normalised()
+        # A dominating route has a larger unweighted score, so sweeping
+        # the routes in this order, a route can only be dominated by
+        # routes before it
+        remaining = np.argsort(-values.sum(axis=1), kind="stable")
+        fronts = []
+        ncovered = 0
+        while len(remaining) and (k is None or ncovered < k):
+            front = _nondominated(values[remaining])
+            fronts.append(np.sort(remaining[front]))
+            ncovered += len(fronts[-1])
+            remaining = remaining[~front]
+        return fronts
+
+    def rank(
+        self,
+        k: "Optional[int]" = None,
+        method: str = "weighted",
+        weights: "Optional[Dict[str, float]]" = None,
+    ) -> "np.ndarray":
+        """Return the indexes of the best routes, best first.
+
+        Arguments:
+            k: Number of routes to return.  By default all routes are
+                returned.
+            method: Either "weighted", which ranks the routes by their
+                weighted score, or "pareto", which ranks them by their
+                Pareto front (see `pareto_fronts()`) and routes in the
+                same front by their weighted score.
+            weights: Weights of the KPAs.  See `scores()`.
+
+        Returns:
+            Array of route indexes.  Routes that rank equal are ordered
+            by their index.
+        """
+        if method not in RANKING_METHODS:
+            raise ValueError(
+                f"Invalid ranking method '{method}'.  Should be one of: "
+                f"{', '.join(RANKING_METHODS)}"
+            )
+        scores = self.scores(weights)
+        if method == "weighted":
+            return np.argsort(-scores, kind="stable")[:k]
+        return np.concatenate(
+            [
+                front[np.argsort(-scores[front], kind="stable")]
+                for front in self.pareto_fronts(k)
+            ]
+        )[:k]
+
+    def kpas(self, index: int) -> "Dict[str, float]":
+        """Return a dict with the aggregated KPAs of route `index`."""
+        return dict(zip(self.names, self.values[index].tolist()))
+
+    def route(self, index: int) -> dict:
+        """Return the OntoFlow output for route `index`.
+
+        The returned tree has a single child for each class node.  The
+        nodes are shallow copies of the nodes in `data`.
+        """
+        index = int(index)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Route index out of range: {index}")
+        root = dict(self.data)
+        stack = [(root, index)]
+        while stack:
+            node, index = stack.pop()
+            children = node.get("children")
+            if not children:
+                continue
+            counts = [self._counts[id(child)] for child in children]
+            if _is_model(node):
+                indexes = np.unravel_index(index, counts)
+                selected = list(zip(children, indexes))
+            else:
+                offsets = np.cumsum([0] + counts).tolist()
+                i = bisect.bisect_right(offsets, index) - 1
+                selected = [(children[i], index - offsets[i])]
+            node["children"] = []
+            for child, subindex in selected:
+                copied = dict(child)
+                node["children"].append(copied)
+                stack.append((copied, int(subindex)))
+        return root
+
+
+def _is_model(ndata: dict) -> bool:
+    """Return whether node `ndata` is a model, i.e. a step."""
+    return ndata.get("predicate") == "hasOutput"
+
+
+def _route_counts(data: dict) -> "Dict[int, int]":
+    """Return a dict mapping `id()` of each node in `data` to the number
+    of routes through its subtree."""
+    counts: "Dict[int, int]" = {}
+    stack = [(data, False)]
+    while stack:
+        ndata, expanded = stack.pop()
+        children = ndata.get("children") or ()
+        if not expanded and children:
+            stack.append((ndata, True))
+            stack.extend(
+                (child, False) for child in children if id(child) not in counts
+            )
+            continue
+        if not children:
+            counts[id(ndata)] = 1
+        elif _is_model(ndata):
+            counts[id(ndata)] = math.prod(
+                counts[id(child)] for child in children
+            )
+        else:
+            counts[id(ndata)] = sum(counts[id(child)] for child in children)
+    return counts
+
+
+def _nondominated(values: "np.ndarray") -> "np.ndarray":
+    """Return a boolean array telling which rows of `values` are not
+    dominated by any other row.
+
+    Larger values are better.  The rows must be ordered such that a row
+    can only be dominated by rows before it.  The rows are processed in
+    blocks, which are first compared to the non-dominated rows found so
+    far.  Only the remaining rows of a block are compared to each
+    other.  Since the front is typically small, this is much faster
+    than comparing all pairs of rows.
+    """
+    result = np.zeros(len(values), dtype=bool)
+    front = values[:0]
+    for start in range(0, len(values), PARETO_BLOCK_ROWS):
+        rows = values[start : start + PARETO_BLOCK_ROWS]
+        (candidates,) = np.nonzero(~_dominated(rows, front))
+        kept = candidates[~_dominated(rows[candidates], rows[candidates])]
+        result[start + kept] = True
+        front = np.concatenate([front, rows[kept]])
+    return result
+
+
+def _dominated(rows: "np.ndarray", others: "np.ndarray") -> "np.ndarray":
+    """Return a boolean array telling which of `rows` are dominated by
+    any of `others`.  Larger values are better."""
+    result = np.zeros(len(rows), dtype=bool)
+    step = max(1, PARETO_BLOCK_SIZE // max(1, rows.size))
+    rows = rows[:, np.newaxis, :]
+    for start in range(0, len(others), step):
+        chunk = others[np.newaxis, start : start + step, :]
+        result |= (
+            (chunk >= rows).all(axis=2) & (chunk > rows).any(axis=2)
+        ).any(axis=1)
+    return result
+
+
+def parse_top_routes(
+    workflow_data,
+    kb,
+    outdir=".",
+    k: int = 1,
+    target_ts: "Optional[Triplestore]" = None,
+    *,
+    method: str = "weighted",
+    weights: "Optional[Dict[str, float]]" = None,
+    senses: "Optional[Dict[str, str]]" = None,
+    aggregations: "Optional[Dict[str, str]]" = None,
+    cache: "Optional[ResourceCache]" = None,
+    **kwargs,
+) -> "List[dict]":
+    """Rank the alternative routes in OntoFlow output and convert the
+    `k` best of them with `parse_ontoflow()`.
+
+    The workchain of the route ranked `i` (starting from 0) is saved in
+    subdirectory `route_<i>` of `outdir`.  All routes share the same
+    resource cache, so each resource is only loaded once.
+
+    Arguments:
+        workflow_data: Dict with the OntoFlow output or name of a file
+            with it.  See `RouteSet`.
+        kb, target_ts, cache: See `parse_ontoflow()`.
+        outdir: Directory to save the workchains in.
+        k: Number of routes to convert.
+        method, weights: How to rank the routes.  See
+            `RouteSet.rank()`.
+        senses, aggregations: How to compute the KPAs of the routes.
+            See `RouteSet`.
+        kwargs: Additional keyword arguments passed to
+            `parse_ontoflow()`.
+
+    Returns:
+        List with a dict for each converted route, best first, with the
+        `route` index, its `score`, its `kpas`, the `outdir` of its
+        workchain and the lists of files `written` and `skipped` by
+        `parse_ontoflow()`.
+    """
+    routes = RouteSet(workflow_data, senses=senses, aggregations=aggregations)
+    scores = routes.scores(weights)
+    cache = get_cache(kb, cache)
+    results = []
+    for rank, index in enumerate(
+        routes.rank(k, method=method, weights=weights)
+    ):
+        routedir = Path(outdir) / f"route_{rank}"
+        routedir.mkdir(parents=True, exist_ok=True)
+        report = parse_ontoflow(
+            routes.route(index),
+            kb,
+            routedir,
+            target_ts,
+            cache=cache,
+            **kwargs,
+        )
+        results.append(
+            {
+                "route": int(index),
+                "score": float(scores[index]),
+                "kpas": routes.kpas(index),
+                "outdir": str(routedir),
+                **report,
+            }
+        )
+    return results
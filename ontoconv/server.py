@@ -0,0 +1,314 @@
+"""Long-running conversion server.
+
+The server keeps the knowledge base and a resource cache in memory,
+such that each conversion only pays for the actual generation of the
+pipelines and the workchain.
+
+Start it with
+
+    python -m ontoconv.server --kb kb.ttl [--port 8000 | --socket PATH]
+
+where `--kb` may be repeated and may also be a snapshot compiled with
+`ontoconv.snapshot.compile_kb()`.  The server handles requests
+concurrently and provides the endpoints:
+
+  - `POST /convert`: Convert the OntoFlow tree in the request body
+    (JSON or YAML) and return a JSON object with the generated `files`
+    (mapping file names to their YAML content).  With `?format=json`,
+    the files are instead returned as JSON objects.
+  - `POST /reload`: Reload the knowledge base from its sources.
+  - `GET /status`: Return a JSON object with the server status.
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+from tripper import Triplestore
+
+from ontoconv.cache import ResourceCache
+from ontoconv.ontoflow import parse_ontoflow
+from ontoconv.sinks import MemorySink
+from ontoconv.snapshot import SNAPSHOT_MAGIC, KBSnapshot
+from ontoconv.streaming import load_ontoflow
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Dict, Optional, Sequence, Union
+
+
+def load_kb(sources: "Sequence[Union[str, Path]]"):
+    """Return a knowledge base loaded from `sources`.
+
+    If `sources` is a single snapshot file, a `KBSnapshot` is returned.
+    Otherwise the sources are parsed into a new rdflib triplestore.
+    """
+    if len(sources) == 1:
+        with open(sources[0], "rb") as f:
+            is_snapshot = f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+        if is_snapshot:
+            return KBSnapshot.load(sources[0])
+    ts = Triplestore(backend="rdflib")
+    for source in sources:
+        ts.parse(source)
+    return ts
+
+
+class ConversionService:
+    """Converts OntoFlow trees using a knowledge base kept in memory.
+
+    The service is thread-safe.  A reload replaces the knowledge base
+    and resource cache atomically, such that conversions in progress
+    complete with the knowledge base they started with.
+
+    Arguments:
+        sources: Files to load the knowledge base from.  See
+            `load_kb()`.
+        kb: An already loaded knowledge base.  If given, `sources` is
+            only used for reloading.
+        maxsize: Maximum number of resources to keep in the cache.
+    """
+
+    def __init__(
+        self,
+        sources: "Sequence[Union[str, Path]]" = (),
+        kb=None,
+        maxsize: "Optional[int]" = None,
+    ):
+        self.sources = list(sources)
+        self.maxsize = maxsize
+        self.requests = 0
+        self.loaded = 0.0
+        self._lock = threading.Lock()
+        self._state = None
+        if kb is None:
+            self.reload()
+        else:
+            self._set_kb(kb)
+
+    def _set_kb(self, kb):
+        cache = (
+            kb
+            if isinstance(kb, KBSnapshot)
+            else ResourceCache(kb, maxsize=self.maxsize)
+        )
+        with self._lock:
+            self._state = (kb, cache)
+            self.loaded = time.time()
+
+    def reload(self) -> None:
+        """Reload the knowledge base from its sources."""
+        if not self.sources:
+            raise ValueError("No sources to load the knowledge base from")
+        self._set_kb(load_kb(self.sources))
+
+    def convert(
+        self,
+        data: dict,
+        max_workers: "Optional[int]" = None,
+        *,
+        dump: bool = True,
+    ) -> "Dict[str, Any]":
+        """Convert an OntoFlow tree.
+
+        The files are generated in memory, without touching the disk.
+
+        Arguments:
+            data: Dict with the OntoFlow output.
+            max_workers: Number of threads for generating the steps.
+                See `parse_ontoflow()`.
+            dump: Whether to return the YAML content of the files
+                instead of the generated dicts.
+
+        Returns:
+            Dict mapping the names of the generated files to their
+            content.
+        """
+        with self._lock:
+            kb, cache = self._state  # type: ignore
+            self.requests += 1
+        sink = MemorySink()
+        parse_ontoflow(
+            data, kb, outdir=sink, cache=cache, max_workers=max_workers
+        )
+        return sink.texts() if dump else sink.files
+
+    def status(self) -> "Dict[str, Any]":
+        """Return a dict with the status of the service."""
+        with self._lock:
+            kb, cache = self._state  # type: ignore
+            return {
+                "sources": [str(source) for source in self.sources],
+                "backend": kb.backend_name,
+                "loaded": self.loaded,
+                "requests": self.requests,
+                "cached_resources": len(cache),
+            }
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """HTTP request handler for a `ConversionServer`."""
+
+    server: "ConversionServer"
+
+    def address_string(self):
+        # The client address is empty for Unix sockets
+        return (
+            self.client_address[0]
+            if isinstance(self.client_address, tuple)
+            else "unix"
+        )
+
+    def send_json(self, obj, status=HTTPStatus.OK):
+        """Send `obj` as a JSON response."""
+        body = json.dumps(obj).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        """Send an error message as a JSON response."""
+        self.send_json({"error": message}, status=status)
+
+    def read_body(self):
+        """Return the OntoFlow tree in the JSON or YAML request body.
+
+        Only the fields needed for conversion are kept.  See
+        `ontoconv.streaming.load_ontoflow()`.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        return load_ontoflow(io.BytesIO(self.rfile.read(length)))
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handle GET requests."""
+        if self.path == "/status":
+            self.send_json(self.server.service.status())
+        else:
+            self.send_error_json(HTTPStatus.NOT_FOUND, "Not found")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handle POST requests."""
+        service = self.server.service
+        url = urlsplit(self.path)
+        if url.path == "/convert":
+            fmt = parse_qs(url.query).get("format", ["yaml"])[-1]
+            if fmt not in ("yaml", "json"):
+                self.send_error_json(
+                    HTTPStatus.BAD_REQUEST, f"Unsupported format: '{fmt}'"
+                )
+                return
+            try:
+                data = self.read_body()
+            except (ValueError, TypeError, yaml.YAMLError) as exc:
+                self.send_error_json(HTTPStatus.BAD_REQUEST, str(exc))
+                return
+            if not isinstance(data, dict) or "iri" not in data:
+                self.send_error_json(
+                    HTTPStatus.BAD_REQUEST, "Expected an OntoFlow tree"
+                )
+                return
+            try:
+                files = service.convert(data, dump=fmt == "yaml")
+            except (KeyError, ValueError, TypeError) as exc:
+                self.send_error_json(
+                    HTTPStatus.UNPROCESSABLE_ENTITY,
+                    f"{type(exc).__name__}: {exc}",
+                )
+                return
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                self.send_error_json(
+                    HTTPStatus.INTERNAL_SERVER_ERROR,
+                    f"{type(exc).__name__}: {exc}",
+                )
+                return
+            self.send_json({"files": files})
+        elif url.path == "/reload":
+            try:
+                service.reload()
+            except (OSError, ValueError) as exc:
+                self.send_error_json(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, str(exc)
+                )
+                return
+            self.send_json(service.status())
+        else:
+            self.send_error_json(HTTPStatus.NOT_FOUND, "Not found")
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class ConversionServer(ThreadingHTTPServer):
+    """HTTP server handling conversion requests concurrently.
+
+    Arguments:
+        address: Either a `(host, port)` tuple or the path to a Unix
+            socket.
+        service: The conversion service.
+        quiet: Whether to suppress logging of requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, service: ConversionService, quiet=False):
+        self.service = service
+        self.quiet = quiet
+        if isinstance(address, (str, Path)):
+            self.address_family = socket.AF_UNIX
+            address = str(address)
+            if os.path.exists(address):
+                os.remove(address)
+        super().__init__(address, ConversionRequestHandler)
+
+    def server_bind(self):
+        if self.address_family == socket.AF_UNIX:
+            # Skip HTTPServer.server_bind(), which assumes a host/port
+            self.socket.bind(self.server_address)
+            self.server_address = self.socket.getsockname()
+            self.server_name = "localhost"
+            self.server_port = 0
+        else:
+            super().server_bind()
+
+
+def main(argv=None):
+    """Run the conversion server."""
+    parser = argparse.ArgumentParser(
+        description="Server converting OntoFlow output to workchains."
+    )
+    parser.add_argument(
+        "--kb",
+        action="append",
+        required=True,
+        help="Knowledge base file or snapshot.  May be repeated.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket", help="Listen on this Unix socket.")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    service = ConversionService(args.kb)
+    address = args.socket or (args.host, args.port)
+    with ConversionServer(address, service, quiet=args.quiet) as server:
+        print(f"Serving on {args.socket or f'{args.host}:{args.port}'}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
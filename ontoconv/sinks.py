@@ -0,0 +1,215 @@
+"""Output sinks for the files generated by `parse_ontoflow()`.
+
+A sink receives the generated pipelines and workchain as dicts and
+decides how to store them:
+
+  - `DirectorySink`: Write each file to a directory (the default).
+  - `MemorySink`: Keep the dicts in memory, without serialising them.
+  - `ArchiveSink`: Write all files to a single zip or tar archive.
+
+Pass a sink as `outdir` to `parse_ontoflow()`:
+
+```python
+sink = MemorySink()
+parse_ontoflow(data, kb, sink)
+workchain = sink.files["workchain.yaml"]
+```
+
+YAML is dumped with the libyaml based `CSafeDumper` when PyYAML is
+built with libyaml, and with the pure Python `SafeDumper` otherwise.
+"""
+
+import io
+import tarfile
+import threading
+import time
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import yaml
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Dict, Optional, Union
+
+# Fastest available safe YAML dumper
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Map archive file name suffixes to tarfile write modes
+TAR_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+
+
+def dump_yaml(obj, stream=None):
+    """Dump `obj` as YAML, preserving the order of dict keys.
+
+    Returns the YAML document as a string if `stream` is None.
+    """
+    return yaml.dump(obj, stream, Dumper=YamlDumper, sort_keys=False)
+
+
+class OutputSink(ABC):
+    """Base class for output sinks.
+
+    Subclasses must implement `write_text()` and may override the other
+    methods.  All methods must be thread-safe, since `parse_ontoflow()`
+    may write files from several threads.
+    """
+
+    def write(self, name: str, obj: "Any") -> None:
+        """Store `obj` as a YAML file with the given name."""
+        self.write_text(name, dump_yaml(obj))
+
+    @abstractmethod
+    def write_text(self, name: str, text: str) -> None:
+        """Store `text` as a file with the given name."""
+
+    def exists(self, name: str) -> bool:
+        """Return whether a file with the given name exists from a
+        previous run.  Used in incremental mode."""
+        return self.read_text(name) is not None
+
+    def read_text(self, name: str) -> "Optional[str]":
+        """Return the content of the file with the given name from a
+        previous run, or None if there is no such file."""
+        # pylint: disable=unused-argument
+        return None
+
+    def close(self) -> None:
+        """Finalise the output."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DirectorySink(OutputSink):
+    """Write each file to `outdir`."""
+
+    def __init__(self, outdir: "Union[str, Path]" = "."):
+        self.outdir = Path(outdir)
+
+    def write(self, name, obj):
+        with open(self.outdir / name, "w", encoding="utf8") as f:
+            dump_yaml(obj, f)
+
+    def write_text(self, name, text):
+        with open(self.outdir / name, "w", encoding="utf8") as f:
+            f.write(text)
+
+    def exists(self, name):
+        return (self.outdir / name).exists()
+
+    def read_text(self, name):
+        path = self.outdir / name
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf8")
+
+
+class MemorySink(OutputSink):
+    """Keep the generated files in memory.
+
+    Attributes:
+        files: Dict mapping file names to the generated dicts.  Files
+            written as text (like the manifest in incremental mode) are
+            stored as strings.
+    """
+
+    def __init__(self):
+        self.files: "Dict[str, Any]" = {}
+        self._lock = threading.Lock()
+
+    def write(self, name, obj):
+        with self._lock:
+            self.files[name] = obj
+
+    def write_text(self, name, text):
+        with self._lock:
+            self.files[name] = text
+
+    def texts(self) -> "Dict[str, str]":
+        """Return a dict mapping file names to their YAML content."""
+        with self._lock:
+            files = dict(self.files)
+        return {
+            name: obj if isinstance(obj, str) else dump_yaml(obj)
+            for name, obj in files.items()
+        }
+
+
+class ArchiveSink(OutputSink):
+    """Write all files to a single zip or tar archive.
+
+    The archive is created when the sink is created and finalised by
+    `close()`, so use the sink as a context manager.  Since the archive
+    is always written from scratch, incremental mode regenerates all
+    files.
+
+    Arguments:
+        filename: Name of the archive file.
+        format: Either "zip" or one of the keys in `TAR_MODES` without
+            the leading dot, like "tar.gz".  The default is inferred
+            from the suffix of `filename`.
+    """
+
+    def __init__(
+        self,
+        filename: "Union[str, Path]",
+        format: "Optional[str]" = None,  # pylint: disable=redefined-builtin
+    ):
+        self.filename = Path(filename)
+        if format is None:
+            suffixes = "".join(self.filename.suffixes[-2:])
+            format = (
+                "zip"
+                if self.filename.suffix == ".zip"
+                else next(
+                    (s[1:] for s in TAR_MODES if suffixes.endswith(s)), None
+                )
+            )
+        if format != "zip" and f".{format}" not in TAR_MODES:
+            raise ValueError(
+                f"Cannot infer archive format from '{filename}'"
+                if format is None
+                else f"Unsupported archive format: '{format}'"
+            )
+        self.format = format
+        self._lock = threading.Lock()
+        # pylint: disable=consider-using-with
+        self._archive = (
+            zipfile.ZipFile(self.filename, "w", zipfile.ZIP_DEFLATED)
+            if format == "zip"
+            else tarfile.open(self.filename, TAR_MODES[f".{format}"])
+        )
+
+    def write_text(self, name, text):
+        data = text.encode("utf8")
+        with self._lock:
+            if isinstance(self._archive, zipfile.ZipFile):
+                self._archive.writestr(name, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        with self._lock:
+            self._archive.close()
+
+
+def as_sink(outdir: "Union[str, Path, OutputSink]") -> OutputSink:
+    """Return `outdir` if it is a sink, otherwise a `DirectorySink`
+    writing to `outdir`."""
+    if isinstance(outdir, OutputSink):
+        return outdir
+    return DirectorySink(outdir)
@@ -0,0 +1,416 @@
+"""Compiled snapshots of the resources in a knowledge base.
+
+Pipeline generation only needs the data resources and simulation
+resources documented in the knowledge base, which typically is a small
+part of it.  `compile_snapshot()` extracts them, together with the
+prefixes and rdf:types, into a compact binary file that
+`load_snapshot()` reads back in a few milliseconds.
+
+A `KBSnapshot` can be used in place of the knowledge base (`kb`/`ts`
+arguments) and resource cache in `parse_ontoflow()` and
+`generate_ontoflow_pipeline()`:
+
+```python
+snapshot = load_snapshot("kb.snapshot", sources=["kb.ttl"])
+parse_ontoflow(data, snapshot, outdir)
+```
+
+The snapshot records the size, modification time and hash of the files
+the knowledge base was parsed from, such that a stale snapshot is
+detected.
+"""
+
+import copy
+import hashlib
+import io
+import os
+import pickle  # nosec
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from tripper import EMMO, OTEIO, RDF, Triplestore
+from tripper.convert import load_container
+
+from ontoconv.cache import ResourceProvider, _keys_token
+from ontoconv.iriindex import expand_prefixed_iri
+from ontoconv.pipelines import RECOGNISED_KEYS, triplestore_settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import (
+        Any,
+        Dict,
+        Hashable,
+        Iterable,
+        List,
+        Optional,
+        Sequence,
+        Union,
+    )
+
+# Magic bytes and format version at the start of a snapshot file
+SNAPSHOT_MAGIC = b"ONTOCONV-KB\x00"
+SNAPSHOT_VERSION = 3
+
+# Recognised keys used when loading data and simulation resources
+DATA_RESOURCE_KEYS = "basic"
+SIMULATION_RESOURCE_KEYS = RECOGNISED_KEYS
+
+# Recognised keys that resources are compiled with.  Dicts are compiled
+# with all of them, since a dict may be used as either kind of resource
+RESOURCE_KEYS = (DATA_RESOURCE_KEYS, SIMULATION_RESOURCE_KEYS)
+
+# Predicates linking a container to the containers nested in it
+_NESTING_PREDICATES = (RDF.first, RDF.rest, EMMO.hasValue)
+
+# Classes that may be unpickled from a snapshot
+_SAFE_CLASSES = {
+    ("builtins", "dict"),
+    ("builtins", "list"),
+    ("builtins", "set"),
+    ("builtins", "frozenset"),
+    ("builtins", "tuple"),
+    ("datetime", "date"),
+    ("datetime", "datetime"),
+    ("datetime", "time"),
+    ("decimal", "Decimal"),
+}
+
+
+class SnapshotError(Exception):
+    """Invalid knowledge base snapshot."""
+
+
+class StaleSnapshotError(SnapshotError):
+    """The knowledge base snapshot is older than its sources."""
+
+
+class _Unpickler(pickle.Unpickler):  # nosec
+    """Unpickler that only accepts plain data."""
+
+    def find_class(self, module, name):
+        if (module, name) in _SAFE_CLASSES:
+            return super().find_class(module, name)
+        raise SnapshotError(f"Forbidden class in snapshot: {module}.{name}")
+
+
+def source_info(path: "Union[str, Path]") -> dict:
+    """Return a dict identifying the current content of file `path`."""
+    path = Path(path)
+    stat = path.stat()
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {
+        "path": str(path.resolve()),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": digest,
+    }
+
+
+def _is_fresh(info: dict) -> bool:
+    """Return whether the source file described by `info` is unchanged."""
+    try:
+        stat = os.stat(info["path"])
+    except OSError:
+        return False
+    if stat.st_size != info["size"]:
+        return False
+    if stat.st_mtime == info["mtime"]:
+        return True
+    # Touched, but possibly not modified
+    return source_info(info["path"])["sha256"] == info["sha256"]
+
+
+def find_resources(ts: Triplestore) -> "Dict[str, List[str]]":
+    """Return the IRIs of the data resources and simulation resources in
+    `ts`.
+
+    Resources are the named containers saved by `populate_triplestore()`
+    that are not nested in another container.  References to them from
+    other parts of the knowledge base, like subclass relations, are
+    ignored.
+
+    Data resources are saved as lists, but may also be dicts documented
+    as a data source or sink.  The remaining dicts are simulation
+    resources.
+
+    Returns:
+        Dict with sorted lists of "data_resources" and
+        "simulation_resources" IRIs.
+    """
+    nested = {
+        o
+        for predicate in _NESTING_PREDICATES
+        for o in ts.objects(predicate=predicate)
+    }
+
+    def toplevel(rdftype):
+        return {
+            iri
+            for iri in ts.subjects(RDF.type, rdftype)
+            if iri not in nested and not iri.startswith("_:")
+        }
+
+    dicts = toplevel(OTEIO.Dictionary)
+    datasets = {
+        iri
+        for iri in dicts
+        if {OTEIO.DataSource, OTEIO.DataSink}.intersection(
+            str(t) for t in ts.objects(iri, RDF.type)
+        )
+    }
+    return {
+        "data_resources": sorted(toplevel(RDF.List) | datasets),
+        "simulation_resources": sorted(dicts - datasets),
+    }
+
+
+def compile_snapshot(
+    ts: Triplestore,
+    filename: "Union[str, Path]",
+    sources: "Sequence[Union[str, Path]]" = (),
+) -> "KBSnapshot":
+    """Compile the resources in a knowledge base to a snapshot file.
+
+    Arguments:
+        ts: Tripper triplestore with the knowledge base.
+        filename: Name of the snapshot file to write.
+        sources: Files that `ts` was populated from.  They are used to
+            detect whether the snapshot is stale.
+
+    Returns:
+        The compiled snapshot.
+    """
+    resources = find_resources(ts)
+    containers: "Dict[str, Dict[Hashable, Any]]" = {}
+    for iri in resources["data_resources"] + resources["simulation_resources"]:
+        compiled = {}
+        for keys in RESOURCE_KEYS:
+            container = load_container(
+                ts, iri, recognised_keys=keys, ignore_unrecognised=True
+            )
+            compiled[_keys_token(keys)] = container
+            # Lists are only used as data resources
+            if isinstance(container, list):
+                break
+        containers[iri] = compiled
+
+    try:
+        settings = triplestore_settings(ts)
+    except KeyError:
+        settings = None
+
+    snapshot = KBSnapshot(
+        {
+            "version": SNAPSHOT_VERSION,
+            "namespaces": {
+                prefix: str(ns) for prefix, ns in ts.namespaces.items()
+            },
+            "resources": resources,
+            "containers": containers,
+            "types": {
+                iri: sorted(str(t) for t in ts.objects(iri, RDF.type))
+                for iri in containers
+            },
+            "settings": settings,
+            "sources": [source_info(source) for source in sources],
+        }
+    )
+    snapshot.save(filename)
+    return snapshot
+
+
+def compile_kb(
+    sources: "Sequence[Union[str, Path]]",
+    filename: "Union[str, Path]",
+    format: "Optional[str]" = None,  # pylint: disable=redefined-builtin
+) -> "KBSnapshot":
+    """Parse the knowledge base from `sources` and compile it to a
+    snapshot file.
+
+    Arguments:
+        sources: Files to parse the knowledge base from.
+        filename: Name of the snapshot file to write.
+        format: Format of the source files.  By default it is inferred
+            from the file name extension.
+
+    Returns:
+        The compiled snapshot.
+    """
+    ts = Triplestore(backend="rdflib")
+    for source in sources:
+        ts.parse(source, format=format)
+    return compile_snapshot(ts, filename, sources=sources)
+
+
+def load_snapshot(
+    filename: "Union[str, Path]",
+    sources: "Optional[Sequence[Union[str, Path]]]" = None,
+    recompile: bool = False,
+) -> "KBSnapshot":
+    """Load a knowledge base snapshot.
+
+    Arguments:
+        filename: Name of the snapshot file.
+        sources: If given, check that the snapshot was compiled from
+            these files and that they have not changed since.
+        recompile: Whether to compile a new snapshot from `sources` if
+            the snapshot is missing or stale, instead of raising an
+            exception.
+
+    Returns:
+        The loaded snapshot.
+
+    Raises:
+        StaleSnapshotError: If `sources` are given, `recompile` is
+            false, and the snapshot is stale.
+        SnapshotError: If `filename` is not a valid snapshot.
+    """
+    if recompile and sources is not None:
+        if not Path(filename).exists():
+            return compile_kb(sources, filename)
+    snapshot = KBSnapshot.load(filename)
+    if sources is not None and snapshot.is_stale(sources):
+        if recompile:
+            return compile_kb(sources, filename)
+        raise StaleSnapshotError(f"Snapshot '{filename}' is stale")
+    return snapshot
+
+
+class KBSnapshot(ResourceProvider):
+    """A compiled snapshot of the resources in a knowledge base.
+
+    Provides the subset of the triplestore interface and the resource
+    cache interface used for pipeline generation.
+
+    Arguments:
+        data: Dict with the snapshot content, as created by
+            `compile_snapshot()`.
+
+    Attributes:
+        namespaces: Dict mapping prefixes to namespaces.
+        settings: Settings for connecting to the knowledge base from a
+            pipeline, if supported by its backend.  See
+            `ontoconv.pipelines.triplestore_settings()`.
+        backend_name: Always "snapshot".
+    """
+
+    backend_name = "snapshot"
+
+    def __init__(self, data: dict):
+        if data.get("version") != SNAPSHOT_VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot version: {data.get('version')}"
+            )
+        super().__init__()
+        self.data = data
+        self.namespaces: "Dict[str, str]" = data["namespaces"]
+        self.settings: "Optional[Dict[str, Any]]" = data["settings"]
+        self._containers: "Dict[str, Dict[Hashable, Any]]" = data["containers"]
+
+    def __len__(self):
+        return len(self._containers)
+
+    def __contains__(self, iri):
+        return self.expand_iri(iri) in self._containers
+
+    def expand_iri(self, iri: str) -> str:
+        """Return the expanded form of a (possibly prefixed) IRI."""
+        return expand_prefixed_iri(iri, self.namespaces)
+
+    def prefix_iri(self, iri: str) -> str:
+        """Return the prefixed form of `iri`, if there is a matching
+        namespace.  Otherwise `iri` is returned."""
+        for prefix, namespace in self.namespaces.items():
+            if prefix and iri.startswith(namespace):
+                return f"{prefix}:{iri[len(namespace):]}"
+        return iri
+
+    def resources(self, kind: "Optional[str]" = None) -> "Iterable[str]":
+        """Return the IRIs of the resources in the snapshot.
+
+        Arguments:
+            kind: Either "data_resources" or "simulation_resources".
+                By default all resources are returned.
+        """
+        if kind is None:
+            return list(self._containers)
+        return list(self.data["resources"][kind])
+
+    def types(self, iri: str) -> "List[str]":
+        """Return the rdf:types of resource `iri`."""
+        return list(self.data["types"][self.expand_iri(iri)])
+
+    def load_container(
+        self,
+        iri: str,
+        recognised_keys: "Optional[Union[Dict, str]]" = None,
+        ignore_unrecognised: bool = False,  # pylint: disable=unused-argument
+        *,
+        shared: bool = False,
+    ) -> "Union[dict, list]":
+        """Return a copy of the container with the given IRI.
+
+        Has the same interface as `ResourceCache.load_container()`.
+        Lists are compiled with the "basic" recognised keys and dicts
+        also with `ontoconv.pipelines.RECOGNISED_KEYS`, ignoring
+        unrecognised relations.
+
+        Raises:
+            KeyError: If the resource is not in the snapshot or was
+                compiled with other recognised keys.
+        """
+        expanded = self.expand_iri(iri)
+        if expanded not in self._containers:
+            raise KeyError(f"No resource '{iri}' in snapshot")
+        compiled = self._containers[expanded]
+        token = _keys_token(recognised_keys)
+        if token not in compiled:
+            raise KeyError(
+                f"Resource '{iri}' is not compiled with the requested "
+                "recognised keys"
+            )
+        container = compiled[token]
+        return container if shared else copy.deepcopy(container)
+
+    def is_stale(
+        self, sources: "Optional[Sequence[Union[str, Path]]]" = None
+    ) -> bool:
+        """Return whether the snapshot is stale.
+
+        Arguments:
+            sources: If given, the snapshot is also stale if it was not
+                compiled from exactly these files.
+        """
+        infos = self.data["sources"]
+        if sources is not None and sorted(
+            str(Path(s).resolve()) for s in sources
+        ) != sorted(info["path"] for info in infos):
+            return True
+        return not all(_is_fresh(info) for info in infos)
+
+    def dumps(self) -> bytes:
+        """Return the snapshot serialised to bytes."""
+        payload = pickle.dumps(self.data, protocol=pickle.HIGHEST_PROTOCOL)
+        return SNAPSHOT_MAGIC + zlib.compress(payload)
+
+    @classmethod
+    def loads(cls, content: bytes) -> "KBSnapshot":
+        """Return a snapshot deserialised from bytes."""
+        if not content.startswith(SNAPSHOT_MAGIC):
+            raise SnapshotError("Not a knowledge base snapshot")
+        try:
+            payload = zlib.decompress(content[len(SNAPSHOT_MAGIC) :])
+        except zlib.error as exc:
+            raise SnapshotError("Corrupt knowledge base snapshot") from exc
+        return cls(_Unpickler(io.BytesIO(payload)).load())  # nosec
+
+    def save(self, filename: "Union[str, Path]") -> None:
+        """Save the snapshot to file."""
+        Path(filename).write_bytes(self.dumps())
+
+    @classmethod
+    def load(cls, filename: "Union[str, Path]") -> "KBSnapshot":
+        """Load a snapshot from file."""
+        return cls.loads(Path(filename).read_bytes())
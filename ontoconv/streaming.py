@@ -0,0 +1,226 @@
+"""Streaming parsing of large YAML documents.
+
+The functions in this module walk the YAML event stream and construct
+one item at a time, such that the full document never has to be held
+in memory.  The libyaml C parser is used when it is available.  Since
+JSON is a subset of YAML, JSON documents can be parsed as well.
+"""
+
+import sys
+from typing import TYPE_CHECKING
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import IO, Any, Iterator, Sequence, Set, Tuple, Union
+
+# Scalar fields of OntoFlow nodes used for conversion.  Together with
+# `children`, these are the only fields kept by `load_ontoflow()`.
+ONTOFLOW_KEYS = ("iri", "depth", "predicate")
+
+
+if yaml.__with_libyaml__:
+    from yaml.cyaml import CParser
+
+    class StreamLoader(  # pylint: disable=too-many-ancestors
+        CParser, Composer, SafeConstructor, Resolver
+    ):
+        """Safe YAML loader exposing the event stream of the libyaml
+        C parser to the pure Python composer."""
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+
+else:  # pragma: no cover
+    StreamLoader = yaml.SafeLoader  # type: ignore
+
+
+def _construct_next(loader: "StreamLoader") -> "Any":
+    """Compose and construct the next node in the event stream."""
+    node = loader.compose_node(None, None)  # type: ignore[arg-type]
+    data = loader.construct_object(node, deep=True)
+    # Drop references to constructed objects, like construct_document()
+    loader.constructed_objects = {}
+    loader.recursive_objects = {}
+    return data
+
+
+def _skip_next(loader: "StreamLoader") -> None:
+    """Consume the events of the next node without constructing it."""
+    level = 0
+    while True:
+        event = loader.get_event()
+        if isinstance(
+            event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)
+        ):
+            level += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            level -= 1
+        if level == 0:
+            return
+
+
+def iter_documentation(yamlfile: str) -> "Iterator[Tuple[str, Any, Any]]":
+    """Iterate over the items of a standardised YAML documentation file.
+
+    The top level of the document should be a mapping.  For every
+    top-level section whose value is a mapping (like `prefixes`,
+    `data_resources` and `simulation_resources`), a `(section, key,
+    value)` tuple is yielded for each of its items, in the order they
+    appear in the file.  Top-level entries with other values are skipped.
+
+    Only a single item is constructed at a time, so memory usage is
+    bounded by the largest item rather than by the size of the file.
+
+    Arguments:
+        yamlfile: YAML file to parse.
+
+    Returns:
+        Iterator over `(section, key, value)` tuples.
+    """
+    with open(yamlfile, encoding="utf8") as f:
+        loader = StreamLoader(f)
+        try:
+            loader.get_event()  # StreamStartEvent
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStartEvent
+            if not loader.check_event(yaml.MappingStartEvent):
+                raise TypeError(
+                    f"Expected top level of '{yamlfile}' to be a mapping"
+                )
+            loader.get_event()
+            while not loader.check_event(yaml.MappingEndEvent):
+                section = _construct_next(loader)
+                if loader.check_event(yaml.MappingStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.MappingEndEvent):
+                        key = _construct_next(loader)
+                        value = _construct_next(loader)
+                        yield section, key, value
+                    loader.get_event()
+                else:
+                    loader.compose_node(None, None)  # type: ignore[arg-type]
+        finally:
+            loader.dispose()
+
+
+def load_ontoflow(
+    source: "Union[str, IO]", keys: "Sequence[str]" = ONTOFLOW_KEYS
+) -> dict:
+    """Load the tree from a YAML or JSON document with OntoFlow output.
+
+    The document is parsed incrementally and by default only the fields
+    needed for conversion (`iri`, `depth`, `predicate` and `children`)
+    are kept.  All other fields, like `kpas` and `routeChoices`, are
+    skipped without being constructed, so memory usage is bounded by
+    the size of the returned tree rather than by the size of the
+    document.  The tree is built without recursion, so arbitrary deep trees are
+    supported.
+
+    Arguments:
+        source: Name of, or open text stream to, the document.
+        keys: Fields of the nodes to keep, in addition to `children`.
+            E.g. add "kpas" for ranking routes with `ontoconv.routes`.
+
+    Returns:
+        The root node of the tree as a dict that can be passed to
+        `ontoconv.ontoflow.parse_ontoflow()`.
+    """
+    if not hasattr(source, "read"):
+        with open(source, encoding="utf8") as f:
+            return load_ontoflow(f, keys)
+
+    loader = StreamLoader(source)
+    try:
+        loader.get_event()  # StreamStartEvent
+        if not loader.check_event(yaml.StreamEndEvent):
+            loader.get_event()  # DocumentStartEvent
+            return _load_ontoflow_tree(loader, frozenset(keys))
+    finally:
+        loader.dispose()
+    raise ValueError(f"No OntoFlow output in '{_name(source)}'")
+
+
+def _name(source: "IO") -> str:
+    """Return the name of text stream `source`."""
+    return getattr(source, "name", "<stream>")
+
+
+def _load_ontoflow_tree(loader: "StreamLoader", keys: "Set[str]") -> dict:
+    """Build the pruned OntoFlow tree from the events of a document."""
+    anchors: dict = {}
+    root, _ = _start_node(loader, anchors)
+    # Stack of the node dicts and children lists being built
+    stack: list = [root]
+    while stack:
+        parent = stack[-1]
+        if isinstance(parent, dict):
+            if loader.check_event(yaml.MappingEndEvent):
+                loader.get_event()
+                stack.pop()
+            else:
+                _load_ontoflow_field(loader, parent, keys, anchors, stack)
+        elif loader.check_event(yaml.SequenceEndEvent):
+            loader.get_event()
+            stack.pop()
+        else:
+            node, new = _start_node(loader, anchors)
+            parent.append(node)
+            if new:
+                stack.append(node)
+    return root
+
+
+def _start_node(loader: "StreamLoader", anchors: dict) -> "Tuple[dict, bool]":
+    """Start loading the next OntoFlow node.
+
+    Returns:
+        A `(node, new)` tuple.  `new` is false if the node is an alias
+        to an already loaded node.
+    """
+    if loader.check_event(yaml.AliasEvent):
+        return anchors[loader.get_event().anchor], False
+    if not loader.check_event(yaml.MappingStartEvent):
+        raise TypeError("Expected OntoFlow nodes to be mappings")
+    node: dict = {}
+    _add_anchor(loader.get_event(), node, anchors)
+    return node, True
+
+
+def _add_anchor(event, value, anchors):
+    """Record `value` in `anchors` if `event` has an anchor.
+
+    This makes aliases (as emitted by PyYAML for shared subtrees)
+    resolve to the same object.
+    """
+    if event.anchor is not None:
+        anchors[event.anchor] = value
+
+
+def _load_ontoflow_field(loader, node, keys, anchors, stack):
+    """Load the next field of `node`, skipping fields not in `keys`.
+    A new `children` list is pushed to `stack`."""
+    key = _construct_next(loader)
+    if key == "children":
+        if loader.check_event(yaml.AliasEvent):
+            node["children"] = anchors[loader.get_event().anchor]
+        elif loader.check_event(yaml.SequenceStartEvent):
+            node["children"] = children = []
+            _add_anchor(loader.get_event(), children, anchors)
+            stack.append(children)
+        else:
+            raise TypeError(
+                f"Expected children of '{node.get('iri')}' to be a sequence"
+            )
+    elif key in keys:
+        value = _construct_next(loader)
+        node[key] = sys.intern(value) if isinstance(value, str) else value
+    else:
+        _skip_next(loader)
@@ -0,0 +1,274 @@
+"""Tracing of the phases of a conversion.
+
+Tracing is disabled by default.  It is enabled by activating a
+`Tracer`, either explicitly
+
+```python
+tracer = Tracer()
+with tracer.activate():
+    parse_ontoflow(data, RecordingTriplestore(kb), outdir)
+print(tracer.report())
+```
+
+or by passing `tracer=tracer` to `parse_ontoflow()` or
+`populate_triplestore()`, which also wrap the triplestore in a
+`RecordingTriplestore`.
+
+Code is instrumented with the `span()` context manager.  When no
+tracer is active, `span()` only looks up a context variable and
+returns a shared no-op context manager.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, copy_context
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Callable, Dict, Iterable, Optional
+
+# Categories of triplestore methods counted by RecordingTriplestore.
+# Methods not listed here are counted as "other".
+TRIPLESTORE_CATEGORIES = {
+    "query": (
+        "triples",
+        "value",
+        "subjects",
+        "predicates",
+        "objects",
+        "subject_predicates",
+        "subject_objects",
+        "predicate_objects",
+        "query",
+        "has",
+    ),
+    "add": ("add", "add_triples", "parse", "remove", "update"),
+    "namespace": ("bind", "namespaces", "expand_iri", "prefix_iri"),
+}
+_CATEGORY = {
+    method: category
+    for category, methods in TRIPLESTORE_CATEGORIES.items()
+    for method in methods
+}
+
+_current_tracer: "ContextVar[Optional[Tracer]]" = ContextVar(
+    "ontoconv_tracer", default=None
+)
+_current_span: "ContextVar[Optional[Span]]" = ContextVar(
+    "ontoconv_span", default=None
+)
+_NULL_SPAN = nullcontext()
+
+
+class Span:
+    """A timed span of a traced phase.
+
+    Attributes:
+        name: Name of the phase.
+        attrs: Dict with additional attributes, like the step index.
+        parent: The enclosing span or None.
+        seconds: Wall time spent in the span (None while running).
+        calls: Counter mapping triplestore operation categories to the
+            number of calls made directly within this span (not within
+            nested spans).
+    """
+
+    __slots__ = ("name", "attrs", "parent", "seconds", "calls")
+
+    def __init__(self, name: str, attrs: "Dict[str, Any]", parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.seconds: "Optional[float]" = None
+        self.calls: "Counter[str]" = Counter()
+
+    @property
+    def path(self) -> str:
+        """Slash-separated names of this span and its parents."""
+        names = []
+        current: "Optional[Span]" = self
+        while current is not None:
+            names.append(current.name)
+            current = current.parent
+        return "/".join(reversed(names))
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serialisable dict representation of the span."""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "attrs": self.attrs,
+            "seconds": self.seconds,
+            "calls": dict(self.calls),
+        }
+
+
+class Tracer:
+    """Records timed spans and triplestore operation counts.
+
+    Arguments:
+        hooks: Callables that are called with each finished `Span`.
+            Use them to export spans to a logger or a tracing system.
+
+    Attributes:
+        spans: List of finished spans, in the order they finished.
+        calls: Counter with the total number of triplestore operations
+            per category.
+    """
+
+    def __init__(self, hooks: "Iterable[Callable[[Span], Any]]" = ()):
+        self.hooks = list(hooks)
+        self.spans: "list[Span]" = []
+        self.calls: "Counter[str]" = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Context manager activating this tracer in the current
+        context."""
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Context manager recording a span with the given name."""
+        new = Span(name, attrs, _current_span.get())
+        token = _current_span.set(new)
+        start = time.perf_counter()
+        try:
+            yield new
+        finally:
+            new.seconds = time.perf_counter() - start
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(new)
+            for hook in self.hooks:
+                hook(new)
+
+    def count(self, category: str, n: int = 1) -> None:
+        """Count `n` triplestore operations of the given category in
+        the current span."""
+        current = _current_span.get()
+        with self._lock:
+            self.calls[category] += n
+            if current is not None:
+                current.calls[category] += n
+
+    def report(self) -> dict:
+        """Return a structured report of the recorded spans.
+
+        Returns:
+            Dict with a list of all `spans` (see `Span.as_dict()`),
+            `phases` mapping each span path to the number of spans,
+            their total wall time and triplestore operation counts, and
+            the total triplestore operation `calls`.
+        """
+        with self._lock:
+            spans = list(self.spans)
+            calls = dict(self.calls)
+        phases: "Dict[str, Dict[str, Any]]" = {}
+        for finished in spans:
+            phase = phases.setdefault(
+                finished.path,
+                {"count": 0, "seconds": 0.0, "calls": Counter()},
+            )
+            phase["count"] += 1
+            phase["seconds"] += finished.seconds
+            phase["calls"].update(finished.calls)
+        for phase in phases.values():
+            phase["calls"] = dict(phase["calls"])
+        return {
+            "spans": [finished.as_dict() for finished in spans],
+            "phases": phases,
+            "calls": calls,
+        }
+
+
+def get_tracer() -> "Optional[Tracer]":
+    """Return the active tracer or None if tracing is disabled."""
+    return _current_tracer.get()
+
+
+def span(name: str, **attrs):
+    """Return a context manager recording a span with the active
+    tracer.  Does nothing if tracing is disabled."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, **attrs)
+
+
+def in_context(func: "Callable") -> "Callable":
+    """Return a callable that calls `func` in a copy of the context
+    at the time of this call.
+
+    Use it to propagate the active tracer and span to a worker thread.
+    Each returned callable must only be called once at a time.
+    """
+    if _current_tracer.get() is None:
+        return func
+    context = copy_context()
+    return lambda: context.run(func)
+
+
+class RecordingTriplestore:  # pylint: disable=too-few-public-methods
+    """Proxy around a tripper triplestore that counts its operations.
+
+    Calls to the public methods of the triplestore, and accesses to its
+    `namespaces` attribute, are counted per method in `calls` and per
+    category (see `TRIPLESTORE_CATEGORIES`) in the active tracer, if
+    any.  All other attributes are passed through to the triplestore.
+
+    Arguments:
+        ts: The triplestore to record operations on.
+
+    Attributes:
+        ts: The proxied triplestore.
+        calls: Counter mapping method names to the number of calls.
+    """
+
+    def __init__(self, ts):
+        self.ts = ts
+        self.calls: "Counter[str]" = Counter()
+        self._lock = threading.Lock()
+
+    def _record(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        tracer = _current_tracer.get()
+        if tracer is not None:
+            tracer.count(_CATEGORY.get(name, "other"))
+
+    def __getattr__(self, name):
+        attr = getattr(self.ts, name)
+        if name.startswith("_"):
+            return attr
+        if not callable(attr):
+            if name == "namespaces":
+                self._record(name)
+            return attr
+
+        def method(*args, **kwargs):
+            self._record(name)
+            return attr(*args, **kwargs)
+
+        return method
+
+
+def recording(ts):
+    """Return `ts` wrapped in a `RecordingTriplestore` if a tracer is
+    active and it is not already recorded.  Otherwise `ts` is returned
+    as it is.
+
+    Used where a triplestore that was bound outside the traced call,
+    like the triplestore of a resource cache passed by the caller, is
+    queried.
+    """
+    if _current_tracer.get() is None or isinstance(ts, RecordingTriplestore):
+        return ts
+    return RecordingTriplestore(ts)
@@ -0,0 +1,127 @@
+"""Read-only views with attribute access to nested dicts and lists.
+
+Unlike `ontoconv.attrdict.AttrDict`, a view does not reference itself,
+so it is freed by reference counting as soon as it is no longer used,
+without involving the cyclic garbage collector.  A view wraps the
+underlying data without copying it.  Nested dicts and lists are wrapped
+lazily when they are accessed.
+
+Since views cannot be modified, the same underlying data can safely be
+shared by many views, e.g. from a resource cache.  Use `thaw()` to get
+a mutable copy.
+"""
+
+import copy
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Any, Iterator
+
+
+def wrap(value: "Any") -> "Any":
+    """Return a view of `value` if it is a dict or list, otherwise
+    `value` itself."""
+    if isinstance(value, dict):
+        return ResourceView(value)
+    if isinstance(value, list):
+        return ListView(value)
+    return value
+
+
+def thaw(value: "Any") -> "Any":
+    """Return a mutable deep copy of the data behind a view.
+
+    Values that are not views are returned as they are.
+    """
+    if isinstance(value, (ResourceView, ListView)):
+        return copy.deepcopy(value._data)  # pylint: disable=protected-access
+    return value
+
+
+def _unwrap(value: "Any") -> "Any":
+    """Return the data behind a view or `value` itself."""
+    if isinstance(value, (ResourceView, ListView)):
+        return value._data  # pylint: disable=protected-access
+    return value
+
+
+class _ReadOnly:
+    """Base class for views, preventing attribute assignment."""
+
+    __slots__ = ("_data",)
+    _data: "Any"
+
+    def __init__(self, data):
+        object.__setattr__(self, "_data", data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' is read-only")
+
+    def __eq__(self, other):
+        return self._data == _unwrap(other)
+
+    __hash__ = None  # type: ignore
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._data!r})"
+
+
+class ResourceView(_ReadOnly, Mapping):
+    """Read-only view of a dict with attribute access to its items.
+
+    As for `AttrDict`, items whose keys shadow a method, like `keys`,
+    are only available with item access.
+
+    Arguments:
+        data: The dict to wrap.  It is not copied and must not be
+            modified while the view is in use.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return wrap(self._data[key])
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return wrap(self._data[name])
+        except KeyError:
+            raise AttributeError(
+                f"'{type(self).__name__}' has no attribute '{name}'"
+            ) from None
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self) -> "Iterator":
+        return iter(self._data)
+
+    def __dir__(self):
+        return list(super().__dir__()) + [
+            key for key in self._data if isinstance(key, str)
+        ]
+
+
+class ListView(_ReadOnly, Sequence):
+    """Read-only view of a list.
+
+    Arguments:
+        data: The list to wrap.  It is not copied and must not be
+            modified while the view is in use.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ListView(self._data[index])
+        return wrap(self._data[index])
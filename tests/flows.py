@@ -0,0 +1,145 @@
+"""Synthetic OntoFlow output and knowledge bases shared by tests.
+
+Like `paths`, this module is imported by the tests with or without
+conftest.
+"""
+
+EX = "http://example.com/dedup#"
+
+
+def flow():
+    """Return an OntoFlow tree in which the subtree producing A is
+    consumed by both Sim1 and Sim2."""
+
+    def producer(depth):
+        return {
+            "depth": depth,
+            "iri": f"{EX}Gen",
+            "predicate": "hasOutput",
+            "children": [
+                {
+                    "depth": depth + 1,
+                    "iri": f"{EX}X",
+                    "predicate": "hasInput",
+                    "children": [
+                        {
+                            "depth": depth + 2,
+                            "iri": f"{EX}x1",
+                            "predicate": "individual",
+                        }
+                    ],
+                }
+            ],
+        }
+
+    return {
+        "depth": 0,
+        "iri": f"{EX}Root",
+        "children": [
+            {
+                "depth": 1,
+                "iri": f"{EX}Sim1",
+                "predicate": "hasOutput",
+                "children": [
+                    {
+                        "depth": 2,
+                        "iri": f"{EX}A",
+                        "predicate": "hasInput",
+                        "children": [producer(3)],
+                    },
+                    {
+                        "depth": 2,
+                        "iri": f"{EX}B",
+                        "predicate": "hasInput",
+                        "children": [
+                            {
+                                "depth": 3,
+                                "iri": f"{EX}Sim2",
+                                "predicate": "hasOutput",
+                                "children": [
+                                    {
+                                        "depth": 4,
+                                        "iri": f"{EX}A",
+                                        "predicate": "hasInput",
+                                        "children": [producer(5)],
+                                    }
+                                ],
+                            }
+                        ],
+                    },
+                ],
+            }
+        ],
+    }
+
+
+def simulation(inputs, output):
+    """Return documentation of a simulation tool."""
+    return {
+        "aiida_plugin": "execwrapper",
+        "command": "run.sh",
+        "aiida_datanodes": {
+            f"ex:{output}": "http://onto-ns.com/meta/2.0/core.singlefile"
+        },
+        "input": {
+            f"ex:{name}": [
+                {
+                    "function": {
+                        "functionType": "application/vnd.dlite-generate",
+                        "configuration": {
+                            "driver": "json",
+                            "location": f"{name}.json",
+                        },
+                    }
+                }
+            ]
+            for name in inputs
+        },
+        "output": {
+            f"ex:{output}": [
+                {
+                    "dataresource": {
+                        "downloadUrl": f"{output}.json",
+                        "mediaType": "application/vnd.dlite-parse",
+                        "configuration": {
+                            "driver": "json",
+                            "datamodel": f"{EX}DataModel",
+                        },
+                    }
+                }
+            ]
+        },
+    }
+
+
+def populated_kb(tmp_path):
+    """Return a knowledge base documenting the resources of `flow()`."""
+    import yaml
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import populate_triplestore
+
+    resources = {
+        "prefixes": {"ex": EX},
+        "data_resources": {
+            f"{EX}x1": [
+                {
+                    "dataresource": {
+                        "downloadUrl": "file://x1.json",
+                        "mediaType": "application/json",
+                    }
+                }
+            ]
+        },
+        "simulation_resources": {
+            "ex:Gen": simulation(["X"], "A"),
+            "ex:Sim2": simulation(["A"], "B"),
+            "ex:Sim1": simulation(["A", "B"], "Root"),
+        },
+    }
+    yamlfile = tmp_path / "resources.yaml"
+    with open(yamlfile, "w", encoding="utf8") as f:
+        yaml.safe_dump(resources, f)
+    kb = Triplestore(backend="rdflib")
+    populate_triplestore(kb, yamlfile)
+    return kb
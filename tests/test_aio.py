@@ -0,0 +1,154 @@
+"""Test the asyncio variants of the conversion API."""
+
+
+# if True:
+def test_parse_ontoflow_async(tmp_path):
+    """Test that the async API gives the same output as the sync API."""
+    import asyncio
+
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.aio import parse_ontoflow_async
+    from ontoconv.ontoflow import parse_ontoflow
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    syncdir = tmp_path / "sync"
+    asyncdir = tmp_path / "async"
+    syncdir.mkdir()
+    asyncdir.mkdir()
+    expected = parse_ontoflow(data, kb, outdir=syncdir)
+    report = asyncio.run(
+        parse_ontoflow_async(data, kb, outdir=asyncdir, max_concurrency=3)
+    )
+    assert report == expected
+    for filename in expected["written"]:
+        assert (asyncdir / filename).read_text() == (
+            syncdir / filename
+        ).read_text()
+
+    # Incremental mode
+    report = asyncio.run(
+        parse_ontoflow_async(data, kb, outdir=asyncdir, incremental=True)
+    )
+    report = asyncio.run(
+        parse_ontoflow_async(data, kb, outdir=asyncdir, incremental=True)
+    )
+    assert report == {"written": [], "skipped": expected["written"]}
+
+
+def test_generate_ontoflow_pipeline_async():
+    """Test that the async API generates the same pipelines as the sync
+    API."""
+    import asyncio
+
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.aio import generate_ontoflow_pipeline_async
+    from ontoconv.ontoflow import OntoFlowTree
+    from ontoconv.pipelines import generate_ontoflow_pipeline
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        tree = OntoFlowTree(safe_load(f))
+
+    for step in tree.steps:
+        pipeline = asyncio.run(
+            generate_ontoflow_pipeline_async(kb, step.inputs)
+        )
+        assert pipeline == generate_ontoflow_pipeline(kb, step.inputs)
+
+
+def test_populate_triplestore_async():
+    """Test that the async API populates the same triples."""
+    import asyncio
+
+    from paths import indir
+    from tripper.triplestore import Triplestore
+
+    from ontoconv.aio import populate_triplestore_async
+    from ontoconv.pipelines import populate_triplestore
+
+    def named(ts):
+        return {
+            t
+            for t in ts.triples()
+            if not any(str(v).startswith("_:") for v in t)
+        }
+
+    for kwargs in [{}, {"batch": True, "chunk_size": 100}]:
+        ts = Triplestore(backend="rdflib")
+        expected = populate_triplestore(ts, indir / "resources.yaml", **kwargs)
+        ts_async = Triplestore(backend="rdflib")
+        report = asyncio.run(
+            populate_triplestore_async(
+                ts_async, indir / "resources.yaml", **kwargs
+            )
+        )
+        assert report == expected
+        assert sum(1 for _ in ts_async.triples()) == expected["triples"]
+        assert named(ts_async) == named(ts)
+
+
+def test_populate_triplestore_async_streaming():
+    """Test that updates are sent while the documentation is read, with
+    a bounded number of them waiting to be added."""
+    import asyncio
+    import threading
+    import time
+
+    from paths import indir
+    from tripper.triplestore import Triplestore
+
+    from ontoconv.aio import populate_triplestore_async
+
+    class RemoteStore:
+        """Thread-safe proxy reporting a non-rdflib backend, recording
+        the order of bindings and updates."""
+
+        backend_name = "remote"
+
+        def __init__(self):
+            self.ts = Triplestore(backend="rdflib")
+            self.lock = threading.Lock()
+            self.events = []
+
+        def __getattr__(self, name):
+            attr = getattr(self.ts, name)
+
+            def method(*args, **kwargs):
+                with self.lock:
+                    self.events.append(name)
+                    return attr(*args, **kwargs)
+
+            return method if callable(attr) else attr
+
+        def add_triples(self, triples):
+            """Add `triples` slowly."""
+            with self.lock:
+                self.events.append("add_triples")
+            time.sleep(0.01)
+            with self.lock:
+                self.ts.add_triples(triples)
+
+    store = RemoteStore()
+    report = asyncio.run(
+        populate_triplestore_async(
+            store, indir / "resources.yaml", max_concurrency=1
+        )
+    )
+    assert report["flushes"] == store.events.count("add_triples") == 3
+    assert sum(1 for _ in store.ts.triples()) == report["triples"]
+
+    # Reading is blocked while an update is waiting to be added, so the
+    # first update is added before the last resource is read
+    last_read = len(store.events) - store.events[::-1].index("expand_iri")
+    assert store.events.index("add_triples") < last_read
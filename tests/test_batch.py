@@ -0,0 +1,35 @@
+"""Test batched population of the knowledge base."""
+
+
+# if True:
+def test_populate_batched():
+    """Test that batched population gives the same KB with fewer updates."""
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import (
+        load_simulation_resource,
+        populate_triplestore,
+    )
+
+    ts1 = Triplestore(backend="rdflib")
+    report1 = populate_triplestore(ts1, indir / "resources.yaml")
+    # One update per data and simulation resource
+    assert report1["flushes"] == 3
+
+    ts2 = Triplestore(backend="rdflib")
+    report2 = populate_triplestore(ts2, indir / "resources.yaml", batch=True)
+    assert report2 == {"triples": report1["triples"], "flushes": 1}
+
+    ts3 = Triplestore(backend="rdflib")
+    report3 = populate_triplestore(
+        ts3, indir / "resources.yaml", batch=True, chunk_size=100
+    )
+    assert report3["triples"] == report1["triples"]
+    assert report3["flushes"] == -(-report1["triples"] // 100)
+
+    SS3 = ts1.namespaces["ss3"]
+    expected = load_simulation_resource(ts1, SS3.AbaqusSimulation)
+    for ts in ts2, ts3:
+        assert len(list(ts.triples())) == len(list(ts1.triples()))
+        assert load_simulation_resource(ts, SS3.AbaqusSimulation) == expected
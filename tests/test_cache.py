@@ -0,0 +1,50 @@
+"""Test the resource cache."""
+
+
+# if True:
+def test_resource_cache():
+    """Test loading resources through the cache."""
+    import pytest
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.cache import ResourceCache
+    from ontoconv.pipelines import RECOGNISED_KEYS, load_simulation_resource
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+    SS3 = ts.namespaces["ss3"]
+    SS3KB = ts.namespaces["ss3kb"]
+
+    cache = ResourceCache(ts, maxsize=2)
+    r1 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache=cache)
+    r2 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache=cache)
+    assert r1 == r2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Simulation resources are read-only views of the cached resource
+    with pytest.raises(TypeError):
+        r1["command"] = "modified"
+
+    # Returned containers are copies that can be modified freely
+    r3 = cache.load_container(
+        SS3.AbaqusSimulation, RECOGNISED_KEYS, ignore_unrecognised=True
+    )
+    r3["command"] = "modified"
+    r4 = cache.load_container(
+        SS3.AbaqusSimulation, RECOGNISED_KEYS, ignore_unrecognised=True
+    )
+    assert r4["command"] == r2["command"]
+
+    # Least recently used resource is evicted
+    cache.load_container(SS3KB.abaqus_config1, "basic", True)
+    cache.load_container(SS3KB.yieldstrength1, "basic", True)
+    assert len(cache) == 2
+    cache.load_container(SS3.AbaqusSimulation, RECOGNISED_KEYS, True)
+    assert cache.misses == 4
+
+    # Explicit invalidation accepts prefixed IRIs
+    cache.invalidate("ss3:AbaqusSimulation")
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
@@ -0,0 +1,56 @@
+"""Test compact storage of simulation resources."""
+
+
+# if True:
+def test_compact_simulation_resource():
+    """Test that both storage layouts load the same documentation."""
+    from paths import indir
+    from tripper import RDF
+    from tripper.triplestore import Triplestore
+
+    from ontoconv.pipelines import (
+        COMPACT_KEY,
+        RECOGNISED_KEYS,
+        load_simulation_resource,
+        populate_triplestore,
+        populate_triplestore_parallel,
+    )
+    from ontoconv.tracing import RecordingTriplestore
+
+    yamlfile = indir / "resources.yaml"
+    expanded = Triplestore(backend="rdflib")
+    populate_triplestore(expanded, yamlfile)
+    compact = Triplestore(backend="rdflib")
+    populate_triplestore(compact, yamlfile, compact=True)
+    parallel = Triplestore(backend="rdflib")
+    populate_triplestore_parallel(
+        parallel, [yamlfile], max_workers=1, compact=True
+    )
+
+    iri = "http://open-model.eu/ontologies/ss3#AbaqusSimulation"
+    documentation = list(
+        compact.objects(subject=iri, predicate=RECOGNISED_KEYS[COMPACT_KEY])
+    )
+    assert len(documentation) == 1
+    assert documentation[0].datatype == RDF.JSON
+
+    # Top-level annotations are kept as triples
+    assert compact.value(iri, RECOGNISED_KEYS["command"]) == "run_abaqus.sh"
+
+    recorded = {}
+    resources = {}
+    for name, ts in [
+        ("expanded", expanded),
+        ("compact", compact),
+        ("parallel", parallel),
+    ]:
+        recorded[name] = RecordingTriplestore(ts)
+        resources[name] = load_simulation_resource(recorded[name], iri)
+    assert resources["compact"] == resources["expanded"]
+    assert resources["parallel"] == resources["expanded"]
+    assert resources["compact"].index["input"].keys() == (
+        resources["expanded"].index["input"].keys()
+    )
+    assert sum(recorded["compact"].calls.values()) < (
+        sum(recorded["expanded"].calls.values()) / 5
+    )
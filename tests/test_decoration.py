@@ -0,0 +1,46 @@
+"""Test adding ExecFlow decoration to pipelines."""
+
+
+# if True:
+def test_add_execflow_decoration_to_pipeline():
+    """Test decoration of a pipeline with sources and file sinks."""
+    import pytest
+
+    from ontoconv.pipelines import add_execflow_decoration_to_pipeline
+
+    strategies = [
+        {"dataresource": "source_0"},
+        {"function": "convert_1", "configuration": {}},
+        {"function": "sink_0", "configuration": {"location": "a.json"}},
+        {"function": "sink_1", "configuration": {"location": "a.json"}},
+        {"function": "sink_2", "configuration": {}},
+    ]
+    names = {
+        "output": ["source_0", "convert_1"],
+        "input": ["sink_0", "sink_1", "sink_2"],
+    }
+    strategies, names = add_execflow_decoration_to_pipeline(strategies, names)
+    assert [s.get("function") for s in strategies[5:]] == [
+        "datanode2cuds",
+        "sink_0_to_aiida_datanode",
+        "cuds2datanode",
+    ]
+    assert strategies[6]["configuration"] == {
+        "path": "a.json",
+        "label": "sink_0",
+    }
+    assert names == {
+        "output": ["datanode2cuds", "source_0", "convert_1"],
+        "input": [
+            "sink_0",
+            "sink_1",
+            "sink_2",
+            "sink_0_to_aiida_datanode",
+            "cuds2datanode",
+        ],
+    }
+
+    with pytest.raises(ValueError):
+        add_execflow_decoration_to_pipeline(
+            [{"function": "f"}, {"function": "f"}], {"output": ["f"]}
+        )
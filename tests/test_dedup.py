@@ -0,0 +1,125 @@
+"""Test deduplication of identical subtrees."""
+
+from flows import EX, flow, populated_kb
+
+
+# if True:
+def test_dedup_tree():
+    """Test that the shared subtree is only built once."""
+    from ontoconv.ontoflow import OntoFlowTree
+
+    tree = OntoFlowTree(flow())
+    assert [n.iri for n in tree.steps] == [
+        f"{EX}Gen",
+        f"{EX}Gen",
+        f"{EX}Sim2",
+        f"{EX}Sim1",
+    ]
+
+    dag = OntoFlowTree(flow(), dedup=True)
+    assert [n.iri for n in dag.steps] == [f"{EX}Gen", f"{EX}Sim2", f"{EX}Sim1"]
+    assert len(dag) == len(tree) - 3
+    assert [n.id for n in dag.nodes] == list(range(len(dag)))
+
+    gen = dag.steps[0]
+    assert [n.iri for n in gen.outputs] == [f"{EX}A", f"{EX}A"]
+    assert [n.input_type for n in gen.outputs] == [f"{EX}Sim1", f"{EX}Sim2"]
+    assert all(n.output_type == f"{EX}Gen" for n in gen.outputs)
+    assert gen.output_groups() == [gen.outputs]
+
+
+def test_dedup_parse_ontoflow(tmp_path):
+    """Test that shared steps are generated once and referenced by all
+    their consumers."""
+    import yaml
+
+    from ontoconv.ontoflow import parse_ontoflow
+
+    kb = populated_kb(tmp_path)
+
+    (tmp_path / "tree").mkdir()
+    (tmp_path / "dag").mkdir()
+    tree_report = parse_ontoflow(flow(), kb, outdir=tmp_path / "tree")
+    dag_report = parse_ontoflow(
+        flow(), kb, outdir=tmp_path / "dag", dedup=True
+    )
+    assert len(tree_report["written"]) == 6
+    assert dag_report["written"] == [
+        "pipeline_0.yaml",
+        "pipeline_1.yaml",
+        "pipeline_2.yaml",
+        "pipeline_final.yaml",
+        "workchain.yaml",
+    ]
+
+    with open(tmp_path / "dag" / "workchain.yaml", encoding="utf8") as f:
+        steps = yaml.safe_load(f)["steps"]
+    calculations = [s for s in steps if s["workflow"] == "execwrapper"]
+    assert [
+        s["inputs"]["files"]["in_file_0"]["filename"] for s in calculations
+    ] == [
+        "X.json",
+        "A.json",
+        "A.json",
+    ]
+
+    # The shared step stores its output in the context of both consumers
+    outputs = [
+        p.split("to_ctx('")[1].split("'")[0]
+        for p in calculations[0]["postprocess"]
+    ]
+    assert len(set(outputs)) == 2
+    pipelines = [
+        s for s in steps if s["workflow"] == "execflow.oteapipipeline"
+    ]
+    consumed = [p["inputs"]["to_cuds"] for p in pipelines[1:3]]
+    assert all(len(set(outputs) & set(names)) == 1 for names in consumed)
+
+
+def test_workchain_stages(tmp_path):
+    """Test grouping of independent steps into stages, and that the
+    workchain is only emitted in stages when asked for."""
+    import pytest
+    import yaml
+
+    from ontoconv.ontoflow import OntoFlowTree, parse_ontoflow
+
+    tree = OntoFlowTree(flow())
+    assert tree.dependencies() == [set(), set(), {1}, {0, 2}]
+    assert tree.stages() == [[0, 1], [2], [3]]
+    assert OntoFlowTree(flow(), dedup=True).stages() == [[0], [1], [2]]
+
+    kb = populated_kb(tmp_path)
+    (tmp_path / "linear").mkdir()
+    (tmp_path / "stages").mkdir()
+    parse_ontoflow(flow(), kb, outdir=tmp_path / "linear")
+    parse_ontoflow(flow(), kb, outdir=tmp_path / "stages", layout="stages")
+    with pytest.raises(ValueError):
+        parse_ontoflow(flow(), kb, outdir=tmp_path, layout="parallel")
+
+    text = (tmp_path / "linear" / "workchain.yaml").read_text()
+    linear = yaml.safe_load(text)["steps"]
+    assert len(linear) == 9
+    assert all("workflow" in step and "name" not in step for step in linear)
+    assert "ctx.current" in text
+
+    # The two generator steps run concurrently in the first stage.  Each
+    # branch refers to the outputs of its own steps by name
+    text = (tmp_path / "stages" / "workchain.yaml").read_text()
+    staged = yaml.safe_load(text)["steps"]
+    assert "ctx.current" not in text
+    assert [len(b["steps"]) for b in staged[0]["parallel"]] == [2, 2]
+    steps = [s for b in staged[0]["parallel"] for s in b["steps"]]
+    steps.extend(staged[1:])
+    assert len(steps) == len(linear)
+    names = [s["name"] for s in steps[:-1]]
+    assert len(set(names)) == len(names)
+    for step in steps[:-1]:
+        assert all(
+            p.startswith(f"{{{{ ctx.{step['name']}.outputs")
+            for p in step["postprocess"]
+        )
+        unnamed = {k: v for k, v in step.items() if k != "name"}
+        assert {**unnamed, "postprocess": None} in [
+            {**s, "postprocess": None} for s in linear
+        ]
@@ -0,0 +1,104 @@
+"""Test getting data from many pipelines with a shared client."""
+
+
+# if True:
+def test_get_data_batch(tmp_path):
+    """Test that pipelines are run concurrently and cached."""
+    import json
+
+    from tripper import Triplestore
+    from tripper.convert import save_container
+
+    from ontoconv.pipelines import DataPipelineRunner, get_data_batch
+
+    ts = Triplestore(backend="rdflib")
+    EX = ts.bind("ex", "http://example.com/data#")
+    for name in "ab":
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps({name: 1}), encoding="utf8")
+        save_container(
+            ts,
+            {
+                "dataresource": {
+                    "downloadUrl": path.as_uri(),
+                    "mediaType": "application/json",
+                }
+            },
+            EX[name],
+            recognised_keys="basic",
+        )
+
+    sequences = [[EX.a], [EX.b], [EX.missing], [EX.a]]
+    runner = DataPipelineRunner(ts)
+    results = runner.get_many(sequences, max_workers=2)
+
+    assert [r["steps"] for r in results] == [tuple(s) for s in sequences]
+    assert json.loads(results[0]["result"]) == {"content": {"a": 1}}
+    assert json.loads(results[1]["result"]) == {"content": {"b": 1}}
+    assert results[2]["result"] is None
+    assert results[2]["error"] is not None
+    assert results[3]["result"] == results[0]["result"]
+    assert all(r["error"] is None for i, r in enumerate(results) if i != 2)
+
+    # Assembled pipelines are reused
+    assert runner.pipeline([EX.a]) is runner.pipeline((EX.a,))
+    misses = runner.cache.misses
+    runner.get([EX.b])
+    assert runner.cache.misses == misses
+
+    results = get_data_batch(ts, [[EX.b]], max_workers=None)
+    assert json.loads(results[0]["result"]) == {"content": {"b": 1}}
+
+
+def test_get_many_duplicate_steps():
+    """Test that a cached pipeline is not run by several threads at
+    once."""
+    import threading
+    import time
+
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import DataPipelineRunner
+
+    class Pipe:  # pylint: disable=too-few-public-methods
+        """Fake OTELib pipeline recording concurrent runs."""
+
+        def __init__(self, name):
+            self.name = name
+            self.lock = threading.Lock()
+            self.active = 0
+            self.max_active = 0
+
+        def get(self):
+            """Return the name of the pipeline after a short delay."""
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active -= 1
+            return self.name
+
+    class Client:  # pylint: disable=too-few-public-methods
+        """Fake OTEClient."""
+
+        def create_dataresource(self, name):
+            """Return a new pipeline."""
+            return Pipe(name)
+
+    class Cache:  # pylint: disable=too-few-public-methods
+        """Fake resource cache."""
+
+        def load_container(self, step, **_):
+            """Return the documentation of `step`."""
+            return {"dataresource": {"name": step}}
+
+    runner = DataPipelineRunner(
+        Triplestore(backend="rdflib"), client=Client(), cache=Cache()
+    )
+    sequences = [["a"]] * 4 + [["b"]] * 4
+    results = runner.get_many(sequences, max_workers=8)
+
+    assert [r["result"] for r in results] == ["a"] * 4 + ["b"] * 4
+    assert runner.pipeline(["a"]).max_active == 1
+    assert runner.pipeline(["b"]).max_active == 1
@@ -0,0 +1,55 @@
+"""Test incremental regeneration of pipelines and workchain."""
+
+
+# if True:
+def test_parse_ontoflow_incremental(tmp_path):
+    """Test that only files with changed inputs are rewritten."""
+    from paths import indir
+    from tripper import DCAT, Literal
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import MANIFEST_FILE, parse_ontoflow
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    files = [
+        "pipeline_0.yaml",
+        "pipeline_1.yaml",
+        "pipeline_final.yaml",
+        "workchain.yaml",
+    ]
+
+    report = parse_ontoflow(data, ts, outdir=tmp_path, incremental=True)
+    assert report == {"written": files, "skipped": []}
+    assert (tmp_path / MANIFEST_FILE).exists()
+
+    # Nothing has changed
+    report = parse_ontoflow(data, ts, outdir=tmp_path, incremental=True)
+    assert report == {"written": [], "skipped": files}
+
+    # Change the download URL of a dataset used by the first step
+    (s, p, o) = [
+        t
+        for t in ts.triples(predicate=DCAT.downloadUrl)
+        if t[2].endswith("tabulated_elasto_plastic.json")
+    ][0]
+    ts.remove(s, p, o)
+    ts.add((s, p, Literal("file://tabulated_elasto_plastic_v2.json")))
+
+    report = parse_ontoflow(data, ts, outdir=tmp_path, incremental=True)
+    assert report == {
+        "written": ["pipeline_0.yaml"],
+        "skipped": files[1:],
+    }
+    with open(tmp_path / "pipeline_0.yaml", encoding="utf8") as f:
+        assert "tabulated_elasto_plastic_v2.json" in f.read()
+
+    # A missing file is regenerated
+    (tmp_path / "workchain.yaml").unlink()
+    report = parse_ontoflow(data, ts, outdir=tmp_path, incremental=True)
+    assert report == {"written": ["workchain.yaml"], "skipped": files[:-1]}
@@ -0,0 +1,76 @@
+"""Test looking up simulation resource sections by IRI."""
+
+
+# if True:
+def test_iri_index():
+    """Test that all forms of an IRI are found."""
+    from ontoconv.iriindex import IriIndex
+
+    index = IriIndex(
+        {"ex:A": 1, "http://example.com/onto#B": 2, "unknown:C": 3},
+        {"ex": "http://example.com/onto#"},
+    )
+    assert set(index) == {
+        "http://example.com/onto#A",
+        "http://example.com/onto#B",
+        "unknown:C",
+    }
+    assert index["ex:A"] == index["http://example.com/onto#A"] == 1
+    assert index["ex:B"] == index["http://example.com/onto#B"] == 2
+    assert index["unknown:C"] == 3
+    assert "ex:B" in index
+    assert "ex:C" not in index
+    assert index.get("ex:C") is None
+
+
+def test_simulation_resource_index():
+    """Test the index of a loaded simulation resource."""
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.ontoflow import Node
+    from ontoconv.pipelines import load_simulation_resource
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+    SS3 = ts.namespaces["ss3"]
+    resource = load_simulation_resource(ts, SS3.AbaqusSimulation)
+
+    assert "index" not in resource
+    card = SS3.AluminiumMaterialCard
+    node = Node({"depth": 0, "iri": card, "children": []})
+    assert node.kb_suffix() == "ss3:AluminiumMaterialCard"
+    assert (
+        resource.index["input"][card]
+        is resource.index["input"][node.kb_suffix()]
+    )
+    assert node.filename(resource) == "Section_materials_al.inp"
+    assert set(resource.index["output"]) == {SS3.AbaqusDeformationHistory}
+
+
+def test_simulation_resource_index_cached():
+    """Test that the index is built once per cached resource."""
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.cache import ResourceCache
+    from ontoconv.pipelines import load_simulation_resource
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+    SS3 = ts.namespaces["ss3"]
+    cache = ResourceCache(ts)
+    resource1 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache)
+    resource2 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache)
+    assert resource2.index is resource1.index
+
+    # The index depends on the namespaces used to expand prefixed IRIs
+    ts.bind("extra", "http://example.com/extra#")
+    resource3 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache)
+    assert resource3.index is not resource1.index
+    assert resource3.index == resource1.index
+
+    # A resource reloaded after invalidation gets a new index
+    cache.invalidate()
+    resource4 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache)
+    assert resource4.index is not resource3.index
@@ -0,0 +1,58 @@
+"""Test generating the workchain incrementally with iter_workchain()."""
+
+
+# if True:
+def test_iter_workchain(tmp_path):
+    """Test that the events add up to the output of parse_ontoflow()."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import iter_workchain, parse_ontoflow
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+
+    report = parse_ontoflow(data, kb, outdir=tmp_path)
+    expected = {
+        name: safe_load((tmp_path / name).read_text(encoding="utf8"))
+        for name in report["written"]
+    }
+
+    for max_workers in (None, 2):
+        events = list(iter_workchain(data, kb, max_workers=max_workers))
+        kinds = [event["kind"] for event in events]
+        assert kinds[-1] == "workchain"
+        assert kinds.count("workchain") == 1
+        assert kinds.count("final_step") == 1
+
+        pipelines = {
+            event["file"]: event["pipeline"]
+            for event in events
+            if event["kind"] == "pipeline"
+        }
+        assert pipelines == {
+            name: pipeline
+            for name, pipeline in expected.items()
+            if name != "workchain.yaml"
+        }
+        assert events[-1]["workchain"] == expected["workchain.yaml"]
+
+        # Each pipeline is yielded before its steps
+        seen = set()
+        for event in events[:-1]:
+            if event["kind"] == "pipeline":
+                seen.add(event["index"])
+            else:
+                assert event["index"] in seen
+
+    # Nothing is written without an output directory
+    assert not any(event.get("skipped") for event in events)
+
+    # Closing the generator early stops generating the remaining steps
+    gen = iter_workchain(data, kb, max_workers=2)
+    assert next(gen)["kind"] == "pipeline"
+    gen.close()
@@ -0,0 +1,93 @@
+"""Test building the tree of nodes from OntoFlow output."""
+
+
+# if True:
+def test_ontoflow_tree():
+    """Test node ids, names and indexes of the tree."""
+    from paths import indir
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import OntoFlowTree
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    tree = OntoFlowTree(data)
+    assert len(tree) == 12
+    assert [n.id for n in tree.nodes] == list(range(12))
+    assert tree.root is tree.nodes[-1]
+    assert tree.root.iri == data["iri"]
+
+    assert [n.id for n in tree.steps] == [6, 10]
+    assert [n.id for n in tree.ctx_nodes] == [0, 2, 4, 7, 8, 11]
+    assert [n.id for n in tree.datasets] == [1, 3, 5, 9]
+
+    (simulation,) = tree.by_iri[
+        "http://open-model.eu/ontologies/ss3#AbaqusSimulation"
+    ]
+    assert simulation is tree.steps[-1]
+    assert [n.id for n in simulation.inputs] == [1, 7, 9]
+    assert simulation.outputs == [tree.root]
+    assert tree.root.var_name("output") == "datanode_11_output"
+    assert tree.root.resource_type == {
+        "output": simulation.iri,
+        "input": "",
+    }
+
+
+def test_deep_ontoflow_tree():
+    """Test that trees deeper than the recursion limit can be built."""
+    import sys
+
+    from ontoconv.ontoflow import OntoFlowTree
+
+    depth = 2 * sys.getrecursionlimit()
+    data = {"depth": 0, "iri": "http://example.com#Node0"}
+    parent = data
+    for d in range(1, depth):
+        child = {
+            "depth": d,
+            "iri": f"http://example.com#Node{d}",
+            "predicate": "hasOutput" if d % 2 else "hasInput",
+            "children": [],
+        }
+        parent["children"] = [child]
+        parent = child
+    parent["children"] = [
+        {
+            "depth": depth,
+            "iri": "http://example.com#individual",
+            "predicate": "individual",
+        }
+    ]
+
+    tree = OntoFlowTree(data)
+    assert len(tree) == depth + 1
+    assert tree.root.id == depth
+    assert tree.nodes[0].output_type == "dataset"
+    assert len(tree.steps) == depth // 2
+
+
+def test_node_resource_type():
+    """Test that the backward compatible `resource_type` property of a
+    node cannot be silently modified, but can be assigned."""
+    import pytest
+
+    from ontoconv.ontoflow import Node
+
+    node = Node({"depth": 0, "iri": "http://example.com#Node"})
+    with pytest.raises(TypeError):
+        node.resource_type["output"] = "http://example.com#Output"
+    assert node.output_type == "dataset"
+
+    node.resource_type = {"output": "http://example.com#Output"}
+    assert node.output_type == "http://example.com#Output"
+    assert node.resource_type == {
+        "output": "http://example.com#Output",
+        "input": "",
+    }
+    with pytest.raises(KeyError):
+        node.resource_type = {"type": "dataset"}
+    assert "resource_type: {'output': 'http://example.com#Output'," in (
+        str(node)
+    )
@@ -0,0 +1,41 @@
+"""Test concurrent generation of pipelines and workchain."""
+
+
+# if True:
+def test_parse_ontoflow_concurrent(tmp_path):
+    """Test that concurrent and serial generation give the same files."""
+    from os import listdir
+
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    serialdir = tmp_path / "serial"
+    concurrentdir = tmp_path / "concurrent"
+    serialdir.mkdir()
+    concurrentdir.mkdir()
+    parse_ontoflow(data, ts, outdir=serialdir)
+    parse_ontoflow(data, ts, outdir=concurrentdir, max_workers=4)
+
+    filenames = sorted(listdir(serialdir))
+    assert filenames == [
+        "pipeline_0.yaml",
+        "pipeline_1.yaml",
+        "pipeline_final.yaml",
+        "workchain.yaml",
+    ]
+    assert sorted(listdir(concurrentdir)) == filenames
+    for filename in filenames:
+        with open(serialdir / filename, encoding="utf8") as f:
+            serial = safe_load(f)
+        with open(concurrentdir / filename, encoding="utf8") as f:
+            concurrent = safe_load(f)
+        assert concurrent == serial
@@ -0,0 +1,101 @@
+"""Test the persistent on-disk cache."""
+
+
+# if True:
+def test_persistent_cache(tmp_path):
+    """Test read-through caching, version validation and offline mode."""
+    import pytest
+    from paths import indir
+    from tripper import DCTERMS, Literal, Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.persistent import PersistentCache
+    from ontoconv.sinks import MemorySink
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    kb.add(("http://example.com/kb", DCTERMS.modified, Literal("2023")))
+    expected = MemorySink()
+    parse_ontoflow(data, kb, outdir=expected)
+
+    def convert(ts):
+        sink = MemorySink()
+        parse_ontoflow(data, ts, outdir=sink)
+        assert sink.files == expected.files
+
+    directory = tmp_path / "cache"
+    cache = PersistentCache(kb, directory)
+    convert(cache)
+    assert cache.misses == len(cache) > 0
+
+    # A new cache in the same directory does not contact the KB
+    cache = PersistentCache(kb, directory)
+    convert(cache)
+    assert cache.misses == 0
+
+    offline = PersistentCache(None, directory, offline=True)
+    convert(offline)
+    with pytest.raises(KeyError):
+        offline.load_container("http://example.com/missing", "basic")
+
+    # Invalidation accepts prefixed IRIs
+    n = len(cache)
+    cache.invalidate("ss3:AbaqusSimulation")
+    assert len(cache) == n - 1
+
+    # The cache is cleared when the KB version changes
+    kb.remove(("http://example.com/kb", DCTERMS.modified, None))
+    kb.add(("http://example.com/kb", DCTERMS.modified, Literal("2024")))
+    assert len(PersistentCache(kb, directory)) == 0
+
+    # Least recently used resources are evicted
+    cache = PersistentCache(kb, directory, max_bytes=2000)
+    convert(cache)
+    assert 0 < len(cache) < n
+    assert (
+        sum(f.stat().st_size for f in (directory / "entries").iterdir())
+        <= 2000
+    )
+
+
+def test_persistent_cache_memory(tmp_path):
+    """Test the in-memory layer and caching of a KB without version."""
+    import pytest
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.persistent import PersistentCache
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    iri = kb.expand_iri("ss3:AbaqusSimulation")
+
+    # Without version marker, nothing is stored on disk
+    with pytest.warns(UserWarning, match="only cached in memory"):
+        cache = PersistentCache(kb, tmp_path)
+    assert not cache.persistent
+    resource = cache.load_container(iri, "basic", True, shared=True)
+    assert cache.load_container(iri, "basic", True, shared=True) is resource
+    assert cache.load_container(iri, "basic", True) == resource
+    assert cache.load_container(iri, "basic", True) is not resource
+    assert (cache.misses, cache.hits, len(cache)) == (1, 3, 0)
+    assert not list((tmp_path / "entries").iterdir())
+
+    # Warm lookups are served from memory without reading the disk
+    cache = PersistentCache(kb, tmp_path, version="1")
+    assert cache.persistent
+    resource = cache.load_container(iri, "basic", True, shared=True)
+    for path in (tmp_path / "entries").iterdir():
+        path.unlink()
+    assert cache.load_container(iri, "basic", True, shared=True) is resource
+
+    # Invalidation also clears the memory
+    cache.invalidate("ss3:AbaqusSimulation")
+    assert (
+        cache.load_container(iri, "basic", True, shared=True) is not resource
+    )
+    assert cache.misses == 2
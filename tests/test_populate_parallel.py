@@ -0,0 +1,71 @@
+"""Test parallel population of the knowledge base from many files."""
+
+
+# if True:
+def test_populate_parallel(tmp_path):
+    """Test populating the KB from several yaml files in parallel."""
+    import warnings
+
+    import yaml
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import (
+        load_simulation_resource,
+        populate_triplestore,
+        populate_triplestore_parallel,
+    )
+
+    with open(indir / "resources.yaml", encoding="utf8") as f:
+        documentation = yaml.safe_load(f)
+
+    # Split the documentation into one file per section
+    datafile = tmp_path / "data.yaml"
+    simfile = tmp_path / "simulations.yaml"
+    with open(datafile, "w", encoding="utf8") as f:
+        yaml.safe_dump(
+            {
+                "prefixes": documentation["prefixes"],
+                "data_resources": documentation["data_resources"],
+            },
+            f,
+        )
+    with open(simfile, "w", encoding="utf8") as f:
+        yaml.safe_dump(
+            {
+                "prefixes": {
+                    "ss3": documentation["prefixes"]["ss3"],
+                    "oteio": "http://example.com/oteio#",
+                },
+                "simulation_resources": documentation["simulation_resources"],
+            },
+            f,
+        )
+
+    ts1 = Triplestore(backend="rdflib")
+    report1 = populate_triplestore(ts1, indir / "resources.yaml")
+
+    ts2 = Triplestore(backend="rdflib")
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter("always")
+        report2 = populate_triplestore_parallel(
+            ts2, [datafile, simfile], max_workers=2
+        )
+    assert report2["triples"] == report1["triples"]
+    assert report2["flushes"] == 1
+    assert report2["files"] == 2
+    assert report2["conflicts"] == [
+        {
+            "prefix": "oteio",
+            "namespace": documentation["prefixes"]["oteio"],
+            "conflicting_namespace": "http://example.com/oteio#",
+            "file": str(simfile),
+        }
+    ]
+    assert len(records) == 1
+    assert str(ts2.namespaces["oteio"]) == documentation["prefixes"]["oteio"]
+
+    SS3 = ts1.namespaces["ss3"]
+    assert load_simulation_resource(
+        ts2, SS3.AbaqusSimulation
+    ) == load_simulation_resource(ts1, SS3.AbaqusSimulation)
@@ -0,0 +1,91 @@
+"""Test generating pipelines without a knowledge base."""
+
+
+# if True:
+def test_yaml_provider():
+    """Test loading resources from a YAML provider."""
+    import pytest
+    from paths import indir
+    from tripper.triplestore import Triplestore
+
+    from ontoconv.pipelines import (
+        load_simulation_resource,
+        populate_triplestore,
+    )
+    from ontoconv.providers import YamlProvider
+
+    yamlfile = indir / "resources.yaml"
+    kb = Triplestore(backend="rdflib")
+    populate_triplestore(kb, yamlfile)
+    provider = YamlProvider(yamlfile)
+    assert provider.namespaces["ss3"] == str(kb.namespaces["ss3"])
+    assert "ss3:AbaqusSimulation" in provider
+    assert len(provider.resources("data_resources")) == 2
+
+    iri = "http://open-model.eu/ontologies/ss3#AbaqusSimulation"
+    resource = load_simulation_resource(provider, iri)
+    assert resource == load_simulation_resource(kb, iri)
+    assert resource.index["input"].keys() == (
+        load_simulation_resource(kb, iri).index["input"].keys()
+    )
+    with pytest.raises(KeyError):
+        provider.load_container("ss3:Missing")
+
+    # Returned containers are private copies unless shared
+    container = provider.load_container(iri)
+    container["command"] = "modified"
+    assert provider.load_container(iri, shared=True)["command"] == (
+        "run_abaqus.sh"
+    )
+
+
+def test_yaml_provider_parse_ontoflow(tmp_path):
+    """Test that a YAML provider generates the same files as a KB
+    populated from the same documentation."""
+    import pytest
+    import yaml
+    from flows import flow, populated_kb
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.pipelines import triplestore_settings
+    from ontoconv.providers import YamlProvider
+    from ontoconv.sinks import MemorySink
+
+    kb = populated_kb(tmp_path)
+    with open(tmp_path / "resources.yaml", encoding="utf8") as f:
+        documentation = yaml.safe_load(f)
+    provider = YamlProvider(settings=triplestore_settings(kb))
+    provider.add_documentation(documentation)
+
+    (tmp_path / "kb").mkdir()
+    (tmp_path / "yaml").mkdir()
+    report = parse_ontoflow(flow(), kb, outdir=tmp_path / "kb")
+    assert parse_ontoflow(flow(), provider, outdir=tmp_path / "yaml") == (
+        report
+    )
+    for name in report["written"]:
+        assert (tmp_path / "yaml" / name).read_text(encoding="utf8") == (
+            tmp_path / "kb" / name
+        ).read_text(encoding="utf8")
+
+    # Settings are needed to document the final output in a KB
+    with pytest.raises(KeyError):
+        parse_ontoflow(
+            flow(),
+            YamlProvider(tmp_path / "resources.yaml"),
+            outdir=MemorySink(),
+        )
+
+
+def test_incomplete_provider():
+    """Test that a provider without `load_container()` cannot be
+    created."""
+    import pytest
+
+    from ontoconv.cache import ResourceProvider
+
+    class IncompleteProvider(ResourceProvider):
+        """Provider not implementing `load_container()`."""
+
+    with pytest.raises(TypeError):
+        IncompleteProvider()  # pylint: disable=abstract-class-instantiated
@@ -0,0 +1,148 @@
+"""Test ranking of alternative routes by their KPAs."""
+
+
+def model(iri, accuracy, time, opensource, inputs):
+    """Return an OntoFlow model node."""
+    return {
+        "iri": iri,
+        "predicate": "hasOutput",
+        "kpas": {
+            "Accuracy": accuracy,
+            "SimulationTime": time,
+            "OpenSource": opensource,
+        },
+        "children": inputs,
+    }
+
+
+def flow():
+    """Return OntoFlow output with three alternative routes.
+
+    R is produced by either M1 or M2.  The input X of M1 is either the
+    individual x1 or produced by G.
+    """
+
+    def individual(iri):
+        return {"iri": iri, "predicate": "individual"}
+
+    def cls(iri, children):
+        return {"iri": iri, "predicate": "hasInput", "children": children}
+
+    return {
+        "iri": "R",
+        "depth": 0,
+        "children": [
+            model(
+                "M1",
+                50,
+                10,
+                1,
+                [
+                    cls(
+                        "X",
+                        [
+                            individual("x1"),
+                            model(
+                                "G", 30, 1, 1, [cls("Y", [individual("y")])]
+                            ),
+                        ],
+                    )
+                ],
+            ),
+            model("M2", 80, 100, 0, [cls("Z", [individual("z")])]),
+        ],
+    }
+
+
+# if True:
+def test_route_set():
+    """Test aggregating and ranking the KPAs of all routes."""
+    import numpy as np
+    import pytest
+
+    from ontoconv.routes import RouteSet
+
+    data = flow()
+    routes = RouteSet(data)
+    assert len(routes) == 3
+    assert routes.names == ("Accuracy", "SimulationTime", "OpenSource")
+    assert routes.values.tolist() == [
+        [50, 10, 1],
+        [30, 11, 1],
+        [80, 100, 0],
+    ]
+    assert routes.kpas(1) == {
+        "Accuracy": 30,
+        "SimulationTime": 11,
+        "OpenSource": 1,
+    }
+    assert np.allclose(routes.scores(), [0.4 + 1 + 1, 0 + 89 / 90 + 1, 1.0])
+    assert [front.tolist() for front in routes.pareto_fronts()] == [
+        [0, 2],
+        [1],
+    ]
+    assert len(routes.pareto_fronts(1)) == 1
+    assert routes.rank().tolist() == [0, 1, 2]
+    assert routes.rank(2, method="pareto").tolist() == [0, 2]
+    assert routes.rank(1, weights={"Accuracy": 10}).tolist() == [2]
+
+    # Each route selects a single alternative of every class node
+    route = routes.route(1)
+    assert [child["iri"] for child in route["children"]] == ["M1"]
+    x = route["children"][0]["children"][0]
+    assert [child["iri"] for child in x["children"]] == ["G"]
+    assert [child["iri"] for child in routes.route(2)["children"]] == ["M2"]
+    assert len(data["children"]) == 2
+
+    # Custom senses and aggregations
+    routes = RouteSet(
+        flow(),
+        senses={"SimulationTime": "min"},
+        aggregations={"SimulationTime": "max"},
+    )
+    assert routes.values[:, 0].tolist() == [10, 10, 100]
+
+    with pytest.raises(ValueError):
+        RouteSet(flow(), max_routes=2)
+    with pytest.raises(ValueError):
+        routes.rank(method="best")
+    with pytest.raises(ValueError):
+        routes.scores({"Cost": 1})
+    with pytest.raises(IndexError):
+        routes.route(3)
+
+
+def test_parse_top_routes(tmp_path):
+    """Test converting the best routes of OntoFlow output."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.routes import RouteSet, parse_top_routes
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    # The tree has no alternatives, so the only route is the tree itself
+    routes = RouteSet(indir / "testflow.yaml")
+    assert len(routes) == 1
+    assert routes.kpas(0) == {
+        "Accuracy": 50,
+        "SimulationTime": 5000.1,
+        "OpenSource": 1,
+    }
+    assert routes.route(0) == routes.data
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    (tmp_path / "tree").mkdir()
+    report = parse_ontoflow(data, kb, outdir=tmp_path / "tree")
+    results = parse_top_routes(data, kb, tmp_path / "routes", k=2)
+    assert len(results) == 1
+    assert results[0]["route"] == 0
+    assert results[0]["written"] == report["written"]
+    for name in report["written"]:
+        assert (tmp_path / "routes" / "route_0" / name).read_text(
+            encoding="utf8"
+        ) == (tmp_path / "tree" / name).read_text(encoding="utf8")
@@ -0,0 +1,150 @@
+"""Test the conversion server."""
+
+from contextlib import contextmanager
+
+
+@contextmanager
+def serve(address):
+    """Run a conversion server for SS3kb.ttl on `address` in a thread
+    and return a function sending requests to it.
+
+    The returned function takes the request path, an optional body (a
+    POST request is sent if given) and content type, and returns the
+    HTTP status and the decoded JSON response.
+    """
+    import http.client
+    import json
+    import socket
+    import threading
+
+    from paths import indir
+
+    from ontoconv.server import ConversionServer, ConversionService
+
+    service = ConversionService([indir / "SS3kb.ttl"])
+    server = ConversionServer(address, service, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def connect():
+        if server.address_family == socket.AF_UNIX:
+            conn = http.client.HTTPConnection("localhost")
+            conn.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.sock.connect(server.server_address)
+            return conn
+        return http.client.HTTPConnection(*server.server_address)
+
+    def request(path, body=None, content_type="application/json"):
+        conn = connect()
+        try:
+            conn.request(
+                "GET" if body is None else "POST",
+                path,
+                body=body,
+                headers={"Content-Type": content_type},
+            )
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    try:
+        yield request
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def expected_files(tmp_path):
+    """Convert testflow.yaml with `parse_ontoflow()` into `tmp_path`
+    and return the OntoFlow tree."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    parse_ontoflow(data, kb, outdir=tmp_path)
+    return data
+
+
+def test_server_tcp(tmp_path):
+    """Test concurrent conversions and reload over TCP."""
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    from paths import indir
+    from yaml import safe_load
+
+    data = expected_files(tmp_path)
+    body = json.dumps(data).encode()
+
+    with serve(("127.0.0.1", 0)) as request:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(lambda _: request("/convert", body), range(4))
+            )
+        for status, result in results:
+            assert status == 200
+            assert set(result["files"]) == {
+                "pipeline_0.yaml",
+                "pipeline_1.yaml",
+                "pipeline_final.yaml",
+                "workchain.yaml",
+            }
+            for name, content in result["files"].items():
+                assert content == (tmp_path / name).read_text()
+
+        # YAML request body
+        with open(indir / "testflow.yaml", "rb") as f:
+            assert request("/convert", f.read(), "application/yaml") == (
+                results[0]
+            )
+
+        # Structured JSON response
+        _, result = request("/convert?format=json", body)
+        for name, content in result["files"].items():
+            assert content == safe_load((tmp_path / name).read_text())
+
+        _, status = request("/status")
+        assert status["requests"] == 6
+        assert status["cached_resources"] > 0
+
+        _, status = request("/reload", b"")
+        assert status["cached_resources"] == 0
+
+
+def test_server_unix_socket(tmp_path):
+    """Test conversion over a Unix socket."""
+    import json
+
+    data = expected_files(tmp_path)
+    with serve(str(tmp_path / "server.sock")) as request:
+        status, result = request("/convert", json.dumps(data).encode())
+        assert status == 200
+        for name, content in result["files"].items():
+            assert content == (tmp_path / name).read_text()
+
+        _, status = request("/status")
+        assert status["requests"] == 1
+
+
+def test_server_errors():
+    """Test error responses."""
+    with serve(("127.0.0.1", 0)) as request:
+        status, result = request("/convert", b"[1, 2]")
+        assert status == 400
+        assert "error" in result
+
+        status, _ = request("/convert?format=xml", b"{}")
+        assert status == 400
+
+        status, _ = request("/unknown")
+        assert status == 404
+
+        _, status = request("/status")
+        assert status["requests"] == 0
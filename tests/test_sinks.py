@@ -0,0 +1,69 @@
+"""Test output sinks for parse_ontoflow()."""
+
+
+# if True:
+def test_sinks(tmp_path):
+    """Test that all sinks store the same files."""
+    import tarfile
+    import zipfile
+
+    import pytest
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.sinks import ArchiveSink, MemorySink
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+
+    outdir = tmp_path / "out"
+    outdir.mkdir()
+    report = parse_ontoflow(data, kb, outdir=outdir)
+    expected = {
+        name: (outdir / name).read_text(encoding="utf8")
+        for name in report["written"]
+    }
+
+    sink = MemorySink()
+    assert parse_ontoflow(data, kb, outdir=sink, max_workers=4) == report
+    assert sink.files == {
+        name: safe_load(text) for name, text in expected.items()
+    }
+    assert sink.texts() == expected
+
+    with ArchiveSink(tmp_path / "out.zip") as sink:
+        parse_ontoflow(data, kb, outdir=sink)
+    with zipfile.ZipFile(tmp_path / "out.zip") as archive:
+        assert {
+            name: archive.read(name).decode("utf8")
+            for name in archive.namelist()
+        } == expected
+
+    with ArchiveSink(tmp_path / "out.tar.gz") as sink:
+        parse_ontoflow(data, kb, outdir=sink, max_workers=4)
+    with tarfile.open(tmp_path / "out.tar.gz") as archive:
+        assert {
+            member.name: archive.extractfile(member).read().decode("utf8")
+            for member in archive.getmembers()
+        } == expected
+
+    with pytest.raises(ValueError):
+        ArchiveSink(tmp_path / "out.rar")
+
+
+def test_incomplete_sink():
+    """Test that a sink without `write_text()` cannot be created."""
+    import pytest
+
+    from ontoconv.sinks import OutputSink
+
+    class IncompleteSink(OutputSink):
+        """Sink not implementing `write_text()`."""
+
+    with pytest.raises(TypeError):
+        IncompleteSink()  # pylint: disable=abstract-class-instantiated
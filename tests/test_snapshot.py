@@ -0,0 +1,148 @@
+"""Test compiled knowledge base snapshots."""
+
+
+# if True:
+def test_snapshot_parse_ontoflow(tmp_path):
+    """Test that a snapshot generates the same files as the KB."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.snapshot import compile_kb, load_snapshot
+
+    sources = [indir / "SS3kb.ttl"]
+    compiled = compile_kb(sources, tmp_path / "kb.snapshot")
+    snapshot = load_snapshot(tmp_path / "kb.snapshot", sources=sources)
+    assert snapshot.data == compiled.data
+    assert not snapshot.is_stale()
+
+    SS3 = "http://open-model.eu/ontologies/ss3#"
+    assert f"{SS3}AbaqusSimulation" in snapshot.resources(
+        "simulation_resources"
+    )
+    assert "ss3:AbaqusSimulation" in snapshot
+    assert "http://open-model.eu/ontologies/ss3kb#abaqus_config1" in (
+        snapshot.resources("data_resources")
+    )
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    (tmp_path / "kb").mkdir()
+    (tmp_path / "snapshot").mkdir()
+    parse_ontoflow(data, kb, outdir=tmp_path / "kb")
+    parse_ontoflow(data, snapshot, outdir=tmp_path / "snapshot")
+    for filename in [
+        "pipeline_0.yaml",
+        "pipeline_1.yaml",
+        "pipeline_final.yaml",
+        "workchain.yaml",
+    ]:
+        assert (tmp_path / "snapshot" / filename).read_text() == (
+            tmp_path / "kb" / filename
+        ).read_text()
+
+
+def test_snapshot_staleness(tmp_path):
+    """Test detection of stale and invalid snapshots."""
+    import os
+    import pickle
+    import shutil
+    import zlib
+
+    import pytest
+    from paths import indir
+
+    from ontoconv.snapshot import (
+        SNAPSHOT_MAGIC,
+        SnapshotError,
+        StaleSnapshotError,
+        compile_kb,
+        load_snapshot,
+    )
+
+    source = tmp_path / "kb.ttl"
+    shutil.copy(indir / "SS3kb.ttl", source)
+    filename = tmp_path / "kb.snapshot"
+    compile_kb([source], filename)
+
+    # Touched, but not modified
+    os.utime(source, (0, 0))
+    assert not load_snapshot(filename, sources=[source]).is_stale()
+
+    # Compiled from other sources
+    with pytest.raises(StaleSnapshotError):
+        load_snapshot(filename, sources=[indir / "SS3kb.ttl"])
+
+    # Modified source
+    with open(source, "a", encoding="utf8") as f:
+        f.write("\n# Modified\n")
+    with pytest.raises(StaleSnapshotError):
+        load_snapshot(filename, sources=[source])
+    snapshot = load_snapshot(filename, sources=[source], recompile=True)
+    assert not snapshot.is_stale([source])
+    assert not load_snapshot(filename, sources=[source]).is_stale()
+
+    # Invalid snapshots
+    filename.write_bytes(b"not a snapshot")
+    with pytest.raises(SnapshotError):
+        load_snapshot(filename)
+    filename.write_bytes(
+        SNAPSHOT_MAGIC + zlib.compress(pickle.dumps(os.system))
+    )
+    with pytest.raises(SnapshotError, match="Forbidden"):
+        load_snapshot(filename)
+
+
+def test_snapshot_referenced_resources(tmp_path):
+    """Test that resources referenced from the rest of the knowledge
+    base, and dict-shaped data resources, are compiled."""
+    from paths import indir
+    from tripper import OTEIO, RDF, RDFS, Triplestore
+    from tripper.convert import load_container, save_container
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.sinks import MemorySink
+    from ontoconv.snapshot import compile_snapshot
+
+    SS3 = "http://open-model.eu/ontologies/ss3#"
+    SS3KB = "http://open-model.eu/ontologies/ss3kb#"
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    kb.add((f"{SS3}FastSimulation", RDFS.subClassOf, f"{SS3}AbaqusSimulation"))
+    kb.add((f"{SS3KB}run1", RDFS.seeAlso, f"{SS3KB}abaqus_config1"))
+    save_container(
+        kb,
+        {"downloadUrl": "file://data.json", "mediaType": "application/json"},
+        f"{SS3KB}dict_resource",
+        recognised_keys="basic",
+    )
+    kb.add((f"{SS3KB}dict_resource", RDF.type, OTEIO.DataSource))
+
+    snapshot = compile_snapshot(kb, tmp_path / "kb.snapshot")
+    assert f"{SS3}AbaqusSimulation" in snapshot.resources(
+        "simulation_resources"
+    )
+    assert {f"{SS3KB}abaqus_config1", f"{SS3KB}dict_resource"} <= set(
+        snapshot.resources("data_resources")
+    )
+    assert snapshot.load_container(
+        f"{SS3KB}dict_resource", "basic"
+    ) == load_container(kb, f"{SS3KB}dict_resource", "basic")
+    assert snapshot.load_container(
+        "ss3:AbaqusSimulation", "basic"
+    ) == load_container(
+        kb, f"{SS3}AbaqusSimulation", "basic", ignore_unrecognised=True
+    )
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+    expected = MemorySink()
+    parse_ontoflow(data, kb, outdir=expected)
+    sink = MemorySink()
+    parse_ontoflow(data, snapshot, outdir=sink)
+    assert sink.files == expected.files
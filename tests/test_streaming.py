@@ -0,0 +1,111 @@
+"""Test streaming parsing of large YAML documents."""
+
+
+# if True:
+def test_iter_documentation():
+    """Test iterating over the items of a documentation file."""
+    import yaml
+    from paths import indir
+
+    from ontoconv.streaming import iter_documentation
+
+    with open(indir / "resources.yaml", encoding="utf8") as f:
+        documentation = yaml.safe_load(f)
+
+    items = list(iter_documentation(indir / "resources.yaml"))
+    assert [(section, key) for section, key, _ in items] == [
+        (section, key)
+        for section, value in documentation.items()
+        if isinstance(value, dict)
+        for key in value
+    ]
+    for section, key, value in items:
+        assert value == documentation[section][key]
+
+
+def test_populate_streamed():
+    """Test populating the KB in streaming mode."""
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.pipelines import (
+        load_simulation_resource,
+        populate_triplestore,
+    )
+
+    ts1 = Triplestore(backend="rdflib")
+    report1 = populate_triplestore(ts1, indir / "resources.yaml")
+
+    ts2 = Triplestore(backend="rdflib")
+    report2 = populate_triplestore(
+        ts2, indir / "resources.yaml", stream=True, batch=True, chunk_size=50
+    )
+    assert report2["triples"] == report1["triples"]
+    assert ts2.namespaces.keys() == ts1.namespaces.keys()
+
+    SS3 = ts1.namespaces["ss3"]
+    assert load_simulation_resource(
+        ts2, SS3.AbaqusSimulation
+    ) == load_simulation_resource(ts1, SS3.AbaqusSimulation)
+
+
+def test_load_ontoflow(tmp_path):
+    """Test stream-parsing OntoFlow output, keeping only the fields
+    needed for conversion."""
+    import io
+    import json
+
+    import pytest
+    import yaml
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.streaming import load_ontoflow
+
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = yaml.safe_load(f)
+
+    def prune(ndata):
+        pruned = {
+            key: ndata[key]
+            for key in ("iri", "depth", "predicate")
+            if key in ndata
+        }
+        if "children" in ndata:
+            pruned["children"] = [prune(child) for child in ndata["children"]]
+        return pruned
+
+    tree = load_ontoflow(indir / "testflow.yaml")
+    assert tree == prune(data)
+
+    jsonfile = tmp_path / "testflow.json"
+    jsonfile.write_text(json.dumps(data), encoding="utf8")
+    assert load_ontoflow(jsonfile) == tree
+
+    # Aliases to shared subtrees resolve to the same node
+    child = {"iri": "b", "depth": 1, "predicate": "hasInput", "kpas": {}}
+    shared = load_ontoflow(
+        io.StringIO(
+            yaml.safe_dump({"iri": "a", "depth": 0, "children": [child] * 2})
+        )
+    )
+    assert shared["children"] == [prune(child)] * 2
+    assert shared["children"][0] is shared["children"][1]
+
+    with pytest.raises(TypeError):
+        load_ontoflow(io.StringIO("[1, 2]"))
+    with pytest.raises(ValueError):
+        load_ontoflow(io.StringIO(""))
+
+    # parse_ontoflow() accepts the name of the file
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    (tmp_path / "dict").mkdir()
+    (tmp_path / "file").mkdir()
+    report = parse_ontoflow(data, kb, outdir=tmp_path / "dict")
+    assert parse_ontoflow(jsonfile, kb, outdir=tmp_path / "file") == report
+    for name in report["written"]:
+        assert (tmp_path / "file" / name).read_text(encoding="utf8") == (
+            tmp_path / "dict" / name
+        ).read_text(encoding="utf8")
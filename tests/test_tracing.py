@@ -0,0 +1,90 @@
+"""Test tracing of conversion phases."""
+
+
+# if True:
+def test_trace_parse_ontoflow(tmp_path):
+    """Test tracing populate_triplestore() and parse_ontoflow()."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.pipelines import populate_triplestore
+    from ontoconv.tracing import Tracer, span
+
+    # Tracing is disabled by default
+    assert span("phase") is span("other")
+
+    finished = []
+    tracer = Tracer(hooks=[finished.append])
+
+    ts = Triplestore(backend="rdflib")
+    populate_triplestore(ts, indir / "resources.yaml", tracer=tracer)
+    report = tracer.report()
+    phases = report["phases"]
+    assert phases["populate_triplestore"]["count"] == 1
+    assert phases["populate_triplestore/add_triples"]["calls"]["add"] >= 1
+
+    # Hooks are called with every finished span
+    assert [s.as_dict() for s in finished] == report["spans"]
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    tracer = Tracer()
+    parse_ontoflow(data, kb, outdir=tmp_path, tracer=tracer, max_workers=2)
+    report = tracer.report()
+    phases = report["phases"]
+
+    assert phases["parse_ontoflow"]["count"] == 1
+    assert phases["parse_ontoflow/build_tree"]["count"] == 1
+    assert phases["parse_ontoflow/generate_step"]["count"] == 2
+    assert phases["parse_ontoflow/generate_final_step"]["count"] == 1
+    assert (
+        phases["parse_ontoflow/generate_step/generate_pipeline"]["count"] == 2
+    )
+    assert "parse_ontoflow/generate_step/dump_yaml" in phases
+    assert "parse_ontoflow/dump_yaml" in phases
+    assert any(path.endswith("/decorate_pipeline") for path in phases)
+    assert any(path.endswith("/load_container") for path in phases)
+
+    steps = [s for s in report["spans"] if s["name"] == "generate_step"]
+    assert sorted(s["attrs"]["step"] for s in steps) == [0, 1]
+    assert report["calls"]["query"] > 0
+    assert report["calls"]["query"] == sum(
+        phase["calls"].get("query", 0) for phase in phases.values()
+    )
+    assert all(s["seconds"] >= 0 for s in report["spans"])
+
+
+def test_trace_parse_ontoflow_with_cache(tmp_path):
+    """Test that KB queries made through a cache passed by the caller
+    are recorded."""
+    from paths import indir
+    from tripper.triplestore import Triplestore
+    from yaml import safe_load
+
+    from ontoconv.cache import ResourceCache
+    from ontoconv.ontoflow import parse_ontoflow
+    from ontoconv.tracing import Tracer
+
+    kb = Triplestore(backend="rdflib")
+    kb.parse(indir / "SS3kb.ttl")
+    with open(indir / "testflow.yaml", encoding="utf8") as f:
+        data = safe_load(f)
+
+    tracer = Tracer()
+    parse_ontoflow(data, kb, outdir=tmp_path, tracer=tracer)
+    expected = tracer.report()["calls"]["query"]
+
+    cache = ResourceCache(kb)
+    tracer = Tracer()
+    parse_ontoflow(data, kb, outdir=tmp_path, tracer=tracer, cache=cache)
+    assert tracer.report()["calls"]["query"] == expected
+
+    # Resources that are already cached do not query the KB
+    tracer = Tracer()
+    parse_ontoflow(data, kb, outdir=tmp_path, tracer=tracer, cache=cache)
+    assert tracer.report()["calls"].get("query", 0) < expected
@@ -0,0 +1,59 @@
+"""Test read-only resource views."""
+
+
+# if True:
+def test_views():
+    """Test attribute access, immutability and absence of cycles."""
+    import gc
+
+    import pytest
+    from paths import indir
+    from tripper import Triplestore
+
+    from ontoconv.cache import ResourceCache
+    from ontoconv.pipelines import load_simulation_resource
+    from ontoconv.views import ListView, ResourceView, thaw
+
+    data = {"a": {"b": [1, {"c": 2}]}, "keys": 3}
+    view = ResourceView(data)
+    assert view.a.b[1].c == 2
+    assert isinstance(view.a.b, ListView)
+    assert view.a.b[-1] == {"c": 2}
+    assert view["keys"] == 3
+    assert view == data
+    assert dict(view.a) == {"b": [1, {"c": 2}]}
+    with pytest.raises(AttributeError):
+        view.missing  # pylint: disable=pointless-statement
+    with pytest.raises(TypeError):
+        view["a"] = 1
+    with pytest.raises(AttributeError):
+        view.a = 1
+
+    copied = thaw(view.a)
+    copied["b"].append(3)
+    assert data["a"]["b"] == [1, {"c": 2}]
+    assert thaw(data) is data
+
+    ts = Triplestore(backend="rdflib")
+    ts.parse(indir / "SS3kb.ttl")
+    SS3 = ts.namespaces["ss3"]
+    cache = ResourceCache(ts)
+    r1 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache=cache)
+    r2 = load_simulation_resource(ts, SS3.AbaqusSimulation, cache=cache)
+    assert r1.command == "run_abaqus.sh"
+    assert r1 == r2
+
+    # Views share the cached resource and are freed without the
+    # cyclic garbage collector
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(10):
+            resource = load_simulation_resource(
+                ts, SS3.AbaqusSimulation, cache=cache
+            )
+            assert resource.input == r1.input
+            del resource
+        assert gc.collect() == 0
+    finally:
+        gc.enable()